@@ -0,0 +1,10 @@
+"""
+Benchmarks do leitor de REM e RET.
+
+Executar a partir da raiz do projeto, por exemplo:
+
+    python -m benchmarks.executar --detalhes 10000 --detalhes 1000000 --saida resultados.json
+    python -m benchmarks.executar --detalhes 1000000 --comparar resultados.json
+    python -m benchmarks.gerador /tmp/cnab 100000
+    python -m benchmarks.formatar_valor
+"""
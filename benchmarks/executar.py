@@ -0,0 +1,245 @@
+"""
+Benchmark de ponta a ponta sobre arquivos REM/RET sintéticos.
+
+Para cada tamanho pedido, gera um par de arquivos com `GeradorCnab` e mede
+cada etapa em um processo novo (tempo, registros/s e pico de memória):
+processadores, extratores, análise e formatadores. Os resultados são
+gravados em JSON, com a versão do código, para comparação entre versões.
+
+    python -m benchmarks.executar [--detalhes N ...] [--etapas a,b] [--processos N]
+                                  [--repeticoes N] [--saida resultados.json]
+                                  [--comparar anterior.json] [--diretorio DIR]
+"""
+
+import contextlib
+import io
+import json
+import multiprocessing
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.gerador import GeradorCnab
+
+DETALHES_PADRAO = [10000, 100000]
+ETAPAS = ["processar_rem", "processar_ret", "extrair_rem", "extrair_ret", "analise",
+          "formatar_valor", "formatar_data"]
+REPETICOES_PADRAO = 1
+# Variação de tempo a partir da qual a comparação aponta regressão.
+TOLERANCIA_REGRESSAO = 0.10
+
+
+def _coluna_ret(arquivo_ret, campos):
+    """Valores brutos dos campos pedidos em todos os detalhes do RET."""
+    from src.layouts.cnab400 import RET_DETALHE
+    from src.utils.leitura import LeitorMapeado
+
+    indices = [RET_DETALHE.nomes.index(campo) for campo in campos]
+    valores = []
+    with LeitorMapeado(arquivo_ret) as leitor:
+        for registro in leitor:
+            if registro[:1] == b"7":
+                lidos = RET_DETALHE.ler_bytes(registro)
+                valores.extend(lidos[indice] for indice in indices)
+    return valores
+
+
+def _preparar(etapa, arquivo_rem, arquivo_ret, diretorio_saida, processos):
+    """Função da etapa (sem argumentos) e quantidade de registros que ela trata."""
+    from src.analise import AnaliseGenerator
+    from src.extratores.rem_extractor import RemExtractor
+    from src.extratores.ret_extractor import RetExtractor
+    from src.processadores.rem_processor import RemProcessor
+    from src.processadores.ret_processor import RetProcessor
+    from src.utils.formatadores import formatar_data, formatar_valor
+
+    if etapa == "processar_rem":
+        return lambda: RemProcessor.processar(arquivo_rem, diretorio_saida / "SINTETICO_REM.txt",
+                                              processos=processos), None
+    if etapa == "processar_ret":
+        return lambda: RetProcessor.processar(arquivo_ret, diretorio_saida / "SINTETICO_RET.txt",
+                                              processos=processos), None
+    if etapa == "extrair_rem":
+        return lambda: RemExtractor.extrair(arquivo_rem, processos), None
+    if etapa == "extrair_ret":
+        return lambda: RetExtractor.extrair(arquivo_ret, processos), None
+    if etapa == "analise":
+        return lambda: AnaliseGenerator.gerar(arquivo_rem.parent, diretorio_saida, processos=processos), None
+    if etapa == "formatar_valor":
+        valores = _coluna_ret(arquivo_ret, ["valor_titulo", "desconto", "valor_recebido"])
+        return lambda: [formatar_valor(valor) for valor in valores], len(valores)
+    if etapa == "formatar_data":
+        datas = _coluna_ret(arquivo_ret, ["data_liquidacao", "data_vencimento", "data_credito"])
+        return lambda: [formatar_data(data) for data in datas], len(datas)
+    raise ValueError(f"Etapa desconhecida: {etapa}")
+
+
+def _executar_etapa(etapa, arquivo_rem, arquivo_ret, diretorio_saida, processos, repeticoes, registros, fila):
+    """Executada em um processo novo, para que o pico de memória seja só o da etapa."""
+    try:
+        from src.utils.metricas import pico_memoria_mb
+
+        memoria_base = pico_memoria_mb()
+        funcao, quantidade = _preparar(etapa, arquivo_rem, arquivo_ret, diretorio_saida, processos)
+        tempos = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                funcao()
+                tempos.append(time.perf_counter() - inicio)
+        fila.put({"memoria_base_mb": memoria_base, "memoria_pico_mb": pico_memoria_mb(),
+                  "segundos": min(tempos), "registros": quantidade or registros})
+    except Exception as e:
+        fila.put({"erro": f"{type(e).__name__}: {e}"})
+
+
+def medir_etapa(etapa, arquivo_rem, arquivo_ret, diretorio_saida, registros, processos=1,
+                repeticoes=REPETICOES_PADRAO):
+    """
+    Mede uma etapa em um processo novo (`spawn`).
+
+    Returns:
+        Dicionário com etapa, registros, segundos (o menor das repetições),
+        registros_por_segundo e pico de memória em MB
+    """
+    contexto = multiprocessing.get_context("spawn")
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_executar_etapa, args=(etapa, arquivo_rem, arquivo_ret, diretorio_saida,
+                                                              processos, repeticoes, registros, fila))
+    processo.start()
+    resultado = fila.get()
+    processo.join()
+
+    resultado["etapa"] = etapa
+    if "erro" not in resultado:
+        segundos = resultado["segundos"]
+        resultado["segundos"] = round(segundos, 4)
+        resultado["registros_por_segundo"] = round(resultado["registros"] / segundos) if segundos else None
+    return resultado
+
+
+def _versao():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except Exception:
+        return None
+
+
+def executar(tamanhos, etapas=ETAPAS, processos=1, repeticoes=REPETICOES_PADRAO, diretorio=None):
+    """
+    Gera os arquivos de cada tamanho e mede as etapas.
+
+    Returns:
+        Dicionário com o ambiente (versão, Python, plataforma, data) e a
+        lista de resultados
+    """
+    resultados = []
+    with tempfile.TemporaryDirectory(dir=diretorio, prefix="bench_cnab_") as temporario:
+        for detalhes in tamanhos:
+            diretorio_entrada = Path(temporario) / f"entrada_{detalhes}"
+            diretorio_saida = Path(temporario) / f"saida_{detalhes}"
+            diretorio_saida.mkdir(parents=True)
+
+            inicio = time.perf_counter()
+            arquivo_rem, arquivo_ret, detalhes_ret = GeradorCnab().gerar(diretorio_entrada, detalhes)
+            print(f"\n{detalhes} detalhes (RET: {detalhes_ret}) gerados em {time.perf_counter() - inicio:.1f}s")
+
+            registros = {"processar_rem": detalhes, "extrair_rem": detalhes, "processar_ret": detalhes_ret,
+                         "extrair_ret": detalhes_ret, "analise": detalhes + detalhes_ret}
+            for etapa in etapas:
+                resultado = medir_etapa(etapa, arquivo_rem, arquivo_ret, diretorio_saida, registros.get(etapa),
+                                        processos, repeticoes)
+                resultado["detalhes"] = detalhes
+                resultados.append(resultado)
+                _exibir(resultado)
+
+            for arquivo in list(diretorio_entrada.iterdir()) + list(diretorio_saida.iterdir()):
+                arquivo.unlink()
+
+    return {
+        "versao": _versao(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "processos": processos,
+        "repeticoes": repeticoes,
+        "resultados": resultados,
+    }
+
+
+def _exibir(resultado):
+    if "erro" in resultado:
+        print(f"  {resultado['etapa']:<15} ERRO: {resultado['erro']}")
+        return
+    print(f"  {resultado['etapa']:<15} {resultado['segundos']:>9.3f}s "
+          f"{resultado['registros_por_segundo'] or 0:>12,} reg/s {resultado['memoria_pico_mb']:>9.1f} MB")
+
+
+def comparar(atual, anterior):
+    """Exibe a variação de tempo e memória de cada etapa em relação a um resultado anterior."""
+    referencia = {(item["detalhes"], item["etapa"]): item for item in anterior["resultados"] if "erro" not in item}
+    print(f"\nComparação com {anterior.get('versao') or '?'} ({anterior.get('data', '?')}):")
+    for item in atual["resultados"]:
+        antigo = referencia.get((item["detalhes"], item["etapa"]))
+        if antigo is None or "erro" in item or not antigo["segundos"]:
+            continue
+        tempo = item["segundos"] / antigo["segundos"] - 1
+        memoria = item["memoria_pico_mb"] - antigo["memoria_pico_mb"]
+        alerta = "  <- regressão" if tempo > TOLERANCIA_REGRESSAO else ""
+        print(f"  {item['detalhes']:>9} {item['etapa']:<15} tempo {tempo:+7.1%}  memória {memoria:+8.1f} MB{alerta}")
+
+
+def _opcoes(argumentos):
+    opcoes = {"detalhes": [], "etapas": ETAPAS, "processos": 1, "repeticoes": REPETICOES_PADRAO,
+              "saida": None, "comparar": None, "diretorio": None}
+    i = 0
+    while i < len(argumentos):
+        nome = argumentos[i].lstrip("-").lower()
+        if nome not in opcoes or i + 1 >= len(argumentos):
+            raise ValueError(f"Opção inválida: {argumentos[i]}")
+        valor = argumentos[i + 1]
+        if nome == "detalhes":
+            opcoes["detalhes"].extend(int(parte) for parte in valor.split(","))
+        elif nome == "etapas":
+            opcoes["etapas"] = [etapa for etapa in valor.split(",") if etapa]
+            desconhecidas = set(opcoes["etapas"]) - set(ETAPAS)
+            if desconhecidas:
+                raise ValueError(f"Etapas desconhecidas: {', '.join(sorted(desconhecidas))}")
+        elif nome in ("processos", "repeticoes"):
+            opcoes[nome] = max(1, int(valor))
+        else:
+            opcoes[nome] = valor
+        i += 2
+    opcoes["detalhes"] = opcoes["detalhes"] or DETALHES_PADRAO
+    return opcoes
+
+
+def main():
+    try:
+        opcoes = _opcoes(sys.argv[1:])
+    except ValueError as e:
+        print(e)
+        print(__doc__)
+        return
+
+    atual = executar(opcoes["detalhes"], opcoes["etapas"], opcoes["processos"], opcoes["repeticoes"],
+                     opcoes["diretorio"])
+    if opcoes["saida"]:
+        with open(opcoes["saida"], "w", encoding="utf-8") as handle:
+            json.dump(atual, handle, ensure_ascii=False, indent=2)
+        print(f"\nResultados gravados em {opcoes['saida']}")
+    if opcoes["comparar"]:
+        try:
+            with open(opcoes["comparar"], "r", encoding="utf-8") as handle:
+                comparar(atual, json.load(handle))
+        except Exception as e:
+            print(f"Erro ao ler o resultado anterior {opcoes['comparar']}: {e}")
+
+
+if __name__ == "__main__":
+    main()
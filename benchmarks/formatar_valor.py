@@ -0,0 +1,79 @@
+"""
+Compara a formatação de valores antiga (float + laço por dígito) com
+`formatar_valor` em centavos inteiros e com a coluna inteira em
+`formatar_valores`.
+
+    python -m benchmarks.formatar_valor [quantidade]
+"""
+
+import random
+import sys
+import timeit
+
+from src.utils.formatadores import formatar_valor, formatar_valores
+
+QUANTIDADE_PADRAO = 2000000
+REPETICOES = 3
+
+
+def formatar_valor_float(valor_str):
+    """Implementação anterior, mantida só como referência de desempenho."""
+    try:
+        if valor_str and valor_str.strip():
+            valor = int(valor_str.strip()) / 100.0
+            partes = f"{valor:.2f}".split(".")
+            parte_inteira = partes[0]
+            parte_decimal = partes[1] if len(partes) > 1 else "00"
+
+            parte_inteira_formatada = ""
+            for i, digito in enumerate(reversed(parte_inteira)):
+                if i > 0 and i % 3 == 0:
+                    parte_inteira_formatada = "." + parte_inteira_formatada
+                parte_inteira_formatada = digito + parte_inteira_formatada
+
+            return f"{parte_inteira_formatada},{parte_decimal}"
+        return "0,00"
+    except (ValueError, AttributeError):
+        return valor_str if valor_str else "0,00"
+
+
+def gerar_valores(quantidade, proporcao_zeros, semente=400):
+    """Campos de 13 dígitos como nos detalhes RET, com a proporção de zeros pedida e o resto até 10 milhões."""
+    aleatorio = random.Random(semente)
+    valores = []
+    for _ in range(quantidade):
+        if aleatorio.random() < proporcao_zeros:
+            valores.append("0000000000000")
+        else:
+            valores.append(str(aleatorio.randrange(1, 10 ** 9)).zfill(13))
+    return valores
+
+
+def medir(funcao):
+    return min(timeit.repeat(funcao, number=1, repeat=REPETICOES))
+
+
+def comparar(titulo, valores):
+    esperado = [formatar_valor_float(valor) for valor in valores]
+    if [formatar_valor(valor) for valor in valores] != esperado or formatar_valores(valores) != esperado:
+        print("ERRO: resultados diferentes da implementação anterior")
+        sys.exit(1)
+
+    tempo_float = medir(lambda: [formatar_valor_float(valor) for valor in valores])
+    tempo_inteiro = medir(lambda: [formatar_valor(valor) for valor in valores])
+    tempo_coluna = medir(lambda: formatar_valores(valores))
+
+    print(f"{titulo} ({len(valores)} valores)")
+    print(f"  float + laço (anterior): {tempo_float:.3f}s")
+    print(f"  centavos inteiros:       {tempo_inteiro:.3f}s ({tempo_float / tempo_inteiro:.1f}x)")
+    print(f"  coluna inteira:          {tempo_coluna:.3f}s ({tempo_float / tempo_coluna:.1f}x)")
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else QUANTIDADE_PADRAO
+    comparar("Valores variados (valor do título)", gerar_valores(quantidade, 0.05))
+    comparar("Coluna com repetições (desconto)", gerar_valores(quantidade, 0.8))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Gerador de arquivos CNAB 400 sintéticos (REM e RET) para os benchmarks.
+
+As linhas são montadas a partir dos mesmos layouts de `src/layouts/cnab400.py`
+lidos pelos extratores e processadores, com registros de 400 posições e
+sequencial nas posições 395-400.
+
+    python -m benchmarks.gerador <diretorio> <detalhes> [semente]
+"""
+
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+from src.layouts.cnab400 import (TAMANHO_REGISTRO, REM_HEADER, REM_DETALHE, REM_TRAILER, RET_HEADER,
+                                 RET_DETALHE, RET_TRAILER)
+from src.layouts.layout import Campo
+from src.utils.comandos import COMANDOS
+
+LINHAS_POR_ESCRITA = 10000
+
+_SEQUENCIAL = Campo("sequencial", 394, 400)
+_NOMES = ["JOSE DA SILVA", "MARIA APARECIDA DOS SANTOS", "JOÃO CONCEIÇÃO", "COMERCIAL AÇÚCAR E CAFÉ LTDA",
+          "EMPRESA XYZ LTDA ME", "ANA PAULA OLIVEIRA", "DISTRIBUIDORA SÃO JOSÉ EIRELI", "PEDRO HENRIQUE ALVES"]
+# Código de ocorrência (lido das posições 107-108) e peso relativo.
+_OCORRENCIAS = [("02", 40), ("06", 35), ("09", 8), ("10", 5), ("17", 4), ("12", 3), ("14", 3), ("03", 2)]
+
+
+def compilar_modelo(layout, flag):
+    """
+    Modelo de linha do layout: uma função `format` que recebe os campos por
+    nome (texto) e devolve o registro de 400 posições, com cada campo
+    alinhado à esquerda e cortado na largura do layout.
+    """
+    campos = sorted(layout.campos, key=lambda campo: campo.inicio)
+    if all(campo.nome != _SEQUENCIAL.nome for campo in campos):
+        campos.append(_SEQUENCIAL)
+
+    partes = [flag]
+    posicao = 1
+    for campo in campos:
+        largura = campo.fim - campo.inicio
+        partes.append(" " * (campo.inicio - posicao))
+        partes.append(f"{{{campo.nome}:<{largura}.{largura}}}")
+        posicao = campo.fim
+    partes.append(" " * (TAMANHO_REGISTRO - posicao))
+    return "".join(partes).format
+
+
+def _data(dia):
+    return dia.strftime("%d%m%y")
+
+
+class GeradorCnab:
+    """
+    Gera um par REM/RET com `detalhes` títulos. Cerca de
+    `proporcao_retorno` dos títulos aparecem no RET, com ocorrências
+    distribuídas como num retorno real (entradas, liquidações, baixas).
+    """
+
+    def __init__(self, semente=400, proporcao_retorno=0.9, terminador="\n"):
+        self.semente = semente
+        self.proporcao_retorno = proporcao_retorno
+        self.terminador = terminador
+        self._rem_header = compilar_modelo(REM_HEADER, "0")
+        self._rem_detalhe = compilar_modelo(REM_DETALHE, "7")
+        self._rem_trailer = compilar_modelo(REM_TRAILER, "9")
+        self._ret_header = compilar_modelo(RET_HEADER, "0")
+        self._ret_detalhe = compilar_modelo(RET_DETALHE, "7")
+        self._ret_trailer = compilar_modelo(RET_TRAILER, "9")
+
+    def gerar(self, diretorio, detalhes, nome="SINTETICO"):
+        """
+        Grava `<nome>.REM` e `<nome>.RET` em `diretorio`.
+
+        Returns:
+            Tupla (caminho do REM, caminho do RET, detalhes no RET)
+        """
+        diretorio = Path(diretorio)
+        diretorio.mkdir(parents=True, exist_ok=True)
+        arquivo_rem = diretorio / f"{nome}.REM"
+        arquivo_ret = diretorio / f"{nome}.RET"
+
+        aleatorio = random.Random(self.semente)
+        codigos, pesos = zip(*_OCORRENCIAS)
+        comandos = sorted(COMANDOS)
+        gravacao = date(2026, 3, 20)
+
+        with open(arquivo_rem, "w", encoding="latin-1", newline="") as rem, \
+                open(arquivo_ret, "w", encoding="latin-1", newline="") as ret:
+            linhas_rem = [self._rem_header(
+                identificacao="REMESSA", agencia="1234", agencia_dv="5", conta="00012345", conta_dv="6",
+                beneficiario="BENEFICIARIO SINTETICO LTDA", banco="BANCO SINTETICO", data_gravacao=_data(gravacao),
+                convenio="1234567", sequencial="000001")]
+            linhas_ret = [self._ret_header(
+                tipo_operacao="2R", tipo_servico="01", codigo_servico="COBRAN", agencia="1234", agencia_dv="5",
+                conta="00012345", conta_dv="6", nome_empresa="BENEFICIARIO SINTETICO LTDA", codigo_banco="001",
+                nome_banco="BANCO SINTETICO", data_gravacao=_data(gravacao), convenio="1234567",
+                sequencial="000001")]
+            sequencial_ret = 1
+            valor_total = 0
+
+            for i in range(detalhes):
+                vencimento = gravacao + timedelta(days=aleatorio.randrange(1, 90))
+                emissao = gravacao - timedelta(days=aleatorio.randrange(0, 30))
+                valor = aleatorio.randrange(100, 10 ** 7)
+                nosso_numero = f"1234567{i:010d}"
+                meu_numero = f"{i:010d}"
+                linhas_rem.append(self._rem_detalhe(
+                    cpf_cnpj_beneficiario="12345678000199", codigo_controle_emp=f"CTRL{i}",
+                    nosso_numero=nosso_numero, meu_numero=meu_numero, data_vencimento=_data(vencimento),
+                    valor_titulo=f"{valor:013d}", data_emissao=_data(emissao),
+                    cpf_cnpj_pagador=f"{aleatorio.randrange(10 ** 10, 10 ** 11):014d}",
+                    nome_pagador=aleatorio.choice(_NOMES), sequencial=f"{i + 2:06d}"))
+
+                if aleatorio.random() < self.proporcao_retorno:
+                    ocorrencia = aleatorio.choices(codigos, pesos)[0]
+                    liquidado = ocorrencia in ("06", "17")
+                    liquidacao = vencimento - timedelta(days=aleatorio.randrange(0, 5)) if liquidado else None
+                    desconto = aleatorio.randrange(0, valor // 20) if liquidado and aleatorio.random() < 0.1 else 0
+                    recebido = valor - desconto if liquidado else 0
+                    valor_total += valor
+                    sequencial_ret += 1
+                    linhas_ret.append(self._ret_detalhe(
+                        controle_participante=f"CTRL{i}", nosso_numero=nosso_numero, carteira=ocorrencia,
+                        comando=aleatorio.choice(comandos),
+                        data_liquidacao=_data(liquidacao) if liquidado else "000000", meu_numero=meu_numero,
+                        data_vencimento=_data(vencimento), valor_titulo=f"{valor:013d}",
+                        agencia_recebedora=f"{aleatorio.randrange(1, 10000):04d}" if liquidado else "0000",
+                        data_credito=_data(liquidacao + timedelta(days=1)) if liquidado else "000000",
+                        desconto=f"{desconto:013d}", valor_recebido=f"{recebido:013d}",
+                        sequencial=f"{sequencial_ret:06d}"))
+
+                if len(linhas_rem) >= LINHAS_POR_ESCRITA:
+                    self._gravar(rem, linhas_rem)
+                    self._gravar(ret, linhas_ret)
+
+            linhas_rem.append(self._rem_trailer(sequencial=f"{detalhes + 2:06d}"))
+            linhas_ret.append(self._ret_trailer(
+                total_registros=f"{(sequencial_ret - 1) % 10 ** 6:06d}", valor_total=f"{valor_total % 10 ** 12:012d}",
+                sequencial=f"{sequencial_ret + 1:06d}"))
+            self._gravar(rem, linhas_rem)
+            self._gravar(ret, linhas_ret)
+
+        return arquivo_rem, arquivo_ret, sequencial_ret - 1
+
+    def _gravar(self, arquivo, linhas):
+        if linhas:
+            linhas.append("")
+            arquivo.write(self.terminador.join(linhas))
+            linhas.clear()
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Uso: python -m benchmarks.gerador <diretorio> <detalhes> [semente]")
+        return
+    semente = int(sys.argv[3]) if len(sys.argv) > 3 else 400
+    arquivo_rem, arquivo_ret, detalhes_ret = GeradorCnab(semente).gerar(sys.argv[1], int(sys.argv[2]))
+    print(f"Gerados: {arquivo_rem} ({sys.argv[2]} detalhes) e {arquivo_ret} ({detalhes_ret} detalhes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,231 @@
+import io
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
 from pathlib import Path
 
 from src.processadores.rem_processor import RemProcessor
 from src.processadores.ret_processor import RetProcessor
+from src.resumo import ResumoDiretorio
 from src.analise import AnaliseGenerator
+from src.exportacao import ExportadorColunar, FORMATOS
+from src.historico import HistoricoTitulos
+from src.indice import IndiceTitulos
+from src.monitor import MonitorEntrada, INTERVALO_PADRAO
+from src.servidor import ServidorLeitor, PORTA_PADRAO
+from src.utils.cache import CacheExtracao
+from src.utils.compactacao import (EXTENSAO_ZIP, entrada_existe, listar_entradas, membros_zip,
+                                   nome_descompactado, tipo_entrada)
+from src.utils.formatadores import formatar_valor
+from src.utils.metricas import Metricas
 
 
-def processar_arquivo(arquivo_entrada, path_output):
-    nome_base = arquivo_entrada.name
-    nome_arquivo = arquivo_entrada.name.upper()
+def processar_arquivo(arquivo_entrada, path_output, registros=None, resumo=None, processos=1, metricas=None):
+    # Compactados geram o relatório com o nome do arquivo descompactado.
+    nome_base = nome_descompactado(arquivo_entrada)
+    nome_arquivo = nome_base.upper()
     
     if nome_arquivo.endswith(".RET"):
         nome_saida = nome_base.rsplit(".", 1)[0] + "_ret.txt"
         arquivo_saida = path_output / nome_saida
         print(f"Processando: {arquivo_entrada.name}")
-        RetProcessor.processar(arquivo_entrada, arquivo_saida)
+        return RetProcessor.processar(arquivo_entrada, arquivo_saida, registros, resumo, processos, metricas)
     elif nome_arquivo.endswith(".REM"):
         nome_saida = nome_base.rsplit(".", 1)[0] + "_rem.txt"
         arquivo_saida = path_output / nome_saida
         print(f"Processando: {arquivo_entrada.name}")
-        RemProcessor.processar(arquivo_entrada, arquivo_saida)
+        return RemProcessor.processar(arquivo_entrada, arquivo_saida, registros, resumo, processos, metricas)
     else:
         arquivo_saida = path_output / (nome_base + ".txt")
+    return False
+
+
+def _processar_em_worker(arquivo_entrada, path_output, coletar_registros, medir=False):
+    """Processa um arquivo em um processo do pool, capturando o que seria impresso."""
+    registros = [] if coletar_registros else None
+    resumo = {}
+    metricas = Metricas(progresso=False) if medir else None
+    saida = io.StringIO()
+    with redirect_stdout(saida):
+        try:
+            sucesso = processar_arquivo(arquivo_entrada, path_output, registros, resumo, metricas=metricas)
+        except Exception as e:
+            print(f"Erro ao processar o arquivo: {e}")
+            sucesso = False
+    return sucesso, resumo.get('nlinhas', 0), saida.getvalue(), registros, metricas.secoes if medir else []
+
+
+def processar_em_paralelo(arquivos, path_output, jobs, extraidos=None, metricas=None):
+    """
+    Distribui os arquivos entre `jobs` processos e exibe os resultados na
+    ordem dos arquivos, independentemente da ordem de conclusão.
+
+    Se `extraidos` for um dicionário, recebe os registros de cada arquivo
+    processado com sucesso, como no processamento serial. Com `metricas`, as
+    seções medidas em cada processo são reunidas nela.
+    """
+    coletar_registros = extraidos is not None
+    medir = metricas is not None
+    situacoes = []
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        resultados = executor.map(_processar_em_worker, arquivos, [path_output] * len(arquivos),
+                                  [coletar_registros] * len(arquivos), [medir] * len(arquivos))
+        for arquivo, (sucesso, nlinhas, saida, registros, secoes) in zip(arquivos, resultados):
+            print(saida, end="")
+            if medir:
+                metricas.secoes.extend(secoes)
+            situacoes.append((arquivo.name, sucesso, nlinhas))
+            if sucesso and coletar_registros:
+                extraidos[arquivo] = registros
+
+    print("\nResumo do processamento:")
+    for nome, sucesso, nlinhas in situacoes:
+        situacao = "OK" if sucesso else "FALHA"
+        print(f"  {nome}: {situacao} - {nlinhas} lançamentos")
+    sucessos = sum(1 for _, sucesso, _ in situacoes if sucesso)
+    print(f"Arquivos processados com sucesso: {sucessos}")
+    print(f"Arquivos com falha: {len(situacoes) - sucessos}")
+
+
+def _extrair_opcao(argumentos, flag, converter, padrao):
+    """
+    Remove `flag` e o valor seguinte da lista de argumentos e devolve o valor
+    convertido por `converter`, que levanta ValueError se ele for inválido.
+    Sem a opção, devolve `padrao`.
+    """
+    for i, argumento in enumerate(argumentos):
+        if argumento.upper() == flag:
+            valor = argumentos[i + 1] if i + 1 < len(argumentos) else ""
+            del argumentos[i:i + 2]
+            return converter(valor)
+    return padrao
+
+
+def _jobs(valor):
+    """`--jobs N`: processos do processamento; 0 usa todos os processadores."""
+    jobs = int(valor)
+    if jobs < 0:
+        raise ValueError(valor)
+    return jobs or os.cpu_count() or 1
+
+
+def _intervalo(valor):
+    """`--intervalo N`: segundos entre as verificações do modo --watch."""
+    intervalo = float(valor)
+    if intervalo <= 0:
+        raise ValueError(valor)
+    return intervalo
+
+
+def _porta(valor):
+    """`--porta N`: porta do modo --servidor."""
+    porta = int(valor)
+    if not 0 < porta < 65536:
+        raise ValueError(valor)
+    return porta
+
+
+ARQUIVO_INDICE = "indice_titulos.sqlite3"
+ARQUIVO_HISTORICO = "historico_titulos.sqlite3"
+
+
+def buscar_titulo(numero, path_output):
+    """Consulta o índice de títulos e exibe as ocorrências do número nos arquivos REM e RET."""
+    arquivo_db = path_output / ARQUIVO_INDICE
+    if not arquivo_db.exists():
+        print("Índice de títulos não encontrado. Execute antes: leitor_rem.py --indexar")
+        return
+
+    with IndiceTitulos(arquivo_db) as indice:
+        resultados = indice.buscar(numero)
+
+    if not resultados:
+        print(f"Nenhum título encontrado para: {numero}")
+        return
+
+    print(f"{len(resultados)} registro(s) encontrado(s) para: {numero}")
+    for resultado in resultados:
+        print(f"\n[{resultado['tipo_arquivo']}] {resultado['arquivo']}")
+        for chave, valor in resultado.items():
+            if chave not in ('arquivo', 'tipo_arquivo', 'tipo', 'arquivo_origem'):
+                print(f"  {chave}: {valor}")
+
+
+def consultar_historico(numero, path_output):
+    """Exibe o estado atual e o histórico de ocorrências dos títulos com o número informado."""
+    arquivo_db = path_output / ARQUIVO_HISTORICO
+    if not arquivo_db.exists():
+        print("Histórico de títulos não encontrado. Execute antes: leitor_rem.py --historico")
+        return
+
+    with HistoricoTitulos(arquivo_db) as historico:
+        estados = historico.estado_atual(numero)
+        eventos = historico.historico(numero)
+
+    if not estados:
+        print(f"Nenhum título encontrado no histórico para: {numero}")
+        return
+
+    for estado in estados:
+        print(f"\n{estado['chave']}: {estado['codigo_ocorrencia']} - {estado['descricao_ocorrencia']} "
+              f"(gravação {estado['data_gravacao'] or '?'}, {estado['arquivo']})")
+        for evento in eventos:
+            if evento['chave'] == estado['chave']:
+                print(f"  {evento['data_gravacao'] or '?':10} {evento['arquivo']:30} {evento['codigo_ocorrencia']:3} "
+                      f"{evento['descricao_ocorrencia']:40} {evento['data_liquidacao']:10} "
+                      f"{formatar_valor(evento['valor_recebido'])}")
+
+
+def exportar_arquivos(arquivos, path_output, formato):
+    """Exporta os detalhes de cada arquivo REM/RET em formato colunar tipado (`ExportadorColunar`)."""
+    if not ExportadorColunar.disponivel(formato):
+        return
+    for arquivo in arquivos:
+        tipo = tipo_entrada(arquivo)
+        if not tipo:
+            print(f"Arquivo ignorado (não é REM nem RET): {arquivo.name}")
+            continue
+        nome = f"{Path(nome_descompactado(arquivo)).stem}_{tipo.lower()}"
+        arquivo_saida = path_output / ExportadorColunar.nome_saida(nome, formato)
+        print(f"Exportando: {arquivo.name}")
+        quantidade = ExportadorColunar.exportar(arquivo, arquivo_saida, tipo, formato)
+        if quantidade is not None:
+            print(f"{quantidade} detalhes exportados para: {arquivo_saida}")
+
+
+def _arquivos_do_argumento(argumento, path_input):
+    """
+    Arquivos indicados na linha de comando: o arquivo (procurado antes no
+    dataInput), um membro de .zip ('retornos.zip/TESTE.RET') ou todos os
+    membros REM e RET de um .zip. Lista vazia se não houver nenhum.
+    """
+    arquivo = Path(argumento)
+    if not arquivo.is_absolute():
+        tentativa = path_input / arquivo
+        if tentativa.exists() or entrada_existe(tentativa):
+            arquivo = tentativa
+
+    if arquivo.suffix.lower() == EXTENSAO_ZIP and arquivo.is_file():
+        membros = membros_zip(arquivo)
+        if not membros:
+            print(f"Nenhum arquivo .REM ou .RET encontrado em: {arquivo}")
+        return membros
+    if not entrada_existe(arquivo):
+        print(f"Arquivo não encontrado: {arquivo}")
+        return []
+    return [arquivo]
+
+
+def _extrair_flag(argumentos, nome):
+    """Remove a opção `nome` (sem valor) da lista de argumentos e indica se estava presente."""
+    for i, argumento in enumerate(argumentos):
+        if argumento.upper() == nome:
+            del argumentos[i]
+            return True
+    return False
 
 
 def main():
@@ -32,39 +236,131 @@ def main():
     path_input.mkdir(exist_ok=True)
     path_output.mkdir(exist_ok=True)
 
-    if len(sys.argv) > 1 and sys.argv[1].upper() == "--ANALISE":
-        print("Gerando arquivo de análise...")
-        AnaliseGenerator.gerar(path_input, path_output)
+    argumentos = sys.argv[1:]
+    try:
+        jobs = _extrair_opcao(argumentos, "--JOBS", _jobs, 1)
+    except ValueError:
+        print("Uso: --jobs N, com N inteiro (0 para usar todos os processadores)")
+        return
+    try:
+        intervalo = _extrair_opcao(argumentos, "--INTERVALO", _intervalo, INTERVALO_PADRAO)
+    except ValueError:
+        print("Uso: --intervalo N, com N segundos maior que zero")
+        return
+    try:
+        porta = _extrair_opcao(argumentos, "--PORTA", _porta, PORTA_PADRAO)
+    except ValueError:
+        print("Uso: --porta N, com N entre 1 e 65535")
+        return
+    usar_cache = not _extrair_flag(argumentos, "--SEM-CACHE")
+    externo = _extrair_flag(argumentos, "--EXTERNO")
+    por_chave = _extrair_flag(argumentos, "--POR-CHAVE")
+    metricas = Metricas() if _extrair_flag(argumentos, "--METRICAS") else None
+    arquivo_metricas = path_output / f"metricas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+    if argumentos and argumentos[0].upper() == "--WATCH":
+        with HistoricoTitulos(path_output / ARQUIVO_HISTORICO) as historico:
+            MonitorEntrada(path_input, path_output, processar_arquivo, intervalo, jobs, historico).executar()
+        return
+
+    if argumentos and argumentos[0].upper() == "--SERVIDOR":
+        ServidorLeitor(porta, jobs).executar()
+        return
+
+    if argumentos and argumentos[0].upper() == "--INDEXAR":
+        with IndiceTitulos(path_output / ARQUIVO_INDICE) as indice:
+            indexados, atualizados = indice.indexar_diretorio(path_input)
+        print(f"Arquivos indexados: {indexados} (já atualizados: {atualizados})")
+        return
+
+    if argumentos and argumentos[0].upper() == "--BUSCAR":
+        if len(argumentos) < 2:
+            print("Uso: leitor_rem.py --buscar <nosso numero ou meu numero>")
+            return
+        buscar_titulo(argumentos[1], path_output)
+        return
+
+    if argumentos and argumentos[0].upper() == "--HISTORICO":
+        if len(argumentos) > 1:
+            consultar_historico(argumentos[1], path_output)
+            return
+        with HistoricoTitulos(path_output / ARQUIVO_HISTORICO) as historico:
+            registrados, existentes = historico.registrar_diretorio(path_input)
+        print(f"Arquivos RET registrados no histórico: {registrados} (já registrados: {existentes})")
         return
 
-    if len(sys.argv) > 1:
-        arquivo_entrada = Path(sys.argv[1])
-        if not arquivo_entrada.is_absolute():
-            arquivo_tentativa = path_input / arquivo_entrada
-            if arquivo_tentativa.exists():
-                arquivo_entrada = arquivo_tentativa
+    if argumentos and argumentos[0].upper() == "--RESUMO":
+        if len(argumentos) > 1 and argumentos[1].lower() != "csv":
+            print("Uso: leitor_rem.py --resumo [csv]")
+            return
+        resumos = ResumoDiretorio.gerar(path_input)
+        ResumoDiretorio.exibir(resumos)
+        if len(argumentos) > 1:
+            ResumoDiretorio.gravar_csv(resumos, path_output / f"resumo_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+        return
 
-        if not arquivo_entrada.exists():
-            print(f"Arquivo não encontrado: {arquivo_entrada}")
+    if argumentos and argumentos[0].upper() == "--EXPORTAR":
+        if len(argumentos) < 2 or argumentos[1].lower() not in FORMATOS:
+            print(f"Uso: leitor_rem.py --exportar <{'|'.join(FORMATOS)}> [arquivo]")
             return
+        if len(argumentos) > 2:
+            arquivos = _arquivos_do_argumento(argumentos[2], path_input)
+        else:
+            arquivos = listar_entradas(path_input, "REM") + listar_entradas(path_input, "RET")
+        exportar_arquivos(arquivos, path_output, argumentos[1].lower())
+        return
 
-        processar_arquivo(arquivo_entrada, path_output)
+    if argumentos and argumentos[0].upper() == "--ANALISE":
+        print("Gerando arquivo de análise...")
+        if externo:
+            AnaliseGenerator.gerar(path_input, path_output, externo=True, metricas=metricas)
+        else:
+            cache = CacheExtracao(path_output / ".cache") if usar_cache else None
+            AnaliseGenerator.gerar(path_input, path_output, processos=jobs, cache=cache, por_chave=por_chave,
+                                   metricas=metricas)
+        if metricas is not None:
+            metricas.gravar(arquivo_metricas)
+        return
+
+    # Inclui os compactados (.gz, .bz2, .xz) e os membros de arquivos .zip, lidos sem extração.
+    arquivos_rem = listar_entradas(path_input, "REM")
+    arquivos_ret = listar_entradas(path_input, "RET")
+
+    # Com REM e RET presentes, cada arquivo é lido uma única vez: o mesmo parse
+    # gera o relatório e alimenta a análise.
+    gerar_analise = bool(arquivos_rem and arquivos_ret)
+    # No modo externo a análise relê os arquivos em fluxo em vez de guardar os registros.
+    coletar = gerar_analise and not externo
+    extraidos = {}
+
+    if argumentos:
+        arquivos_processar = _arquivos_do_argumento(argumentos[0], path_input)
+        if not arquivos_processar:
+            return
     else:
-        arquivos_encontrados = list(path_input.glob("*.REM")) + list(path_input.glob("*.rem")) + \
-                               list(path_input.glob("*.RET")) + list(path_input.glob("*.ret"))
+        arquivos_processar = arquivos_rem + arquivos_ret
 
-        if not arquivos_encontrados:
+        if not arquivos_processar:
             print("Nenhum arquivo .REM ou .RET encontrado no diretório dataInput")
             return
 
-        for arquivo in arquivos_encontrados:
-            processar_arquivo(arquivo, path_output)
+    # Com vários arquivos o pool divide os arquivos; com um só, as faixas do arquivo.
+    if jobs > 1 and len(arquivos_processar) > 1:
+        processar_em_paralelo(arquivos_processar, path_output, jobs, extraidos if coletar else None, metricas)
+    else:
+        for arquivo in arquivos_processar:
+            registros = [] if coletar else None
+            if (processar_arquivo(arquivo, path_output, registros, processos=jobs, metricas=metricas)
+                    and registros is not None):
+                extraidos[arquivo] = registros
 
-    arquivos_rem = list(path_input.glob("*.REM")) + list(path_input.glob("*.rem"))
-    arquivos_ret = list(path_input.glob("*.RET")) + list(path_input.glob("*.ret"))
-    if arquivos_rem and arquivos_ret:
+    if gerar_analise:
         print("\nGerando análise...")
-        AnaliseGenerator.gerar(path_input, path_output)
+        AnaliseGenerator.gerar(path_input, path_output, extraidos, externo=externo, por_chave=por_chave,
+                               metricas=metricas)
+
+    if metricas is not None:
+        metricas.gravar(arquivo_metricas)
 
 
 if __name__ == "__main__":
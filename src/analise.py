@@ -4,76 +4,222 @@ Módulo para geração de arquivos de análise relacionando REM e RET.
 
 import csv
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
 
+from src.analise_externa import AnaliseExterna, LIMITE_MEMORIA_PADRAO
+from src.conciliacao import IndiceConciliacao
 from src.extratores.rem_extractor import RemExtractor
 from src.extratores.ret_extractor import RetExtractor
+from src.utils.cache import ImpressaoDigital
+from src.utils.compactacao import listar_entradas, tamanho_em_disco
 from src.utils.formatadores import formatar_valor, normalizar_chave
+from src.utils.metricas import abrir_secao
+
+CABECALHO_CSV = [
+    'MEU NUMERO',
+    'NOSSO NUMERO (REM)',
+    'NOSSO NUMERO (RET)',
+    'CONTROLE PARTICIPANTE',
+    'ARQUIVO REMESSA',
+    'ARQUIVO RETORNO',
+    'CPF/CNPJ BENEFICIARIO',
+    'CPF/CNPJ PAGADOR',
+    'NOME PAGADOR',
+    'DATA EMISSAO',
+    'DATA VENCIMENTO',
+    'VALOR TITULO',
+    'CODIGO OCORRENCIA',
+    'DESCRICAO OCORRENCIA',
+    'DATA LIQUIDACAO',
+    'DATA CREDITO',
+    'VALOR RECEBIDO',
+    'DESCONTO',
+    'AGENCIA RECEBEDORA',
+    'STATUS MATCH'
+]
 
 
 class AnaliseGenerator:
     """Classe para gerar arquivos de análise relacionando REM e RET."""
     
     @staticmethod
-    def gerar(path_input, path_output):
+    def gerar(path_input, path_output, extraidos=None, processos=1, cache=None, externo=False,
+              limite_memoria=LIMITE_MEMORIA_PADRAO, por_chave=False, metricas=None):
         """
         Gera arquivo CSV relacionando arquivos REM e RET.
+
+        Por padrão cada título resolvido pelo `IndiceConciliacao` gera uma
+        linha, com os conflitos encontrados na coluna CONFLITOS. Com
+        `por_chave=True` (ou no modo externo) é gerada uma linha por chave
+        ('M:' e 'N:'), como nas versões anteriores.
         
         Args:
-            path_input: Diretório com arquivos REM e RET
+            path_input: Diretório com arquivos REM e RET, comuns ou compactados
+                (.gz, .bz2, .xz ou dentro de .zip; ver `listar_entradas`)
             path_output: Diretório para salvar o arquivo de análise
+            extraidos: Dicionário opcional {caminho do arquivo: dados} com dados
+                já extraídos no mesmo parse do relatório; esses arquivos não são
+                lidos de novo nem consultados no cache
+            processos: Número de processos para extrair cada arquivo grande
+            cache: `CacheExtracao` opcional; arquivos inalterados desde a última
+                extração são carregados dele em vez de extraídos de novo
+            externo: Se True, concilia com ordenação externa em arquivos
+                temporários (`AnaliseExterna`), com memória limitada, em vez de
+                montar os dicionários em memória; o CSV gerado é o mesmo
+                da análise por chave
+            limite_memoria: Chaves mantidas em memória por partição no modo externo
+            por_chave: Gera uma linha por chave em vez de uma por título
+            metricas: `Metricas` opcional; a análise vira uma seção com o
+                tempo de extração, conciliação e gravação do CSV
         """
-        arquivos_rem = list(path_input.glob("*.REM")) + list(path_input.glob("*.rem"))
-        arquivos_ret = list(path_input.glob("*.RET")) + list(path_input.glob("*.ret"))
+        arquivos_rem = listar_entradas(path_input, "REM")
+        arquivos_ret = listar_entradas(path_input, "RET")
 
         if not arquivos_rem and not arquivos_ret:
             print("Nenhum arquivo REM ou RET encontrado no diretório de entrada.")
             return
 
+        # Quando vários RET trazem o mesmo título vale o último: o de gravação
+        # mais recente no header, não o último na listagem do diretório.
+        arquivos_ret.sort(key=lambda arquivo: RetExtractor.ler_data_gravacao(arquivo) or date.min)
+
+        extraidos = {Path(arquivo).resolve(): dados for arquivo, dados in (extraidos or {}).items()}
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        arquivo_analise = path_output / f"analise_rem_ret_{timestamp}.csv"
+
+        with abrir_secao(metricas, arquivo_analise.name, "ANALISE") as secao:
+            secao.contar(bytes_lidos=sum(tamanho_em_disco(arquivo) for arquivo in arquivos_rem + arquivos_ret))
+            AnaliseGenerator._gerar(arquivos_rem, arquivos_ret, arquivo_analise, extraidos, processos, cache,
+                                    externo, limite_memoria, por_chave, secao)
+            secao.contar(bytes_gravados=arquivo_analise.stat().st_size if arquivo_analise.exists() else 0)
+
+    @staticmethod
+    def _gerar(arquivos_rem, arquivos_ret, arquivo_analise, extraidos, processos, cache, externo, limite_memoria,
+               por_chave, secao):
+        """Gera o CSV no modo pedido, registrando as etapas na seção de métricas."""
+        if externo:
+            fontes_rem = (secao.cronometrar(AnaliseGenerator._fluxo_dados(arquivo, RemExtractor, extraidos),
+                                            "extracao", ler=True) for arquivo in arquivos_rem)
+            fontes_ret = (secao.cronometrar(AnaliseGenerator._fluxo_dados(arquivo, RetExtractor, extraidos),
+                                            "extracao", ler=True) for arquivo in arquivos_ret)
+            # A ordenação externa grava o CSV junto com a conciliação.
+            with secao.etapa("conciliacao"):
+                totais = AnaliseExterna(limite_memoria).gerar(
+                    fontes_rem, fontes_ret, arquivo_analise, CABECALHO_CSV, AnaliseGenerator._linha_csv)
+            secao.contar(registros=secao.lidos)
+            AnaliseGenerator._imprimir_resumo(arquivo_analise, *totais)
+            return
+
+        if not por_chave:
+            indice = IndiceConciliacao()
+            for arquivo_rem in arquivos_rem:
+                with secao.etapa("extracao"):
+                    dados = AnaliseGenerator._obter_dados(arquivo_rem, RemExtractor, extraidos, processos, cache)
+                with secao.etapa("conciliacao"):
+                    for dado in dados:
+                        if dado['tipo'] == 'DETALHE':
+                            indice.adicionar_rem(dado)
+                secao.contar(registros=len(dados))
+            for arquivo_ret in arquivos_ret:
+                with secao.etapa("extracao"):
+                    dados = AnaliseGenerator._obter_dados(arquivo_ret, RetExtractor, extraidos, processos, cache)
+                with secao.etapa("conciliacao"):
+                    for dado in dados:
+                        if dado['tipo'] == 'DETALHE':
+                            indice.adicionar_ret(dado)
+                secao.contar(registros=len(dados))
+
+            with secao.etapa("gravacao"):
+                AnaliseGenerator._escrever_csv_titulos(arquivo_analise, indice)
+            AnaliseGenerator._exibir_resumo_titulos(arquivo_analise, indice)
+            return
+
         dados_rem = {}
         dados_ret = {}
 
         # Extrai dados dos arquivos REM
         for arquivo_rem in arquivos_rem:
-            print(f"Extraindo dados de: {arquivo_rem.name}")
-            dados = RemExtractor.extrair(arquivo_rem)
-            for dado in dados:
-                if dado['tipo'] == 'DETALHE':
-                    meu_num = normalizar_chave(dado.get('meu_numero', ''))
-                    nosso_num = normalizar_chave(dado.get('nosso_numero', ''))
-
-                    if meu_num:
-                        chave = f"M:{meu_num}"
-                        dados_rem[chave] = dado
-                    if nosso_num:
-                        chave = f"N:{nosso_num}"
-                        dados_rem[chave] = dado
+            with secao.etapa("extracao"):
+                dados = AnaliseGenerator._obter_dados(arquivo_rem, RemExtractor, extraidos, processos, cache)
+            secao.contar(registros=len(dados))
+            with secao.etapa("conciliacao"):
+                for dado in dados:
+                    if dado['tipo'] == 'DETALHE':
+                        meu_num = normalizar_chave(dado.get('meu_numero', ''))
+                        nosso_num = normalizar_chave(dado.get('nosso_numero', ''))
+
+                        if meu_num:
+                            chave = f"M:{meu_num}"
+                            dados_rem[chave] = dado
+                        if nosso_num:
+                            chave = f"N:{nosso_num}"
+                            dados_rem[chave] = dado
 
         # Extrai dados dos arquivos RET
         for arquivo_ret in arquivos_ret:
-            print(f"Extraindo dados de: {arquivo_ret.name}")
-            dados = RetExtractor.extrair(arquivo_ret)
-            for dado in dados:
-                if dado['tipo'] == 'DETALHE':
-                    meu_num = normalizar_chave(dado.get('meu_numero', ''))
-                    nosso_num = normalizar_chave(dado.get('nosso_numero', ''))
-
-                    if meu_num:
-                        chave = f"M:{meu_num}"
-                        dados_ret[chave] = dado
-                    if nosso_num:
-                        chave = f"N:{nosso_num}"
-                        dados_ret[chave] = dado
+            with secao.etapa("extracao"):
+                dados = AnaliseGenerator._obter_dados(arquivo_ret, RetExtractor, extraidos, processos, cache)
+            secao.contar(registros=len(dados))
+            with secao.etapa("conciliacao"):
+                for dado in dados:
+                    if dado['tipo'] == 'DETALHE':
+                        meu_num = normalizar_chave(dado.get('meu_numero', ''))
+                        nosso_num = normalizar_chave(dado.get('nosso_numero', ''))
 
-        # Gera arquivo CSV de análise
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        arquivo_analise = path_output / f"analise_rem_ret_{timestamp}.csv"
+                        if meu_num:
+                            chave = f"M:{meu_num}"
+                            dados_ret[chave] = dado
+                        if nosso_num:
+                            chave = f"N:{nosso_num}"
+                            dados_ret[chave] = dado
 
-        matches = AnaliseGenerator._criar_matches(dados_rem, dados_ret)
-        AnaliseGenerator._escrever_csv(arquivo_analise, matches)
+        # Gera arquivo CSV de análise
+        with secao.etapa("conciliacao"):
+            matches = AnaliseGenerator._criar_matches(dados_rem, dados_ret)
+        with secao.etapa("gravacao"):
+            AnaliseGenerator._escrever_csv(arquivo_analise, matches)
         
         AnaliseGenerator._exibir_resumo(arquivo_analise, matches)
     
+    @staticmethod
+    def _obter_dados(arquivo, extrator, extraidos, processos, cache):
+        """
+        Dados do arquivo: já extraídos pelo chamador, do cache ou extraídos
+        agora. Os já extraídos são usados como estão, sem consultar o cache
+        (que exigiria resumir o conteúdo do arquivo): guardá-los no cache
+        cabe ao chamador, como faz o `MonitorEntrada`.
+        """
+        dados = extraidos.get(arquivo.resolve())
+        if dados is not None:
+            return dados
+
+        impressao = ImpressaoDigital(arquivo) if cache is not None else None
+        if cache is not None:
+            dados = cache.obter(impressao)
+            if dados is not None:
+                print(f"Dados em cache: {arquivo.name}")
+                return dados
+
+        print(f"Extraindo dados de: {arquivo.name}")
+        dados = extrator.extrair(arquivo, processos)
+        if cache is not None and dados:
+            cache.guardar(impressao, dados)
+        return dados
+    
+    @staticmethod
+    def _fluxo_dados(arquivo, extrator, extraidos):
+        """Registros do arquivo em fluxo (modo externo): os já extraídos pelo chamador ou lidos agora."""
+        dados = extraidos.get(arquivo.resolve())
+        if dados is not None:
+            yield from dados
+            return
+
+        print(f"Extraindo dados de: {arquivo.name}")
+        try:
+            yield from extrator.iterar(arquivo)
+        except Exception as e:
+            print(f"Erro ao extrair dados do arquivo {arquivo.name}: {e}")
+
     @staticmethod
     def _criar_matches(dados_rem, dados_ret):
         """Cria dicionário de matches entre REM e RET."""
@@ -120,66 +266,88 @@ class AnaliseGenerator:
         with open(arquivo_analise, 'w', newline='', encoding='utf-8-sig') as f:
             writer = csv.writer(f, delimiter=';')
 
-            writer.writerow([
-                'MEU NUMERO',
-                'NOSSO NUMERO (REM)',
-                'NOSSO NUMERO (RET)',
-                'CONTROLE PARTICIPANTE',
-                'ARQUIVO REMESSA',
-                'ARQUIVO RETORNO',
-                'CPF/CNPJ BENEFICIARIO',
-                'CPF/CNPJ PAGADOR',
-                'NOME PAGADOR',
-                'DATA EMISSAO',
-                'DATA VENCIMENTO',
-                'VALOR TITULO',
-                'CODIGO OCORRENCIA',
-                'DESCRICAO OCORRENCIA',
-                'DATA LIQUIDACAO',
-                'DATA CREDITO',
-                'VALOR RECEBIDO',
-                'DESCONTO',
-                'AGENCIA RECEBEDORA',
-                'STATUS MATCH'
-            ])
+            writer.writerow(CABECALHO_CSV)
 
             for chave in sorted(matches.keys()):
-                match = matches[chave]
-                rem = match['rem']
-                ret = match['ret']
-
-                writer.writerow([
-                    match['numero_exibicao'],
-                    rem.get('nosso_numero', '') if rem else '',
-                    ret.get('nosso_numero', '') if ret else '',
-                    ret.get('controle_participante', '') if ret else '',
-                    rem.get('arquivo_origem', '') if rem else '',
-                    ret.get('arquivo_origem', '') if ret else '',
-                    rem.get('cpf_cnpj_beneficiario', '') if rem else '',
-                    rem.get('cpf_cnpj_pagador', '') if rem else '',
-                    rem.get('nome_pagador', '') if rem else '',
-                    rem.get('data_emissao', '') if rem else '',
-                    rem.get('data_vencimento', '') if rem else ret.get('data_vencimento', ''),
-                    formatar_valor(rem.get('valor_titulo', '')) if rem and rem.get('valor_titulo') else '',
-                    ret.get('codigo_ocorrencia', '') if ret else '',
-                    ret.get('descricao_ocorrencia', '') if ret else '',
-                    ret.get('data_liquidacao', '') if ret else '',
-                    ret.get('data_credito', '') if ret else '',
-                    formatar_valor(ret.get('valor_recebido', '')) if ret and ret.get('valor_recebido') else '',
-                    formatar_valor(ret.get('desconto', '')) if ret and ret.get('desconto') else '',
-                    ret.get('agencia_recebedora', '') if ret else '',
-                    match['status']
-                ])
+                writer.writerow(AnaliseGenerator._linha_csv(matches[chave]))
+
+    @staticmethod
+    def _escrever_csv_titulos(arquivo_analise, indice):
+        """Escreve o arquivo CSV de análise com uma linha por título."""
+        with open(arquivo_analise, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f, delimiter=';')
+
+            writer.writerow(CABECALHO_CSV + ['CONFLITOS'])
+
+            for titulo in indice.ordenados():
+                match = {
+                    'rem': titulo.rem or {},
+                    'ret': titulo.ret or {},
+                    'numero_exibicao': titulo.chave[2:],
+                    'status': titulo.status
+                }
+                writer.writerow(AnaliseGenerator._linha_csv(match) + [', '.join(titulo.conflitos)])
+
+    @staticmethod
+    def _linha_csv(match):
+        """Linha do CSV de análise para um match."""
+        rem = match['rem']
+        ret = match['ret']
+
+        return [
+            match['numero_exibicao'],
+            rem.get('nosso_numero', '') if rem else '',
+            ret.get('nosso_numero', '') if ret else '',
+            ret.get('controle_participante', '') if ret else '',
+            rem.get('arquivo_origem', '') if rem else '',
+            ret.get('arquivo_origem', '') if ret else '',
+            rem.get('cpf_cnpj_beneficiario', '') if rem else '',
+            rem.get('cpf_cnpj_pagador', '') if rem else '',
+            rem.get('nome_pagador', '') if rem else '',
+            rem.get('data_emissao', '') if rem else '',
+            rem.get('data_vencimento', '') if rem else ret.get('data_vencimento', ''),
+            formatar_valor(rem.get('valor_titulo', '')) if rem and rem.get('valor_titulo') else '',
+            ret.get('codigo_ocorrencia', '') if ret else '',
+            ret.get('descricao_ocorrencia', '') if ret else '',
+            ret.get('data_liquidacao', '') if ret else '',
+            ret.get('data_credito', '') if ret else '',
+            formatar_valor(ret.get('valor_recebido', '')) if ret and ret.get('valor_recebido') else '',
+            formatar_valor(ret.get('desconto', '')) if ret and ret.get('desconto') else '',
+            ret.get('agencia_recebedora', '') if ret else '',
+            match['status']
+        ]
     
     @staticmethod
     def _exibir_resumo(arquivo_analise, matches):
         """Exibe resumo da análise gerada."""
         total_matches = sum(1 for m in matches.values() if m['status'] == 'MATCH')
+        total_rem = len([m for m in matches.values() if m['rem']])
+        total_ret = len([m for m in matches.values() if m['ret']])
 
+        AnaliseGenerator._imprimir_resumo(arquivo_analise, total_rem, total_ret, total_matches)
+
+    @staticmethod
+    def _exibir_resumo_titulos(arquivo_analise, indice):
+        """Exibe resumo da análise por título."""
+        total_rem = sum(1 for titulo in indice.titulos if titulo.rem is not None)
+        total_ret = sum(1 for titulo in indice.titulos if titulo.ret is not None)
+        total_matches = sum(1 for titulo in indice.titulos if titulo.status == 'MATCH')
+        total_conflitos = sum(1 for titulo in indice.titulos if titulo.conflitos)
+
+        AnaliseGenerator._imprimir_resumo(arquivo_analise, total_rem, total_ret, total_matches,
+                                          len(indice), total_conflitos)
+
+    @staticmethod
+    def _imprimir_resumo(arquivo_analise, total_rem, total_ret, total_matches, total_titulos=None,
+                         total_conflitos=None):
         print(f"\nArquivo de análise gerado: {arquivo_analise}")
-        print(f"Total de registros REM: {len([m for m in matches.values() if m['rem']])}")
-        print(f"Total de registros RET: {len([m for m in matches.values() if m['ret']])}")
+        if total_titulos is not None:
+            print(f"Total de títulos: {total_titulos}")
+        print(f"Total de registros REM: {total_rem}")
+        print(f"Total de registros RET: {total_ret}")
         print(f"Total de matches: {total_matches}")
+        if total_conflitos is not None:
+            print(f"Títulos com conflito: {total_conflitos}")
         print(f"\nO arquivo CSV pode ser aberto no Excel ou LibreOffice Calc.")
         print(f"Use o separador ';' (ponto e vírgula) ao importar.")
 
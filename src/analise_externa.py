@@ -0,0 +1,176 @@
+"""
+Conciliação REM x RET fora da memória (ordenação externa + merge-join).
+
+Os detalhes são lidos em fluxo e suas chaves normalizadas ('M:' e 'N:') vão
+para arquivos temporários ordenados de até `limite_memoria` entradas. As
+partições de cada lado são intercaladas com `heapq.merge`, e os dois fluxos
+ordenados (REM e RET) são unidos pela chave, de modo que a memória usada não
+depende do tamanho do histórico.
+"""
+
+import csv
+import heapq
+import pickle
+import shutil
+import tempfile
+from itertools import islice
+
+from src.utils.formatadores import normalizar_chave
+
+LIMITE_MEMORIA_PADRAO = 200000
+TAMANHO_BLOCO_PARTICAO = 5000
+
+
+class _Particao:
+    """Arquivo temporário com entradas (chave, ordem, registro) já ordenadas."""
+
+    def __init__(self, diretorio, entradas):
+        handle = tempfile.NamedTemporaryFile(dir=diretorio, suffix=".run", delete=False)
+        self.caminho = handle.name
+        with handle:
+            entradas = iter(entradas)
+            while True:
+                bloco = list(islice(entradas, TAMANHO_BLOCO_PARTICAO))
+                if not bloco:
+                    break
+                pickle.dump(bloco, handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def __iter__(self):
+        with open(self.caminho, "rb") as handle:
+            while True:
+                try:
+                    bloco = pickle.load(handle)
+                except EOFError:
+                    return
+                yield from bloco
+
+
+class AnaliseExterna:
+    """Gera o CSV de análise com memória limitada, no mesmo formato e ordem de `AnaliseGenerator`."""
+
+    def __init__(self, limite_memoria=LIMITE_MEMORIA_PADRAO, diretorio_temporario=None):
+        self.limite_memoria = max(1, limite_memoria)
+        self.diretorio_temporario = diretorio_temporario
+
+    def gerar(self, fontes_rem, fontes_ret, arquivo_analise, cabecalho, linha_csv):
+        """
+        Concilia as fontes e grava o CSV.
+
+        Args:
+            fontes_rem: Iterável de iteráveis de registros REM, na ordem dos arquivos
+            fontes_ret: Idem para os arquivos RET
+            arquivo_analise: Caminho do CSV de saída
+            cabecalho: Linha de cabeçalho do CSV
+            linha_csv: Função que monta a linha do CSV a partir de um match
+
+        Returns:
+            Tupla (total de registros REM, total de registros RET, total de matches)
+            contada como no resumo em memória
+        """
+        with tempfile.TemporaryDirectory(prefix="analise_", dir=self.diretorio_temporario) as diretorio:
+            particoes_rem = self._particionar(fontes_rem, diretorio)
+            particoes_ret = self._particionar(fontes_ret, diretorio)
+            rem = self._ultimos_por_chave(heapq.merge(*particoes_rem))
+            ret = self._ultimos_por_chave(heapq.merge(*particoes_ret))
+            return self._escrever(self._unir(rem, ret), arquivo_analise, cabecalho, linha_csv, diretorio)
+
+    def _particionar(self, fontes, diretorio):
+        """
+        Distribui as chaves dos detalhes em partições ordenadas por (chave,
+        ordem). A ordem de leitura desempata chaves repetidas, para que a
+        última ocorrência prevaleça como no dicionário da análise em memória.
+        """
+        particoes = []
+        entradas = []
+        ordem = 0
+        for registros in fontes:
+            for dado in registros:
+                if dado['tipo'] != 'DETALHE':
+                    continue
+                meu_num = normalizar_chave(dado.get('meu_numero', ''))
+                nosso_num = normalizar_chave(dado.get('nosso_numero', ''))
+                if meu_num:
+                    entradas.append((f"M:{meu_num}", ordem, dado))
+                if nosso_num:
+                    entradas.append((f"N:{nosso_num}", ordem, dado))
+                ordem += 1
+
+                if len(entradas) >= self.limite_memoria:
+                    entradas.sort(key=lambda entrada: entrada[:2])
+                    particoes.append(_Particao(diretorio, entradas))
+                    entradas = []
+
+        if entradas:
+            entradas.sort(key=lambda entrada: entrada[:2])
+            particoes.append(_Particao(diretorio, entradas))
+        return particoes
+
+    @staticmethod
+    def _ultimos_por_chave(entradas):
+        """Reduz o fluxo ordenado a um (chave, registro) por chave, mantendo a última ocorrência."""
+        anterior = None
+        for chave, _, dado in entradas:
+            if anterior is not None and chave != anterior[0]:
+                yield anterior
+            anterior = (chave, dado)
+        if anterior is not None:
+            yield anterior
+
+    @staticmethod
+    def _unir(rem, ret):
+        """Merge-join de dois fluxos ordenados por chave: entrega (chave, rem, ret)."""
+        atual_rem = next(rem, None)
+        atual_ret = next(ret, None)
+        while atual_rem is not None or atual_ret is not None:
+            if atual_ret is None or (atual_rem is not None and atual_rem[0] < atual_ret[0]):
+                yield atual_rem[0], atual_rem[1], {}
+                atual_rem = next(rem, None)
+            elif atual_rem is None or atual_ret[0] < atual_rem[0]:
+                yield atual_ret[0], {}, atual_ret[1]
+                atual_ret = next(ret, None)
+            else:
+                yield atual_rem[0], atual_rem[1], atual_ret[1]
+                atual_rem = next(rem, None)
+                atual_ret = next(ret, None)
+
+    @staticmethod
+    def _escrever(unidos, arquivo_analise, cabecalho, linha_csv, diretorio):
+        """
+        Grava as linhas na ordem do CSV em memória (chaves dos matches
+        ordenadas): 'M:' sem par, 'MATCH_M:', 'MATCH_N:' e 'N:' sem par. Como o
+        fluxo já vem ordenado, só as linhas fora da vez passam por arquivos
+        temporários, concatenados ao final.
+        """
+        total_rem = total_ret = total_matches = 0
+        with open(arquivo_analise, 'w', newline='', encoding='utf-8-sig') as f, \
+                tempfile.TemporaryFile('w+', newline='', encoding='utf-8', dir=diretorio) as match_m, \
+                tempfile.TemporaryFile('w+', newline='', encoding='utf-8', dir=diretorio) as match_n, \
+                tempfile.TemporaryFile('w+', newline='', encoding='utf-8', dir=diretorio) as somente_n:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(cabecalho)
+            writers = {
+                ('M', True): csv.writer(match_m, delimiter=';'),
+                ('N', True): csv.writer(match_n, delimiter=';'),
+                ('M', False): writer,
+                ('N', False): csv.writer(somente_n, delimiter=';'),
+            }
+
+            for chave, rem, ret in unidos:
+                if rem and ret:
+                    status = 'MATCH'
+                    total_matches += 1
+                elif rem:
+                    status = 'SOMENTE REM'
+                else:
+                    status = 'SOMENTE RET'
+                total_rem += bool(rem)
+                total_ret += bool(ret)
+
+                match = {'rem': rem, 'ret': ret, 'numero_exibicao': chave[2:], 'status': status}
+                writers[(chave[0], status == 'MATCH')].writerow(linha_csv(match))
+
+            for temporario in (match_m, match_n, somente_n):
+                temporario.seek(0)
+                shutil.copyfileobj(temporario, f)
+
+        return total_rem, total_ret, total_matches
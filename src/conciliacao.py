@@ -0,0 +1,126 @@
+"""
+Índice de conciliação que resolve cada título a uma única identidade.
+
+Um detalhe (REM ou RET) é localizado pelo meu número ('M:') ou pelo nosso
+número ('N:'), já normalizados; qualquer uma das chaves leva ao mesmo título,
+que gera uma linha só na análise. Situações ambíguas não são mais resolvidas
+em silêncio: ficam registradas em `Titulo.conflitos`.
+"""
+
+from src.utils.formatadores import normalizar_chave
+
+CONFLITO_REM_DUPLICADO = 'REM DUPLICADO'
+CONFLITO_RET_REPETIDO = 'RET REPETIDO'
+CONFLITO_CHAVES_DIVERGENTES = 'CHAVES DIVERGENTES'
+
+
+def chaves_do_registro(registro):
+    """Chaves normalizadas do detalhe, na ordem 'M:' e 'N:' (as vazias são omitidas)."""
+    chaves = []
+    meu_num = normalizar_chave(registro.get('meu_numero', ''))
+    nosso_num = normalizar_chave(registro.get('nosso_numero', ''))
+    if meu_num:
+        chaves.append(f"M:{meu_num}")
+    if nosso_num:
+        chaves.append(f"N:{nosso_num}")
+    return chaves
+
+
+def _ret_repetido(anterior, registro):
+    """Dois detalhes RET do título com a mesma ocorrência, ou no mesmo arquivo."""
+    return (anterior.get('codigo_ocorrencia') == registro.get('codigo_ocorrencia')
+            or anterior.get('arquivo_origem') == registro.get('arquivo_origem'))
+
+
+class Titulo:
+    """Um título conciliado: o último detalhe REM e o último RET que o identificam."""
+
+    __slots__ = ('chave', 'rem', 'ret', 'conflitos')
+
+    def __init__(self, chave):
+        self.chave = chave
+        self.rem = None
+        self.ret = None
+        self.conflitos = []
+
+    @property
+    def status(self):
+        if self.rem is not None and self.ret is not None:
+            return 'MATCH'
+        return 'SOMENTE REM' if self.rem is not None else 'SOMENTE RET'
+
+    def registrar_conflito(self, conflito):
+        if conflito not in self.conflitos:
+            self.conflitos.append(conflito)
+
+
+class IndiceConciliacao:
+    """
+    Títulos indexados por todas as suas chaves.
+
+    Um detalhe é associado ao título da primeira chave já conhecida ('M:' e
+    depois 'N:'); se nenhuma for conhecida, cria um título novo. Suas chaves
+    ainda livres passam a apontar para o título, e chaves já tomadas por outro
+    título não são transferidas.
+
+    Conflitos registrados no título:
+        REM DUPLICADO: mais de um detalhe REM resolveu para o título (vale o último)
+        RET REPETIDO: um detalhe RET repete o anterior do título, com o mesmo
+            código de ocorrência ou no mesmo arquivo (vale o último). O ciclo
+            normal em arquivos diferentes (02 entrada confirmada, depois 06
+            liquidação) não é conflito
+        CHAVES DIVERGENTES: o meu número e o nosso número do detalhe apontam
+            para títulos diferentes (marcado nos dois títulos)
+    """
+
+    def __init__(self):
+        self.titulos = []
+        self._por_chave = {}
+
+    def adicionar_rem(self, registro):
+        self._adicionar('rem', registro, CONFLITO_REM_DUPLICADO)
+
+    def adicionar_ret(self, registro):
+        self._adicionar('ret', registro, CONFLITO_RET_REPETIDO, _ret_repetido)
+
+    def _adicionar(self, lado, registro, conflito_repetido, repetido=None):
+        chaves = chaves_do_registro(registro)
+        if not chaves:
+            return
+
+        encontrados = []
+        for chave in chaves:
+            titulo = self._por_chave.get(chave)
+            if titulo is not None and titulo not in encontrados:
+                encontrados.append(titulo)
+
+        if encontrados:
+            titulo = encontrados[0]
+            if len(encontrados) > 1:
+                for outro in encontrados:
+                    outro.registrar_conflito(CONFLITO_CHAVES_DIVERGENTES)
+        else:
+            titulo = Titulo(chaves[0])
+            self.titulos.append(titulo)
+
+        anterior = getattr(titulo, lado)
+        if anterior is not None and (repetido is None or repetido(anterior, registro)):
+            titulo.registrar_conflito(conflito_repetido)
+        setattr(titulo, lado, registro)
+
+        for chave in chaves:
+            self._por_chave.setdefault(chave, titulo)
+
+    def buscar(self, numero):
+        """Título identificado pelo meu número ou, na falta dele, pelo nosso número."""
+        chave = normalizar_chave(numero)
+        if not chave:
+            return None
+        return self._por_chave.get(f"M:{chave}") or self._por_chave.get(f"N:{chave}")
+
+    def ordenados(self):
+        """Títulos na ordem da chave de identificação (a mesma ordem de chaves da análise por chave)."""
+        return sorted(self.titulos, key=lambda titulo: titulo.chave)
+
+    def __len__(self):
+        return len(self.titulos)
@@ -0,0 +1,191 @@
+"""
+Exportação colunar tipada dos detalhes extraídos de arquivos REM e RET.
+
+Formatos:
+
+    jsonl    -> uma linha JSON por detalhe, gravada em fluxo
+    npy      -> um diretório com um arquivo .npy por coluna (requer numpy)
+    parquet  -> tabela Parquet gravada em lotes (requer pyarrow)
+
+Os valores saem tipados como em `extrair(..., tipado=True)`: valores em
+centavos (inteiros), datas como data (ISO no JSON Lines, `datetime64[D]` no
+.npy, `date32` no Parquet) e o restante como texto (unicode de largura fixa
+no .npy). No .npy, datas vazias são NaT e, nas colunas de valor com campos
+vazios, um arquivo `<coluna>__nulo.npy` indica quais estão vazios (o valor
+fica 0). Nenhuma coluna tem dtype de objeto, então cada uma pode ser mapeada
+em memória sem parse nem cópia:
+
+    np.load("TESTE_ret/valor_recebido.npy", mmap_mode="r")
+"""
+
+import json
+from pathlib import Path
+
+from src.extratores.registros import DetalheRem, DetalheRet
+from src.extratores.rem_extractor import RemExtractor
+from src.extratores.ret_extractor import RetExtractor
+from src.utils.formatadores import serializar_json
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+FORMATOS = ("jsonl", "npy", "parquet")
+TAMANHO_LOTE = 65536
+
+TEXTO = "texto"
+DATA = "data"
+CENTAVOS = "centavos"
+
+# Tipo de cada coluna dos detalhes; as omitidas são texto.
+_TIPOS = {
+    "REM": {'data_vencimento': DATA, 'data_emissao': DATA, 'valor_titulo': CENTAVOS},
+    "RET": {'data_liquidacao': DATA, 'data_vencimento': DATA, 'data_credito': DATA, 'valor_titulo': CENTAVOS,
+            'desconto': CENTAVOS, 'valor_recebido': CENTAVOS},
+}
+_COLUNAS = {"REM": DetalheRem.__slots__, "RET": DetalheRet.__slots__}
+_EXTRATORES = {"REM": RemExtractor, "RET": RetExtractor}
+
+
+def esquema(tipo):
+    """Lista (coluna, tipo) dos detalhes de arquivos do tipo 'REM' ou 'RET'."""
+    tipos = _TIPOS[tipo]
+    return [(coluna, tipos.get(coluna, TEXTO)) for coluna in _COLUNAS[tipo]]
+
+
+class ExportadorColunar:
+    """
+    Exporta os detalhes de um arquivo REM ou RET, lidos em fluxo por
+    `RemExtractor.iterar`/`RetExtractor.iterar` já tipados.
+    """
+
+    @staticmethod
+    def nome_saida(nome, formato):
+        """Nome do arquivo exportado (no formato npy, do diretório das colunas) a partir do nome base."""
+        return nome if formato == "npy" else f"{nome}.{formato}"
+
+    @staticmethod
+    def disponivel(formato):
+        """Indica se o formato pode ser exportado (conhecido e com a dependência instalada); senão avisa."""
+        if formato not in FORMATOS:
+            print(f"Formato de exportação desconhecido: {formato}")
+            return False
+        if formato == "npy" and np is None:
+            print("Exportação .npy indisponível: instale o numpy.")
+            return False
+        if formato == "parquet" and pa is None:
+            print("Exportação Parquet indisponível: instale o pyarrow.")
+            return False
+        return True
+
+    @staticmethod
+    def exportar(arquivo_entrada, arquivo_saida, tipo, formato="jsonl"):
+        """
+        Args:
+            arquivo_entrada: Arquivo .REM ou .RET
+            arquivo_saida: Arquivo a gravar (no formato npy, diretório das colunas)
+            tipo: 'REM' ou 'RET'
+            formato: 'jsonl', 'npy' ou 'parquet'
+
+        Returns:
+            Quantidade de detalhes exportados, ou None em caso de erro
+        """
+        if not ExportadorColunar.disponivel(formato):
+            return None
+
+        detalhes = (registro for registro in _EXTRATORES[tipo].iterar(arquivo_entrada, tipado=True)
+                    if registro.tipo == 'DETALHE')
+        try:
+            if formato == "jsonl":
+                return ExportadorColunar._gravar_jsonl(detalhes, arquivo_saida, esquema(tipo))
+            if formato == "npy":
+                return ExportadorColunar._gravar_npy(detalhes, arquivo_saida, esquema(tipo))
+            return ExportadorColunar._gravar_parquet(detalhes, arquivo_saida, esquema(tipo))
+        except FileNotFoundError:
+            print(f"Erro: Arquivo '{arquivo_entrada}' não encontrado.")
+        except Exception as e:
+            print(f"Erro ao exportar o arquivo {tipo}: {e}")
+        return None
+
+    @staticmethod
+    def _gravar_jsonl(detalhes, arquivo_saida, colunas):
+        nomes = [coluna for coluna, _ in colunas]
+        quantidade = 0
+        codificar = json.JSONEncoder(ensure_ascii=False, default=serializar_json).encode
+        with open(arquivo_saida, "w", encoding="utf-8") as saida:
+            linhas = []
+            for detalhe in detalhes:
+                linhas.append(codificar({coluna: getattr(detalhe, coluna) for coluna in nomes}))
+                if len(linhas) >= TAMANHO_LOTE:
+                    saida.write("\n".join(linhas) + "\n")
+                    quantidade += len(linhas)
+                    linhas.clear()
+            if linhas:
+                saida.write("\n".join(linhas) + "\n")
+                quantidade += len(linhas)
+        return quantidade
+
+    @staticmethod
+    def _colunas(detalhes, colunas):
+        """Uma lista por coluna, preenchidas na leitura (sem guardar os registros)."""
+        valores = [[] for _ in colunas]
+        acrescentar = [lista.append for lista in valores]
+        pares = list(zip(colunas, acrescentar))
+        for detalhe in detalhes:
+            for coluna, adicionar in pares:
+                adicionar(getattr(detalhe, coluna))
+        return valores
+
+    @staticmethod
+    def _gravar_npy(detalhes, diretorio_saida, colunas):
+        nomes = [coluna for coluna, _ in colunas]
+        valores = ExportadorColunar._colunas(detalhes, nomes)
+        diretorio_saida = Path(diretorio_saida)
+        diretorio_saida.mkdir(parents=True, exist_ok=True)
+        for (coluna, tipo), lista in zip(colunas, valores):
+            arquivo_nulos = diretorio_saida / f"{coluna}__nulo.npy"
+            if tipo == DATA:
+                array = np.array([valor if valor is not None else "NaT" for valor in lista], dtype="datetime64[D]")
+            elif tipo == CENTAVOS:
+                nulos = np.array([valor is None for valor in lista], dtype=bool)
+                array = np.array([valor or 0 for valor in lista], dtype=np.int64)
+            else:
+                array = np.array(lista, dtype=str)
+            np.save(diretorio_saida / f"{coluna}.npy", array)
+            # Sem campos vazios não há arquivo de nulos; o de uma exportação anterior é removido.
+            if tipo == CENTAVOS and nulos.any():
+                np.save(arquivo_nulos, nulos)
+            else:
+                arquivo_nulos.unlink(missing_ok=True)
+        return len(valores[0]) if valores else 0
+
+    @staticmethod
+    def _gravar_parquet(detalhes, arquivo_saida, colunas):
+        tipos = {TEXTO: pa.string(), DATA: pa.date32(), CENTAVOS: pa.int64()}
+        esquema_arrow = pa.schema([(coluna, tipos[tipo]) for coluna, tipo in colunas])
+        nomes = [coluna for coluna, _ in colunas]
+        quantidade = 0
+        lote = []
+        with pq.ParquetWriter(arquivo_saida, esquema_arrow) as escritor:
+            for detalhe in detalhes:
+                lote.append(detalhe)
+                if len(lote) >= TAMANHO_LOTE:
+                    escritor.write_table(ExportadorColunar._tabela(lote, nomes, esquema_arrow))
+                    quantidade += len(lote)
+                    lote.clear()
+            if lote or not quantidade:
+                escritor.write_table(ExportadorColunar._tabela(lote, nomes, esquema_arrow))
+                quantidade += len(lote)
+        return quantidade
+
+    @staticmethod
+    def _tabela(lote, nomes, esquema_arrow):
+        valores = ExportadorColunar._colunas(lote, nomes)
+        return pa.table(dict(zip(nomes, valores)), schema=esquema_arrow)
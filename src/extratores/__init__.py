@@ -1,4 +1,7 @@
+from .registros import Registro, HeaderRem, DetalheRem, HeaderRet, DetalheRet
 from .rem_extractor import RemExtractor
 from .ret_extractor import RetExtractor
+from .totais import Totais
 
-__all__ = ['RemExtractor', 'RetExtractor']
+__all__ = ['RemExtractor', 'RetExtractor', 'Registro', 'HeaderRem', 'DetalheRem', 'HeaderRet', 'DetalheRet',
+           'Totais']
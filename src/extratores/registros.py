@@ -0,0 +1,152 @@
+"""
+Registros compactos produzidos pelos extratores.
+
+Cada tipo de registro é uma classe com `__slots__`: as chaves ficam na classe
+e não se repetem em cada registro, que ocupa uma fração de um dicionário
+equivalente. O acesso no estilo dicionário (`registro['campo']`,
+`registro.get('campo', '')`, `dict(registro)`) continua disponível.
+"""
+
+import sys
+from pathlib import Path
+
+
+def origem_de(arquivo_entrada):
+    """Nome do arquivo de origem, calculado uma vez e compartilhado por todos os seus registros."""
+    return sys.intern(Path(arquivo_entrada).name)
+
+
+class Registro:
+    """Base dos registros extraídos, com acesso no estilo dicionário."""
+
+    __slots__ = ()
+    tipo = None
+    chaves = ('tipo',)
+    _chaves = frozenset(chaves)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.chaves = ('tipo',) + cls.__slots__
+        cls._chaves = frozenset(cls.chaves)
+
+    def __getitem__(self, chave):
+        if chave in self._chaves:
+            return getattr(self, chave)
+        raise KeyError(chave)
+
+    def get(self, chave, padrao=None):
+        if chave in self._chaves:
+            return getattr(self, chave)
+        return padrao
+
+    def __contains__(self, chave):
+        return chave in self._chaves
+
+    def keys(self):
+        return self.chaves
+
+    def values(self):
+        return [getattr(self, chave) for chave in self.chaves]
+
+    def items(self):
+        return [(chave, getattr(self, chave)) for chave in self.chaves]
+
+    def __iter__(self):
+        return iter(self.chaves)
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def __eq__(self, outro):
+        if isinstance(outro, Registro):
+            return self.items() == outro.items()
+        if isinstance(outro, dict):
+            return dict(self.items()) == outro
+        return NotImplemented
+
+    def __reduce__(self):
+        return (self.__class__, tuple(getattr(self, campo) for campo in self.__slots__))
+
+    def __repr__(self):
+        campos = ", ".join(f"{campo}={getattr(self, campo)!r}" for campo in self.__slots__)
+        return f"{self.__class__.__name__}({campos})"
+
+
+class HeaderRem(Registro):
+    __slots__ = ('identificacao', 'agencia', 'conta', 'beneficiario', 'banco', 'data_gravacao', 'convenio',
+                 'arquivo_origem')
+    tipo = 'HEADER'
+
+    def __init__(self, identificacao, agencia, conta, beneficiario, banco, data_gravacao, convenio,
+                 arquivo_origem):
+        self.identificacao = identificacao
+        self.agencia = agencia
+        self.conta = conta
+        self.beneficiario = beneficiario
+        self.banco = banco
+        self.data_gravacao = data_gravacao
+        self.convenio = convenio
+        self.arquivo_origem = arquivo_origem
+
+
+class DetalheRem(Registro):
+    __slots__ = ('cpf_cnpj_beneficiario', 'nosso_numero', 'meu_numero', 'codigo_controle_emp',
+                 'data_vencimento', 'valor_titulo', 'data_emissao', 'cpf_cnpj_pagador', 'nome_pagador',
+                 'arquivo_origem')
+    tipo = 'DETALHE'
+
+    def __init__(self, cpf_cnpj_beneficiario, nosso_numero, meu_numero, codigo_controle_emp, data_vencimento,
+                 valor_titulo, data_emissao, cpf_cnpj_pagador, nome_pagador, arquivo_origem):
+        self.cpf_cnpj_beneficiario = cpf_cnpj_beneficiario
+        self.nosso_numero = nosso_numero
+        self.meu_numero = meu_numero
+        self.codigo_controle_emp = codigo_controle_emp
+        self.data_vencimento = data_vencimento
+        self.valor_titulo = valor_titulo
+        self.data_emissao = data_emissao
+        self.cpf_cnpj_pagador = cpf_cnpj_pagador
+        self.nome_pagador = nome_pagador
+        self.arquivo_origem = arquivo_origem
+
+
+class HeaderRet(Registro):
+    __slots__ = ('tipo_operacao', 'tipo_servico', 'codigo_servico', 'agencia', 'conta', 'nome_empresa',
+                 'codigo_banco', 'nome_banco', 'data_gravacao', 'arquivo_origem')
+    tipo = 'HEADER'
+
+    def __init__(self, tipo_operacao, tipo_servico, codigo_servico, agencia, conta, nome_empresa, codigo_banco,
+                 nome_banco, data_gravacao, arquivo_origem):
+        self.tipo_operacao = tipo_operacao
+        self.tipo_servico = tipo_servico
+        self.codigo_servico = codigo_servico
+        self.agencia = agencia
+        self.conta = conta
+        self.nome_empresa = nome_empresa
+        self.codigo_banco = codigo_banco
+        self.nome_banco = nome_banco
+        self.data_gravacao = data_gravacao
+        self.arquivo_origem = arquivo_origem
+
+
+class DetalheRet(Registro):
+    __slots__ = ('nosso_numero', 'controle_participante', 'meu_numero', 'codigo_ocorrencia',
+                 'descricao_ocorrencia', 'data_liquidacao', 'data_vencimento', 'valor_titulo',
+                 'agencia_recebedora', 'data_credito', 'desconto', 'valor_recebido', 'arquivo_origem')
+    tipo = 'DETALHE'
+
+    def __init__(self, nosso_numero, controle_participante, meu_numero, codigo_ocorrencia, descricao_ocorrencia,
+                 data_liquidacao, data_vencimento, valor_titulo, agencia_recebedora, data_credito, desconto,
+                 valor_recebido, arquivo_origem):
+        self.nosso_numero = nosso_numero
+        self.controle_participante = controle_participante
+        self.meu_numero = meu_numero
+        self.codigo_ocorrencia = codigo_ocorrencia
+        self.descricao_ocorrencia = descricao_ocorrencia
+        self.data_liquidacao = data_liquidacao
+        self.data_vencimento = data_vencimento
+        self.valor_titulo = valor_titulo
+        self.agencia_recebedora = agencia_recebedora
+        self.data_credito = data_credito
+        self.desconto = desconto
+        self.valor_recebido = valor_recebido
+        self.arquivo_origem = arquivo_origem
@@ -2,95 +2,122 @@
 Extrator de dados de arquivos REM.
 """
 
-from pathlib import Path
-from src.utils.formatadores import formatar_data
+from sys import intern
+
+from src.extratores.registros import HeaderRem, DetalheRem, origem_de
+from src.extratores.totais import Totais
+from src.layouts.cnab400 import REM_HEADER, REM_DETALHE
+from src.utils.formatadores import converter_centavos, converter_data, formatar_data
+from src.utils.leitura import LeitorMapeado, dividir_em_faixas
+from src.utils.paralelo import mapear_faixas
 
 
 class RemExtractor:
     """Classe para extrair dados estruturados de arquivos REM."""
     
     @staticmethod
-    def extrair(arquivo_entrada):
+    def extrair(arquivo_entrada, processos=1, tipado=False, totais=None):
         """
         Extrai dados estruturados de um arquivo REM.
         
         Args:
-            arquivo_entrada: Caminho para o arquivo .REM
+            arquivo_entrada: Caminho para o arquivo .REM (ou compactado; ver `compactacao`)
+            processos: Com valor maior que 1, arquivos grandes são divididos em
+                faixas extraídas em paralelo (resultado idêntico ao serial)
+            tipado: Se True, valores saem em centavos (int) e datas como
+                `datetime.date` (None quando inválidas) em vez de texto
+            totais: `Totais` opcional, acumulado durante a extração
         
         Returns:
-            Lista de dicionários com os dados extraídos
+            Lista de registros (`HeaderRem`/`DetalheRem`) com os dados extraídos
         """
-        dados = []
         try:
-            with open(arquivo_entrada, "r", encoding="latin-1") as handle:
-                linhas = handle.readlines()
-
-            for linha in linhas:
-                linha = linha.rstrip('\r\n')
-                if len(linha) == 0:
-                    continue
-
-                flag = linha[0] if len(linha) > 0 else ""
-
-                if flag == "0":
-                    dados.append(RemExtractor._extrair_header(linha, arquivo_entrada))
-                elif flag == "7":
-                    dados.append(RemExtractor._extrair_detalhe(linha, arquivo_entrada))
-
-            return dados
+            faixas = dividir_em_faixas(arquivo_entrada, processos) if processos > 1 else []
+            if len(faixas) > 1:
+                dados = []
+                for dados_faixa, totais_faixa in mapear_faixas(RemExtractor._extrair_faixa, arquivo_entrada, faixas,
+                                                               tipado, totais is not None):
+                    dados.extend(dados_faixa)
+                    if totais is not None:
+                        totais.somar(totais_faixa)
+                return dados
+            return list(RemExtractor.iterar(arquivo_entrada, tipado=tipado, totais=totais))
         except Exception as e:
             print(f"Erro ao extrair dados do arquivo REM: {e}")
             return []
+
+    @staticmethod
+    def iterar(arquivo_entrada, faixa=None, tipado=False, totais=None):
+        """
+        Gera os dados estruturados de um arquivo REM registro a registro,
+        sem manter o arquivo inteiro em memória.
+
+        Args:
+            arquivo_entrada: Caminho para o arquivo .REM (ou compactado; ver `compactacao`)
+            faixa: Intervalo de bytes (inicio, fim) a ler; o arquivo todo se omitido
+            tipado: Valores em centavos e datas como `datetime.date` (ver `extrair`)
+            totais: `Totais` opcional, acumulado a cada detalhe entregue
+
+        Yields:
+            Registro (`HeaderRem`/`DetalheRem`) de cada header ou detalhe
+        """
+        arquivo_origem = origem_de(arquivo_entrada)
+        with LeitorMapeado(arquivo_entrada, faixa) as leitor:
+            yield from RemExtractor.montar_registros(leitor, arquivo_origem, tipado, totais)
     
     @staticmethod
-    def _extrair_header(linha, arquivo_entrada):
-        """Extrai dados do header do arquivo REM."""
-        identificacao = linha[11:19] if len(linha) >= 19 else ""
-        agencia = linha[26:30] if len(linha) >= 30 else ""
-        agencia_dv = linha[30:31] if len(linha) >= 31 else ""
-        conta = linha[31:39] if len(linha) >= 39 else ""
-        conta_dv = linha[39:40] if len(linha) >= 40 else ""
-        beneficiario = linha[46:76] if len(linha) >= 76 else ""
-        banco = linha[76:94] if len(linha) >= 94 else ""
-        data_gravacao = linha[94:100] if len(linha) >= 100 else ""
-        convenio = linha[129:136] if len(linha) >= 136 else ""
+    def montar_registros(registros_lidos, arquivo_origem, tipado=False, totais=None):
+        """Monta os registros a partir de registros lidos em bytes (de `LeitorMapeado` ou `registros_de_bytes`)."""
+        for registro in registros_lidos:
+            flag = registro[:1]
 
-        return {
-            'tipo': 'HEADER',
-            'identificacao': identificacao.strip(),
-            'agencia': f"{agencia.strip()}-{agencia_dv.strip()}",
-            'conta': f"{conta.strip()}-{conta_dv.strip()}",
-            'beneficiario': beneficiario.strip(),
-            'banco': banco.strip(),
-            'data_gravacao': formatar_data(data_gravacao[:6]) if len(data_gravacao) >= 6 else data_gravacao,
-            'convenio': convenio.strip(),
-            'arquivo_origem': Path(arquivo_entrada).name
-        }
+            if flag == b"0":
+                yield RemExtractor.montar_header(REM_HEADER.ler_bytes(registro), arquivo_origem, tipado)
+            elif flag == b"7":
+                detalhe = RemExtractor.montar_detalhe(REM_DETALHE.ler_bytes(registro), arquivo_origem, tipado)
+                if totais is not None:
+                    totais.acumular_rem(detalhe)
+                yield detalhe
     
     @staticmethod
-    def _extrair_detalhe(linha, arquivo_entrada):
-        """Extrai dados de detalhe do arquivo REM."""
-        cpf_cnpj_beneficiario = linha[3:17] if len(linha) >= 17 else ""
-        nosso_numero = linha[63:80] if len(linha) >= 80 else ""
-        meu_numero = linha[110:120] if len(linha) >= 120 else ""
-        codigo_controle_emp = linha[38:63] if len(linha) >= 63 else ""
-        data_vencimento = linha[120:126] if len(linha) >= 126 else ""
-        valor_titulo = linha[126:139] if len(linha) >= 139 else ""
-        data_emissao = linha[150:156] if len(linha) >= 156 else ""
-        cpf_cnpj_pagador = linha[220:234] if len(linha) >= 234 else ""
-        nome_pagador = linha[234:271] if len(linha) >= 271 else ""
+    def _extrair_faixa(arquivo_entrada, faixa, tipado=False, acumular=False):
+        totais = Totais() if acumular else None
+        return list(RemExtractor.iterar(arquivo_entrada, faixa, tipado, totais)), totais
+    
+    @staticmethod
+    def montar_header(campos, arquivo_origem, tipado=False):
+        """Monta o header do arquivo REM a partir dos campos de `REM_HEADER`."""
+        (identificacao, agencia, agencia_dv, conta, conta_dv, beneficiario, banco,
+         data_gravacao, convenio) = campos
 
-        return {
-            'tipo': 'DETALHE',
-            'cpf_cnpj_beneficiario': cpf_cnpj_beneficiario.strip(),
-            'nosso_numero': nosso_numero.strip(),
-            'meu_numero': meu_numero.strip(),
-            'codigo_controle_emp': codigo_controle_emp.strip(),
-            'data_vencimento': formatar_data(data_vencimento[:6]) if len(data_vencimento) >= 6 else data_vencimento,
-            'valor_titulo': valor_titulo.strip(),
-            'data_emissao': formatar_data(data_emissao[:6]) if len(data_emissao) >= 6 else data_emissao,
-            'cpf_cnpj_pagador': cpf_cnpj_pagador.strip(),
-            'nome_pagador': nome_pagador.strip(),
-            'arquivo_origem': Path(arquivo_entrada).name
-        }
+        return HeaderRem(
+            identificacao.strip(),
+            f"{agencia.strip()}-{agencia_dv.strip()}",
+            f"{conta.strip()}-{conta_dv.strip()}",
+            beneficiario.strip(),
+            banco.strip(),
+            converter_data(data_gravacao) if tipado else formatar_data(data_gravacao),
+            convenio.strip(),
+            arquivo_origem
+        )
+    
+    @staticmethod
+    def montar_detalhe(campos, arquivo_origem, tipado=False):
+        """Monta o detalhe do arquivo REM a partir dos campos de `REM_DETALHE`."""
+        (cpf_cnpj_beneficiario, codigo_controle_emp, nosso_numero, meu_numero, data_vencimento,
+         valor_titulo, data_emissao, cpf_cnpj_pagador, nome_pagador) = campos
 
+        # Campos de poucos valores distintos são internados e compartilhados
+        # entre os registros.
+        return DetalheRem(
+            intern(cpf_cnpj_beneficiario.strip()),
+            nosso_numero.strip(),
+            meu_numero.strip(),
+            codigo_controle_emp.strip(),
+            converter_data(data_vencimento) if tipado else intern(formatar_data(data_vencimento)),
+            converter_centavos(valor_titulo) if tipado else valor_titulo.strip(),
+            converter_data(data_emissao) if tipado else intern(formatar_data(data_emissao)),
+            cpf_cnpj_pagador.strip(),
+            nome_pagador.strip(),
+            arquivo_origem
+        )
@@ -2,105 +2,165 @@
 Extrator de dados de arquivos RET.
 """
 
-from pathlib import Path
-from src.utils.formatadores import formatar_data
+from sys import intern
+
+from src.extratores.registros import HeaderRet, DetalheRet, origem_de
+from src.extratores.totais import Totais
+from src.layouts.cnab400 import RET_HEADER, RET_DETALHE
+from src.utils.formatadores import converter_centavos, converter_data, formatar_data
+from src.utils.compactacao import abrir_entrada
+from src.utils.leitura import LeitorMapeado, dividir_em_faixas
+from src.utils.paralelo import mapear_faixas
 from src.utils.ocorrencias import obter_descricao_ocorrencia
+from src.utils.tabelas import TABELAS_PADRAO, tabelas_do_arquivo
 
 
 class RetExtractor:
     """Classe para extrair dados estruturados de arquivos RET."""
     
     @staticmethod
-    def extrair(arquivo_entrada):
+    def extrair(arquivo_entrada, processos=1, tipado=False, totais=None):
         """
         Extrai dados estruturados de um arquivo RET.
         
         Args:
-            arquivo_entrada: Caminho para o arquivo .RET
+            arquivo_entrada: Caminho para o arquivo .RET (ou compactado; ver `compactacao`)
+            processos: Com valor maior que 1, arquivos grandes são divididos em
+                faixas extraídas em paralelo (resultado idêntico ao serial)
+            tipado: Se True, valores saem em centavos (int) e datas como
+                `datetime.date` (None quando zeradas) em vez de texto
+            totais: `Totais` opcional, acumulado durante a extração
         
         Returns:
-            Lista de dicionários com os dados extraídos
+            Lista de registros (`HeaderRet`/`DetalheRet`) com os dados extraídos
         """
-        dados = []
         try:
-            with open(arquivo_entrada, "r", encoding="latin-1") as handle:
-                linhas = handle.readlines()
+            faixas = dividir_em_faixas(arquivo_entrada, processos) if processos > 1 else []
+            if len(faixas) > 1:
+                dados = []
+                tabelas = tabelas_do_arquivo(arquivo_entrada)
+                for dados_faixa, totais_faixa in mapear_faixas(RetExtractor._extrair_faixa, arquivo_entrada, faixas,
+                                                               tipado, totais is not None, tabelas):
+                    dados.extend(dados_faixa)
+                    if totais is not None:
+                        totais.somar(totais_faixa)
+                return dados
+            return list(RetExtractor.iterar(arquivo_entrada, tipado=tipado, totais=totais))
+        except Exception as e:
+            print(f"Erro ao extrair dados do arquivo RET: {e}")
+            return []
 
-            for linha in linhas:
-                linha = linha.rstrip('\r\n')
-                if len(linha) == 0:
-                    continue
+    @staticmethod
+    def iterar(arquivo_entrada, faixa=None, tipado=False, totais=None, tabelas=None):
+        """
+        Gera os dados estruturados de um arquivo RET registro a registro,
+        sem manter o arquivo inteiro em memória.
 
-                flag = linha[0] if len(linha) > 0 else ""
+        Args:
+            arquivo_entrada: Caminho para o arquivo .RET (ou compactado; ver `compactacao`)
+            faixa: Intervalo de bytes (inicio, fim) a ler; o arquivo todo se omitido
+            tipado: Valores em centavos e datas como `datetime.date` (ver `extrair`)
+            totais: `Totais` opcional, acumulado a cada detalhe entregue
+            tabelas: `TabelasCodigos` das descrições; por padrão as do banco
+                informado no header do arquivo (`tabelas_do_arquivo`)
 
-                if flag == "0":
-                    dados.append(RetExtractor._extrair_header(linha, arquivo_entrada))
-                elif flag == "7":
-                    dados.append(RetExtractor._extrair_detalhe(linha, arquivo_entrada))
+        Yields:
+            Registro (`HeaderRet`/`DetalheRet`) de cada header ou detalhe
+        """
+        arquivo_origem = origem_de(arquivo_entrada)
+        if tabelas is None:
+            tabelas = tabelas_do_arquivo(arquivo_entrada)
+        with LeitorMapeado(arquivo_entrada, faixa) as leitor:
+            yield from RetExtractor.montar_registros(leitor, arquivo_origem, tipado, totais, tabelas)
+    
+    @staticmethod
+    def montar_registros(registros_lidos, arquivo_origem, tipado=False, totais=None, tabelas=TABELAS_PADRAO):
+        """Monta os registros a partir de registros lidos em bytes (de `LeitorMapeado` ou `registros_de_bytes`)."""
+        for registro in registros_lidos:
+            flag = registro[:1]
 
-            return dados
-        except Exception as e:
-            print(f"Erro ao extrair dados do arquivo RET: {e}")
-            return []
+            if flag == b"0":
+                yield RetExtractor.montar_header(RET_HEADER.ler_bytes(registro), arquivo_origem, tipado)
+            elif flag == b"7":
+                detalhe = RetExtractor.montar_detalhe(RET_DETALHE.ler_bytes(registro), arquivo_origem, tipado, tabelas)
+                if totais is not None:
+                    totais.acumular_ret(detalhe)
+                yield detalhe
+    
+    @staticmethod
+    def ler_data_gravacao(arquivo_entrada):
+        """Data de gravação (`datetime.date`) do header do arquivo, lendo só a primeira linha; None se não houver."""
+        try:
+            with abrir_entrada(arquivo_entrada) as handle:
+                primeira = handle.readline(RET_HEADER.tamanho + 2)
+        except Exception:
+            return None
+        if primeira[:1] != b"0":
+            return None
+        return converter_data(primeira[RET_HEADER.fatia("data_gravacao")].decode("latin-1"))
+    
+    @staticmethod
+    def _extrair_faixa(arquivo_entrada, faixa, tipado=False, acumular=False, tabelas=TABELAS_PADRAO):
+        totais = Totais() if acumular else None
+        return list(RetExtractor.iterar(arquivo_entrada, faixa, tipado, totais, tabelas)), totais
     
     @staticmethod
-    def _extrair_header(linha, arquivo_entrada):
-        """Extrai dados do header do arquivo RET."""
-        tipo_operacao = linha[1:3] if len(linha) >= 3 else ""
-        tipo_servico = linha[3:5] if len(linha) >= 5 else ""
-        codigo_servico = linha[5:11] if len(linha) >= 11 else ""
-        agencia = linha[26:30] if len(linha) >= 30 else ""
-        agencia_dv = linha[30:31] if len(linha) >= 31 else ""
-        conta = linha[31:39] if len(linha) >= 39 else ""
-        conta_dv = linha[39:40] if len(linha) >= 40 else ""
-        nome_empresa = linha[46:76] if len(linha) >= 76 else ""
-        codigo_banco = linha[76:79] if len(linha) >= 79 else ""
-        nome_banco = linha[79:94] if len(linha) >= 94 else ""
-        data_gravacao = linha[94:100] if len(linha) >= 100 else ""
+    def montar_header(campos, arquivo_origem, tipado=False):
+        """Monta o header do arquivo RET a partir dos campos de `RET_HEADER`."""
+        (tipo_operacao, tipo_servico, codigo_servico, agencia, agencia_dv, conta, conta_dv,
+         nome_empresa, codigo_banco, nome_banco, data_gravacao, _convenio, _sequencial) = campos
 
-        return {
-            'tipo': 'HEADER',
-            'tipo_operacao': tipo_operacao.strip(),
-            'tipo_servico': tipo_servico.strip(),
-            'codigo_servico': codigo_servico.strip(),
-            'agencia': f"{agencia.strip()}-{agencia_dv.strip()}",
-            'conta': f"{conta.strip()}-{conta_dv.strip()}",
-            'nome_empresa': nome_empresa.strip(),
-            'codigo_banco': codigo_banco.strip(),
-            'nome_banco': nome_banco.strip(),
-            'data_gravacao': formatar_data(data_gravacao[:6]) if len(data_gravacao) >= 6 else data_gravacao,
-            'arquivo_origem': Path(arquivo_entrada).name
-        }
+        return HeaderRet(
+            tipo_operacao.strip(),
+            tipo_servico.strip(),
+            codigo_servico.strip(),
+            f"{agencia.strip()}-{agencia_dv.strip()}",
+            f"{conta.strip()}-{conta_dv.strip()}",
+            nome_empresa.strip(),
+            codigo_banco.strip(),
+            nome_banco.strip(),
+            converter_data(data_gravacao) if tipado else formatar_data(data_gravacao),
+            arquivo_origem
+        )
     
     @staticmethod
-    def _extrair_detalhe(linha, arquivo_entrada):
-        """Extrai dados de detalhe do arquivo RET."""
-        nosso_numero = linha[63:80] if len(linha) >= 80 else ""
-        controle_participante = linha[38:63] if len(linha) >= 63 else ""
-        meu_numero = linha[116:126] if len(linha) >= 126 else ""
-        codigo_ocorrencia = linha[106:108] if len(linha) >= 108 else ""
-        data_liquidacao = linha[110:116] if len(linha) >= 116 else ""
-        data_vencimento = linha[146:152] if len(linha) >= 152 else ""
-        valor_titulo = linha[152:165] if len(linha) >= 165 else ""
-        agencia_recebedora = linha[168:172] if len(linha) >= 172 else ""
-        data_credito = linha[175:181] if len(linha) >= 181 else ""
-        desconto = linha[240:253] if len(linha) >= 253 else ""
-        valor_recebido = linha[253:266] if len(linha) >= 266 else ""
+    def montar_detalhe(campos, arquivo_origem, tipado=False, tabelas=TABELAS_PADRAO):
+        """Monta o detalhe do arquivo RET a partir dos campos de `RET_DETALHE`."""
+        (controle_participante, nosso_numero, codigo_ocorrencia, _comando, data_liquidacao, meu_numero,
+         data_vencimento, valor_titulo, agencia_recebedora, data_credito, desconto,
+         valor_recebido) = campos
 
-        return {
-            'tipo': 'DETALHE',
-            'nosso_numero': nosso_numero.strip(),
-            'controle_participante': controle_participante.strip(),
-            'meu_numero': meu_numero.strip(),
-            'codigo_ocorrencia': codigo_ocorrencia.strip(),
-            'descricao_ocorrencia': obter_descricao_ocorrencia(codigo_ocorrencia),
-            'data_liquidacao': formatar_data(data_liquidacao[:6]) if len(data_liquidacao) >= 6 and data_liquidacao.strip() != "000000" else "00/00/00",
-            'data_vencimento': formatar_data(data_vencimento[:6]) if len(data_vencimento) >= 6 and data_vencimento.strip() != "000000" else "00/00/00",
-            'valor_titulo': valor_titulo.strip(),
-            'agencia_recebedora': agencia_recebedora.strip(),
-            'data_credito': formatar_data(data_credito[:6]) if len(data_credito) >= 6 and data_credito.strip() != "000000" else "00/00/00",
-            'desconto': desconto.strip(),
-            'valor_recebido': valor_recebido.strip(),
-            'arquivo_origem': Path(arquivo_entrada).name
-        }
+        if tipado:
+            return DetalheRet(
+                nosso_numero.strip(),
+                controle_participante.strip(),
+                meu_numero.strip(),
+                intern(codigo_ocorrencia.strip()),
+                obter_descricao_ocorrencia(codigo_ocorrencia, tabelas.ocorrencias),
+                converter_data(data_liquidacao.strip()),
+                converter_data(data_vencimento.strip()),
+                converter_centavos(valor_titulo),
+                intern(agencia_recebedora.strip()),
+                converter_data(data_credito.strip()),
+                converter_centavos(desconto),
+                converter_centavos(valor_recebido),
+                arquivo_origem
+            )
 
+        # Campos de poucos valores distintos são internados e compartilhados
+        # entre os registros. Datas ausentes (registro curto) saem zeradas.
+        return DetalheRet(
+            nosso_numero.strip(),
+            controle_participante.strip(),
+            meu_numero.strip(),
+            intern(codigo_ocorrencia.strip()),
+            obter_descricao_ocorrencia(codigo_ocorrencia, tabelas.ocorrencias),
+            intern(formatar_data(data_liquidacao) if data_liquidacao and data_liquidacao.strip() != "000000" else "00/00/00"),
+            intern(formatar_data(data_vencimento) if data_vencimento and data_vencimento.strip() != "000000" else "00/00/00"),
+            valor_titulo.strip(),
+            intern(agencia_recebedora.strip()),
+            intern(formatar_data(data_credito) if data_credito and data_credito.strip() != "000000" else "00/00/00"),
+            desconto.strip(),
+            valor_recebido.strip(),
+            arquivo_origem
+        )
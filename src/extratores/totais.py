@@ -0,0 +1,54 @@
+"""
+Totais de um arquivo acumulados durante a extração.
+"""
+
+from src.utils.formatadores import converter_centavos
+
+
+def _centavos(valor):
+    if isinstance(valor, int):
+        return valor
+    return converter_centavos(valor) or 0
+
+
+class Totais:
+    """
+    Somatórios dos detalhes de um arquivo, em centavos, e a contagem de
+    detalhes por código de ocorrência (só RET). Passado aos extratores, é
+    preenchido no mesmo parse que monta os registros, com registros em texto
+    ou tipados.
+    """
+
+    __slots__ = ('detalhes', 'valor_titulo', 'valor_recebido', 'desconto', 'ocorrencias')
+
+    def __init__(self):
+        self.detalhes = 0
+        self.valor_titulo = 0
+        self.valor_recebido = 0
+        self.desconto = 0
+        self.ocorrencias = {}
+
+    def acumular_rem(self, detalhe):
+        self.detalhes += 1
+        self.valor_titulo += _centavos(detalhe.valor_titulo)
+
+    def acumular_ret(self, detalhe):
+        self.detalhes += 1
+        self.valor_titulo += _centavos(detalhe.valor_titulo)
+        self.valor_recebido += _centavos(detalhe.valor_recebido)
+        self.desconto += _centavos(detalhe.desconto)
+        codigo = detalhe.codigo_ocorrencia
+        self.ocorrencias[codigo] = self.ocorrencias.get(codigo, 0) + 1
+
+    def somar(self, outro):
+        """Incorpora os totais de outra parte do mesmo arquivo (faixas extraídas em paralelo)."""
+        self.detalhes += outro.detalhes
+        self.valor_titulo += outro.valor_titulo
+        self.valor_recebido += outro.valor_recebido
+        self.desconto += outro.desconto
+        for codigo, quantidade in outro.ocorrencias.items():
+            self.ocorrencias[codigo] = self.ocorrencias.get(codigo, 0) + quantidade
+
+    def __repr__(self):
+        campos = ", ".join(f"{campo}={getattr(self, campo)!r}" for campo in self.__slots__)
+        return f"{self.__class__.__name__}({campos})"
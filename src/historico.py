@@ -0,0 +1,276 @@
+"""
+Histórico (SQLite) das ocorrências de cada título nos arquivos RET.
+
+Cada detalhe de cada RET vira um evento, só acrescentado, nunca alterado: o
+mesmo título confirmado, liquidado e depois estornado em três arquivos tem
+três eventos. Os eventos de um título são ordenados pela data de gravação do
+header do arquivo, depois pela ordem de registro dos arquivos e pela posição
+do detalhe no arquivo; a ordem dos arquivos no diretório não importa.
+
+O estado atual de cada título (o seu último evento nessa ordem) fica em uma
+tabela própria, atualizada a cada arquivo registrado, de modo que nem a
+consulta do estado atual nem a do histórico completo relê os arquivos.
+
+O evento guarda o registro como veio do banco (até a última posição lida por
+`RET_DETALHE`), mais as colunas indexadas (chave do título, meu número, data
+de gravação e código de ocorrência). Na gravação só essas posições são
+decodificadas; o detalhe completo é montado (`RetExtractor.montar_detalhe`)
+apenas para os eventos consultados.
+"""
+
+import sqlite3
+from itertools import chain, islice
+
+from src.extratores.ret_extractor import RetExtractor
+from src.layouts.cnab400 import RET_HEADER, RET_DETALHE
+from src.utils.cache import ImpressaoDigital
+from src.utils.compactacao import listar_entradas
+from src.utils.formatadores import converter_data, normalizar_chave
+from src.utils.leitura import LeitorMapeado
+from src.utils.tabelas import REGISTRO_TABELAS
+
+TAMANHO_LOTE_INSERCAO = 10000
+TAMANHO_CACHE_KB = 64 * 1024
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS arquivos (
+    id INTEGER PRIMARY KEY,
+    caminho TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    tamanho INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    resumo BLOB NOT NULL UNIQUE,
+    codigo_banco TEXT NOT NULL,
+    convenio TEXT NOT NULL DEFAULT '',
+    data_gravacao TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS eventos (
+    id INTEGER PRIMARY KEY,
+    arquivo_id INTEGER NOT NULL REFERENCES arquivos(id),
+    ordem INTEGER NOT NULL,
+    chave TEXT NOT NULL,
+    meu_numero TEXT NOT NULL,
+    data_gravacao TEXT NOT NULL,
+    codigo_ocorrencia TEXT NOT NULL,
+    registro BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS estado_atual (
+    chave TEXT PRIMARY KEY,
+    evento_id INTEGER NOT NULL REFERENCES eventos(id),
+    data_gravacao TEXT NOT NULL,
+    arquivo_id INTEGER NOT NULL,
+    ordem INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_eventos_chave ON eventos(chave, data_gravacao, arquivo_id, ordem);
+CREATE INDEX IF NOT EXISTS idx_eventos_meu ON eventos(meu_numero);
+CREATE INDEX IF NOT EXISTS idx_arquivos_caminho ON arquivos(caminho);
+"""
+
+# Um evento só substitui o estado atual se vier depois dele na ordem do histórico.
+_ATUALIZAR_ESTADO = """
+INSERT INTO estado_atual (chave, evento_id, data_gravacao, arquivo_id, ordem)
+SELECT chave, id, data_gravacao, arquivo_id, ordem FROM eventos WHERE arquivo_id = ?
+ON CONFLICT(chave) DO UPDATE SET evento_id = excluded.evento_id, data_gravacao = excluded.data_gravacao,
+    arquivo_id = excluded.arquivo_id, ordem = excluded.ordem
+WHERE (excluded.data_gravacao, excluded.arquivo_id, excluded.ordem)
+    > (estado_atual.data_gravacao, estado_atual.arquivo_id, estado_atual.ordem)
+"""
+
+_COLUNAS_EVENTO = "a.nome, a.codigo_banco, a.convenio, e.data_gravacao, e.chave, e.registro"
+
+
+_NOSSO_NUMERO = RET_DETALHE.fatia("nosso_numero")
+_MEU_NUMERO = RET_DETALHE.fatia("meu_numero")
+# O código de ocorrência do RET está na posição lida como 'carteira'.
+_OCORRENCIA = RET_DETALHE.fatia("carteira")
+
+
+def chave_titulo(nosso_numero, meu_numero):
+    """
+    Identidade do título no histórico, a partir das chaves já normalizadas: o
+    nosso número ('N:'), atribuído pelo banco, ou o meu número ('M:') quando
+    ele vier vazio; '' sem nenhum dos dois.
+    """
+    if nosso_numero:
+        return f"N:{nosso_numero}"
+    return f"M:{meu_numero}" if meu_numero else ""
+
+
+class HistoricoTitulos:
+    """
+    Histórico de ocorrências dos títulos em um banco SQLite local.
+
+    Um arquivo é identificado pelo resumo do conteúdo (`ImpressaoDigital`):
+    registrar de novo o mesmo arquivo, ainda que renomeado ou movido, não
+    duplica eventos; um arquivo alterado é registrado como um arquivo novo.
+    """
+
+    def __init__(self, arquivo_db):
+        self.arquivo_db = arquivo_db
+        self.conexao = sqlite3.connect(str(arquivo_db))
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        # Os índices recebem chaves fora de ordem: um cache maior evita reler páginas a cada lote.
+        self.conexao.execute(f"PRAGMA cache_size=-{TAMANHO_CACHE_KB}")
+        self.conexao.executescript(_ESQUEMA)
+        # Históricos criados antes da coluna `convenio` a recebem vazia.
+        colunas = {linha[1] for linha in self.conexao.execute("PRAGMA table_info(arquivos)")}
+        if "convenio" not in colunas:
+            self.conexao.execute("ALTER TABLE arquivos ADD COLUMN convenio TEXT NOT NULL DEFAULT ''")
+
+    def fechar(self):
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+
+    def registrar_diretorio(self, path_input):
+        """
+        Registra os arquivos RET do diretório (inclusive compactados) ainda
+        não registrados.
+
+        Returns:
+            Tupla (arquivos registrados agora, arquivos já registrados)
+        """
+        registrados = 0
+        existentes = 0
+        for arquivo in listar_entradas(path_input, "RET"):
+            impressao = ImpressaoDigital(arquivo)
+            if self._registrado(impressao):
+                existentes += 1
+                continue
+            print(f"Registrando histórico: {arquivo.name}")
+            if self.registrar_arquivo(arquivo, impressao):
+                registrados += 1
+        return registrados, existentes
+
+    def _registrado(self, impressao):
+        """Indica se o arquivo já foi registrado, pelo tamanho e mtime ou, se mudaram, pelo conteúdo."""
+        caminho = str(impressao.caminho)
+        linha = self.conexao.execute(
+            "SELECT 1 FROM arquivos WHERE caminho = ? AND tamanho = ? AND mtime_ns = ?",
+            (caminho, impressao.tamanho, impressao.mtime_ns)).fetchone()
+        if linha is not None:
+            return True
+
+        linha = self.conexao.execute("SELECT id FROM arquivos WHERE resumo = ?", (impressao.resumo,)).fetchone()
+        if linha is None:
+            return False
+        # Mesmo conteúdo em outro caminho ou com outro mtime: só a localização é atualizada.
+        with self.conexao:
+            self.conexao.execute(
+                "UPDATE arquivos SET caminho = ?, nome = ?, tamanho = ?, mtime_ns = ? WHERE id = ?",
+                (caminho, impressao.caminho.name, impressao.tamanho, impressao.mtime_ns, linha[0]))
+        return True
+
+    def registrar_arquivo(self, arquivo, impressao=None):
+        """
+        Acrescenta ao histórico os detalhes de um arquivo RET, em uma única
+        transação, e atualiza o estado atual dos títulos afetados.
+
+        Returns:
+            True se o arquivo foi registrado (ou já estava), False em caso de erro
+        """
+        impressao = impressao or ImpressaoDigital(arquivo)
+        try:
+            if self._registrado(impressao):
+                return True
+
+            with LeitorMapeado(arquivo) as leitor, self.conexao:
+                registros = iter(leitor)
+                primeiro = next(registros, b"")
+                if primeiro[:1] == b"0":
+                    campos = dict(zip(RET_HEADER.nomes, RET_HEADER.ler_bytes(primeiro)))
+                    codigo_banco = campos["codigo_banco"].strip()
+                    convenio = campos["convenio"].strip()
+                    data_gravacao = converter_data(campos["data_gravacao"])
+                else:
+                    codigo_banco, convenio, data_gravacao = "", "", None
+                    registros = chain((primeiro,), registros)
+                # Arquivos sem data de gravação válida no header ficam antes dos demais.
+                data_gravacao = data_gravacao.isoformat() if data_gravacao is not None else ""
+
+                arquivo_id = self.conexao.execute(
+                    "INSERT INTO arquivos (caminho, nome, tamanho, mtime_ns, resumo, codigo_banco, convenio, data_gravacao) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (str(impressao.caminho), impressao.caminho.name, impressao.tamanho, impressao.mtime_ns,
+                     impressao.resumo, codigo_banco, convenio, data_gravacao)).lastrowid
+
+                eventos = HistoricoTitulos._eventos(registros, arquivo_id, data_gravacao)
+                while True:
+                    lote = list(islice(eventos, TAMANHO_LOTE_INSERCAO))
+                    if not lote:
+                        break
+                    self.conexao.executemany(
+                        "INSERT INTO eventos (arquivo_id, ordem, chave, meu_numero, data_gravacao, codigo_ocorrencia, "
+                        "registro) VALUES (?, ?, ?, ?, ?, ?, ?)", lote)
+                self.conexao.execute(_ATUALIZAR_ESTADO, (arquivo_id,))
+            return True
+        except Exception as e:
+            print(f"Erro ao registrar o histórico do arquivo {arquivo}: {e}")
+            return False
+
+    @staticmethod
+    def _eventos(registros, arquivo_id, data_gravacao):
+        """Linhas da tabela de eventos para os detalhes lidos (em bytes), na ordem do arquivo."""
+        for ordem, registro in enumerate(registros, 1):
+            if registro[:1] != b"7":
+                continue
+            nosso_numero = normalizar_chave(registro[_NOSSO_NUMERO].decode("latin-1"))
+            meu_numero = normalizar_chave(registro[_MEU_NUMERO].decode("latin-1"))
+            chave = chave_titulo(nosso_numero, meu_numero)
+            if chave:
+                yield (arquivo_id, ordem, chave, meu_numero, data_gravacao,
+                       registro[_OCORRENCIA].decode("latin-1").strip(), registro[:RET_DETALHE.tamanho])
+
+    def _chaves(self, numero):
+        """Chaves dos títulos com o nosso número ou o meu número informado."""
+        chave = normalizar_chave(numero)
+        if not chave:
+            return []
+        return [linha[0] for linha in self.conexao.execute(
+            "SELECT chave FROM eventos WHERE chave = ? UNION SELECT chave FROM eventos WHERE meu_numero = ?",
+            (f"N:{chave}", chave))]
+
+    def historico(self, numero, tipado=False):
+        """
+        Todos os eventos dos títulos com o nosso número ou o meu número
+        informado (normalizados), em ordem cronológica.
+
+        Returns:
+            Lista de dicionários com 'arquivo', 'data_gravacao' (ISO), 'chave'
+            e os campos do detalhe, como em `RetExtractor.extrair` (com
+            `tipado`, valores em centavos e datas como `datetime.date`)
+        """
+        return [_evento(linha, tipado) for chave in self._chaves(numero) for linha in self.conexao.execute(
+            f"SELECT {_COLUNAS_EVENTO} FROM eventos e JOIN arquivos a ON a.id = e.arquivo_id "
+            "WHERE e.chave = ? ORDER BY e.data_gravacao, e.arquivo_id, e.ordem", (chave,))]
+
+    def estado_atual(self, numero, tipado=False):
+        """Último evento de cada título com o nosso número ou o meu número informado (ver `historico`)."""
+        return [_evento(linha, tipado) for chave in self._chaves(numero) for linha in self.conexao.execute(
+            f"SELECT {_COLUNAS_EVENTO} FROM estado_atual s JOIN eventos e ON e.id = s.evento_id "
+            "JOIN arquivos a ON a.id = e.arquivo_id WHERE s.chave = ?", (chave,))]
+
+    def estados(self, tipado=False):
+        """Gera o estado atual de todos os títulos, em ordem de chave, sem carregá-los todos em memória."""
+        cursor = self.conexao.execute(
+            f"SELECT {_COLUNAS_EVENTO} FROM estado_atual s JOIN eventos e ON e.id = s.evento_id "
+            "JOIN arquivos a ON a.id = e.arquivo_id ORDER BY s.chave")
+        while True:
+            linhas = cursor.fetchmany(TAMANHO_LOTE_INSERCAO)
+            if not linhas:
+                return
+            for linha in linhas:
+                yield _evento(linha, tipado)
+
+
+def _evento(linha, tipado):
+    nome, codigo_banco, convenio, data_gravacao, chave, registro = linha
+    detalhe = RetExtractor.montar_detalhe(RET_DETALHE.ler_bytes(registro), nome, tipado,
+                                          REGISTRO_TABELAS.obter(codigo_banco, convenio))
+    return {'arquivo': nome, 'data_gravacao': data_gravacao, 'chave': chave, **dict(detalhe.items())}
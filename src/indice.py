@@ -0,0 +1,155 @@
+"""
+Índice persistente (SQLite) de títulos para consulta por nosso número ou meu número.
+"""
+
+import json
+import sqlite3
+from itertools import islice
+
+from src.extratores.rem_extractor import RemExtractor
+from src.extratores.ret_extractor import RetExtractor
+from src.utils.cache import ImpressaoDigital
+from src.utils.compactacao import listar_entradas
+from src.utils.formatadores import normalizar_chave
+
+TAMANHO_LOTE_INSERCAO = 10000
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS arquivos (
+    id INTEGER PRIMARY KEY,
+    caminho TEXT NOT NULL UNIQUE,
+    nome TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    tamanho INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS titulos (
+    id INTEGER PRIMARY KEY,
+    arquivo_id INTEGER NOT NULL REFERENCES arquivos(id),
+    ordem INTEGER NOT NULL,
+    nosso_numero TEXT NOT NULL,
+    meu_numero TEXT NOT NULL,
+    dados TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_titulos_nosso ON titulos(nosso_numero);
+CREATE INDEX IF NOT EXISTS idx_titulos_meu ON titulos(meu_numero);
+CREATE INDEX IF NOT EXISTS idx_titulos_arquivo ON titulos(arquivo_id);
+"""
+
+
+class IndiceTitulos:
+    """
+    Índice dos detalhes de arquivos REM e RET em um banco SQLite local.
+
+    As colunas `nosso_numero` e `meu_numero` guardam as chaves já
+    normalizadas por `normalizar_chave` (a mesma normalização da análise) e
+    são indexadas; o registro completo fica em JSON na coluna `dados`.
+    """
+
+    def __init__(self, arquivo_db):
+        self.arquivo_db = arquivo_db
+        self.conexao = sqlite3.connect(str(arquivo_db))
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.executescript(_ESQUEMA)
+
+    def fechar(self):
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+
+    def indexar_diretorio(self, path_input):
+        """
+        Indexa os arquivos REM e RET do diretório. Arquivos já indexados com o
+        mesmo tamanho e mtime são mantidos; os alterados são reindexados.
+
+        Returns:
+            Tupla (arquivos indexados agora, arquivos já atualizados)
+        """
+        arquivos = [(arquivo, "REM", RemExtractor) for arquivo in listar_entradas(path_input, "REM")]
+        arquivos += [(arquivo, "RET", RetExtractor) for arquivo in listar_entradas(path_input, "RET")]
+
+        indexados = 0
+        atualizados = 0
+        for arquivo, tipo, extrator in arquivos:
+            impressao = ImpressaoDigital(arquivo)
+            if self._atualizado(impressao):
+                atualizados += 1
+                continue
+            print(f"Indexando: {arquivo.name}")
+            if self.indexar_arquivo(arquivo, tipo, extrator.iterar(arquivo), impressao):
+                indexados += 1
+        return indexados, atualizados
+
+    def _atualizado(self, impressao):
+        linha = self.conexao.execute(
+            "SELECT tamanho, mtime_ns FROM arquivos WHERE caminho = ?", (str(impressao.caminho),)
+        ).fetchone()
+        return linha == (impressao.tamanho, impressao.mtime_ns)
+
+    def indexar_arquivo(self, arquivo, tipo, registros, impressao=None):
+        """
+        Substitui os títulos do arquivo no índice pelos `registros` informados,
+        em uma única transação e com inserções em lotes.
+
+        Returns:
+            True se o arquivo foi indexado, False em caso de erro
+        """
+        impressao = impressao or ImpressaoDigital(arquivo)
+        detalhes = (
+            (ordem, normalizar_chave(registro.get('nosso_numero', '')),
+             normalizar_chave(registro.get('meu_numero', '')),
+             json.dumps(dict(registro.items()), ensure_ascii=False))
+            for ordem, registro in enumerate(registros)
+            if registro['tipo'] == 'DETALHE'
+        )
+
+        try:
+            with self.conexao:
+                self.conexao.execute(
+                    "DELETE FROM titulos WHERE arquivo_id IN (SELECT id FROM arquivos WHERE caminho = ?)",
+                    (str(impressao.caminho),))
+                self.conexao.execute(
+                    "INSERT INTO arquivos (caminho, nome, tipo, tamanho, mtime_ns) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(caminho) DO UPDATE SET tipo = excluded.tipo, tamanho = excluded.tamanho, "
+                    "mtime_ns = excluded.mtime_ns",
+                    (str(impressao.caminho), impressao.caminho.name, tipo, impressao.tamanho, impressao.mtime_ns))
+                arquivo_id = self.conexao.execute(
+                    "SELECT id FROM arquivos WHERE caminho = ?", (str(impressao.caminho),)).fetchone()[0]
+
+                while True:
+                    lote = [(arquivo_id,) + detalhe for detalhe in islice(detalhes, TAMANHO_LOTE_INSERCAO)]
+                    if not lote:
+                        break
+                    self.conexao.executemany(
+                        "INSERT INTO titulos (arquivo_id, ordem, nosso_numero, meu_numero, dados) "
+                        "VALUES (?, ?, ?, ?, ?)", lote)
+            return True
+        except Exception as e:
+            print(f"Erro ao indexar o arquivo {arquivo}: {e}")
+            return False
+
+    def buscar(self, numero):
+        """
+        Busca títulos pelo nosso número ou pelo meu número (normalizados).
+
+        Returns:
+            Lista de dicionários com 'arquivo', 'tipo_arquivo' ('REM'/'RET') e
+            os dados do registro, na ordem dos arquivos e dos registros
+        """
+        chave = normalizar_chave(numero)
+        if not chave:
+            return []
+
+        linhas = self.conexao.execute(
+            "SELECT a.nome, a.tipo, t.dados FROM titulos t JOIN arquivos a ON a.id = t.arquivo_id "
+            "WHERE t.id IN (SELECT id FROM titulos WHERE nosso_numero = ? "
+            "UNION SELECT id FROM titulos WHERE meu_numero = ?) "
+            "ORDER BY a.nome, t.ordem", (chave, chave)).fetchall()
+
+        return [{'arquivo': nome, 'tipo_arquivo': tipo, **json.loads(dados)} for nome, tipo, dados in linhas]
@@ -0,0 +1,6 @@
+from .layout import Campo, Layout
+from .cnab400 import (TAMANHO_REGISTRO, REM_HEADER, REM_DETALHE, REM_TRAILER, RET_HEADER, RET_DETALHE,
+                      RET_TRAILER, LAYOUTS_REM, LAYOUTS_RET)
+
+__all__ = ['Campo', 'Layout', 'TAMANHO_REGISTRO', 'REM_HEADER', 'REM_DETALHE', 'REM_TRAILER', 'RET_HEADER',
+           'RET_DETALHE', 'RET_TRAILER', 'LAYOUTS_REM', 'LAYOUTS_RET']
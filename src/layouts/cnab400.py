@@ -0,0 +1,78 @@
+"""
+Layouts CNAB 400 dos arquivos REM e RET.
+
+Cada tabela lista (nome, início, fim) com posições base zero no estilo de
+fatias do Python. A ordem dos campos é a ordem da tupla devolvida por
+`Layout.ler`.
+"""
+
+from .layout import Layout
+
+TAMANHO_REGISTRO = 400
+
+REM_HEADER = Layout("REM_HEADER", [
+    ("identificacao", 11, 19),
+    ("agencia", 26, 30),
+    ("agencia_dv", 30, 31),
+    ("conta", 31, 39),
+    ("conta_dv", 39, 40),
+    ("beneficiario", 46, 76),
+    ("banco", 76, 94),
+    ("data_gravacao", 94, 100),
+    ("convenio", 129, 136),
+])
+
+REM_DETALHE = Layout("REM_DETALHE", [
+    ("cpf_cnpj_beneficiario", 3, 17),
+    ("codigo_controle_emp", 38, 63),
+    ("nosso_numero", 63, 80),
+    ("meu_numero", 110, 120),
+    ("data_vencimento", 120, 126),
+    ("valor_titulo", 126, 139),
+    ("data_emissao", 150, 156),
+    ("cpf_cnpj_pagador", 220, 234),
+    ("nome_pagador", 234, 271),
+])
+
+REM_TRAILER = Layout("REM_TRAILER", [
+    ("sequencial", 394, 400),
+])
+
+RET_HEADER = Layout("RET_HEADER", [
+    ("tipo_operacao", 1, 3),
+    ("tipo_servico", 3, 5),
+    ("codigo_servico", 5, 11),
+    ("agencia", 26, 30),
+    ("agencia_dv", 30, 31),
+    ("conta", 31, 39),
+    ("conta_dv", 39, 40),
+    ("nome_empresa", 46, 76),
+    ("codigo_banco", 76, 79),
+    ("nome_banco", 79, 94),
+    ("data_gravacao", 94, 100),
+    ("convenio", 149, 156),
+    ("sequencial", 394, 400),
+])
+
+RET_DETALHE = Layout("RET_DETALHE", [
+    ("controle_participante", 38, 63),
+    ("nosso_numero", 63, 80),
+    ("carteira", 106, 108),
+    ("comando", 108, 110),
+    ("data_liquidacao", 110, 116),
+    ("meu_numero", 116, 126),
+    ("data_vencimento", 146, 152),
+    ("valor_titulo", 152, 165),
+    ("agencia_recebedora", 168, 172),
+    ("data_credito", 175, 181),
+    ("desconto", 240, 253),
+    ("valor_recebido", 253, 266),
+])
+
+RET_TRAILER = Layout("RET_TRAILER", [
+    ("total_registros", 17, 23),
+    ("valor_total", 23, 35),
+])
+
+LAYOUTS_REM = {"0": REM_HEADER, "7": REM_DETALHE, "9": REM_TRAILER}
+LAYOUTS_RET = {"0": RET_HEADER, "7": RET_DETALHE, "9": RET_TRAILER}
@@ -0,0 +1,74 @@
+"""
+Descrição declarativa de registros de largura fixa.
+"""
+
+from collections import namedtuple
+from operator import itemgetter
+
+Campo = namedtuple("Campo", ["nome", "inicio", "fim"])
+
+
+class Layout:
+    """
+    Layout de um tipo de registro, compilado uma única vez.
+
+    As posições dos campos viram objetos `slice` pré-calculados, reunidos em
+    um único `itemgetter`: a leitura de um registro é uma só chamada que
+    devolve a tupla de valores brutos (sem strip), na ordem dos campos.
+    Num registro mais curto que o layout, os campos que não cabem inteiros
+    nele vêm vazios (''), como na leitura campo a campo original.
+
+    O mesmo `itemgetter` serve a registros em bytes (`ler_bytes`): apenas os
+    bytes dos campos do layout são decodificados, numa única chamada, em vez
+    da linha inteira.
+    """
+
+    def __init__(self, nome, campos):
+        self.nome = nome
+        self.campos = tuple(Campo(*campo) for campo in campos)
+        self.nomes = tuple(campo.nome for campo in self.campos)
+        self.tamanho = max(campo.fim for campo in self.campos)
+
+        fatias = [slice(campo.inicio, campo.fim) for campo in self.campos]
+        self._fatias = dict(zip(self.nomes, fatias))
+        if len(fatias) == 1:
+            unico = itemgetter(fatias[0])
+            self._extrair = lambda linha: (unico(linha),)
+        else:
+            self._extrair = itemgetter(*fatias)
+
+    def ler(self, linha):
+        """Devolve a tupla com o valor bruto de cada campo do registro."""
+        if len(linha) < self.tamanho:
+            return self._ler_curto(linha)
+        return self._extrair(linha)
+
+    def _ler_curto(self, registro):
+        tamanho = len(registro)
+        return tuple(registro[campo.inicio:campo.fim] if campo.fim <= tamanho else registro[:0]
+                     for campo in self.campos)
+
+    def ler_bytes(self, registro):
+        """Como `ler`, para um registro em bytes (latin-1) ainda não decodificado."""
+        fatias = self._extrair(registro) if len(registro) >= self.tamanho else self._ler_curto(registro)
+        valores = b"\x00".join(fatias).decode("latin-1").split("\x00")
+        if len(valores) != len(fatias):
+            # Um campo contém o próprio separador: decodifica campo a campo.
+            valores = [fatia.decode("latin-1") for fatia in fatias]
+        return valores
+
+    def fatia(self, nome):
+        """`slice` das posições do campo no registro; KeyError se o campo não existir."""
+        return self._fatias[nome]
+
+    def ler_campo_bytes(self, registro, nome):
+        """Valor bruto de um único campo de um registro em bytes; KeyError se o campo não existir."""
+        fatia = self._fatias[nome]
+        return registro[fatia].decode("latin-1") if fatia.stop <= len(registro) else ""
+
+    def ler_dict(self, linha):
+        """Devolve os valores brutos do registro indexados pelo nome do campo."""
+        return dict(zip(self.nomes, self.ler(linha)))
+
+    def __repr__(self):
+        return f"Layout({self.nome!r}, {len(self.campos)} campos)"
@@ -0,0 +1,206 @@
+"""
+Monitoramento contínuo do diretório de entrada (modo --watch).
+"""
+
+import json
+import os
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from src.analise import AnaliseGenerator
+from src.utils.cache import CacheExtracao, ImpressaoDigital
+from src.utils.compactacao import EXTENSAO_ZIP, estado_entrada, membros_zip, tipo_entrada
+
+INTERVALO_PADRAO = 60
+ARQUIVO_ESTADO = ".monitor.json"
+
+
+class MonitorEntrada:
+    """
+    Processa os arquivos REM e RET do diretório de entrada à medida que chegam.
+
+    A cada verificação o diretório é listado uma única vez (`os.scandir`, que
+    já traz tamanho e mtime). Um arquivo novo ou alterado só é processado
+    quando está estável: sem mudança desde a verificação anterior ou
+    modificado há mais de um intervalo. Os arquivos processados ficam
+    registrados por impressão digital (tamanho, mtime e resumo do conteúdo)
+    em `dataOutput/.monitor.json`; um arquivo só tocado, com o mesmo
+    conteúdo, não é reprocessado, nem depois de reiniciar o monitor.
+
+    Os registros de cada arquivo ficam em memória (e no cache de extração),
+    de modo que a análise é refeita só com a leitura dos arquivos novos. Com
+    `historico`, as ocorrências de cada RET novo são acrescentadas a ele.
+    """
+
+    def __init__(self, path_input, path_output, processar, intervalo=INTERVALO_PADRAO, processos=1, historico=None):
+        """
+        Args:
+            path_input: Diretório monitorado
+            path_output: Diretório dos relatórios, da análise e do estado
+            processar: Função com a assinatura de `processar_arquivo` do
+                leitor_rem.py: gera o relatório, preenche `registros` e devolve
+                True em caso de sucesso
+            intervalo: Segundos entre as verificações
+            processos: Repassado a `processar` para arquivos grandes
+            historico: `HistoricoTitulos` opcional, atualizado com os RET processados
+        """
+        self.path_input = Path(path_input)
+        self.path_output = Path(path_output)
+        self.processar = processar
+        self.intervalo = intervalo
+        self.processos = processos
+        self.historico = historico
+        self.cache = CacheExtracao(self.path_output / ".cache")
+        self.arquivo_estado = self.path_output / ARQUIVO_ESTADO
+        self.processados = self._carregar_estado()
+        self.extraidos = {}
+        self._vistos = {}
+
+    def _carregar_estado(self):
+        try:
+            with open(self.arquivo_estado, "r", encoding="utf-8") as handle:
+                return {caminho: tuple(impressao) for caminho, impressao in json.load(handle).items()}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Estado do monitor inválido, os arquivos serão reprocessados: {e}")
+            return {}
+
+    def _gravar_estado(self):
+        descritor, temporario = tempfile.mkstemp(dir=self.path_output, suffix=".tmp")
+        with os.fdopen(descritor, "w", encoding="utf-8") as handle:
+            json.dump(self.processados, handle)
+        os.replace(temporario, self.arquivo_estado)
+
+    def listar(self):
+        """
+        Arquivos REM e RET do diretório, inclusive .gz, .bz2, .xz e os membros
+        de cada .zip: {caminho: (tamanho, mtime_ns)}. Um membro de .zip tem o
+        tamanho descompactado e o mtime do .zip (ver `estado_entrada`).
+        """
+        arquivos = {}
+        with os.scandir(self.path_input) as entradas:
+            for entrada in entradas:
+                if not entrada.is_file():
+                    continue
+                if tipo_entrada(entrada.name):
+                    estado = entrada.stat()
+                    arquivos[entrada.path] = (estado.st_size, estado.st_mtime_ns)
+                elif entrada.name.lower().endswith(EXTENSAO_ZIP):
+                    for membro in membros_zip(entrada.path):
+                        try:
+                            arquivos[str(membro)] = estado_entrada(membro)
+                        except (OSError, KeyError, zipfile.BadZipFile) as e:
+                            print(f"Membro ignorado ({membro.name}): {e}")
+        return arquivos
+
+    def verificar(self):
+        """
+        Faz uma verificação: processa os arquivos novos ou alterados e, se
+        algo mudou, atualiza a análise. Um arquivo com erro (removido durante a
+        verificação, gravado pela metade...) não é registrado como processado e
+        é tentado de novo na verificação seguinte.
+
+        Returns:
+            Lista dos arquivos processados nesta verificação
+        """
+        arquivos = self.listar()
+        agora_ns = time.time_ns()
+        processados = []
+        mudou = False
+        removidos = False
+
+        for caminho in list(self.processados):
+            if caminho not in arquivos:
+                del self.processados[caminho]
+                self.extraidos.pop(Path(caminho), None)
+                print(f"Arquivo removido: {Path(caminho).name}")
+                mudou = removidos = True
+
+        for caminho, (tamanho, mtime_ns) in sorted(arquivos.items()):
+            anterior = self.processados.get(caminho)
+            if anterior is not None and anterior[:2] == (tamanho, mtime_ns):
+                continue
+
+            estavel = (self._vistos.get(caminho) == (tamanho, mtime_ns)
+                       or agora_ns - mtime_ns >= self.intervalo * 1_000_000_000)
+            self._vistos[caminho] = (tamanho, mtime_ns)
+            if not estavel:
+                continue
+
+            try:
+                resultado = self._processar_arquivo(caminho, anterior)
+            except Exception as e:
+                print(f"Erro ao processar o arquivo {Path(caminho).name}: {e}")
+                continue
+            if resultado is not None:
+                mudou = True
+            if resultado:
+                processados.append(Path(caminho))
+
+        if mudou:
+            self._gravar_estado()
+        if processados or removidos:
+            self._atualizar_analise(arquivos)
+        return processados
+
+    def _processar_arquivo(self, caminho, anterior):
+        """
+        Processa um arquivo estável e o registra como processado. Devolve True
+        se o relatório foi gerado, False se só o mtime mudou; em caso de falha,
+        levanta a exceção ou devolve None, sem registrar o arquivo.
+        """
+        impressao = ImpressaoDigital(caminho)
+        resumo = impressao.resumo.hex()
+        if anterior is not None and anterior[0] == impressao.tamanho and anterior[2] == resumo:
+            self.processados[caminho] = (impressao.tamanho, impressao.mtime_ns, resumo)
+            return False
+
+        arquivo = Path(caminho)
+        registros = []
+        if not self.processar(arquivo, self.path_output, registros, processos=self.processos):
+            print(f"Falha ao processar {arquivo.name}; nova tentativa na próxima verificação.")
+            return None
+        self.extraidos[arquivo] = registros
+        self.cache.guardar(impressao, registros)
+        if self.historico is not None and tipo_entrada(arquivo) == "RET":
+            self.historico.registrar_arquivo(arquivo, impressao)
+        self.processados[caminho] = (impressao.tamanho, impressao.mtime_ns, resumo)
+        self._vistos.pop(caminho, None)
+        return True
+
+    def _atualizar_analise(self, arquivos):
+        tipos = {tipo_entrada(caminho) for caminho in arquivos}
+        if tipos != {"REM", "RET"}:
+            return
+        # Arquivos processados antes de o monitor iniciar vêm do cache, uma vez,
+        # com o resumo já registrado no estado: o conteúdo não é lido de novo.
+        for caminho, estado in arquivos.items():
+            arquivo = Path(caminho)
+            if arquivo not in self.extraidos:
+                registrado = self.processados.get(caminho)
+                resumo = bytes.fromhex(registrado[2]) if registrado and registrado[:2] == estado else None
+                try:
+                    registros = self.cache.obter(ImpressaoDigital(arquivo, resumo))
+                except (OSError, KeyError, zipfile.BadZipFile):
+                    continue
+                if registros is not None:
+                    self.extraidos[arquivo] = registros
+
+        print("\nAtualizando análise...")
+        AnaliseGenerator.gerar(self.path_input, self.path_output, self.extraidos, self.processos, cache=self.cache)
+
+    def executar(self):
+        """Verifica o diretório a cada `intervalo` segundos até ser interrompido (Ctrl+C)."""
+        print(f"Monitorando {self.path_input} a cada {self.intervalo}s (Ctrl+C para encerrar)")
+        try:
+            while True:
+                try:
+                    self.verificar()
+                except Exception as e:
+                    print(f"Erro na verificação do diretório: {e}")
+                time.sleep(self.intervalo)
+        except KeyboardInterrupt:
+            print("\nMonitoramento encerrado.")
@@ -1,14 +1,42 @@
+from src.extratores.rem_extractor import RemExtractor
+from src.extratores.registros import origem_de
+from src.layouts.cnab400 import REM_HEADER, REM_DETALHE
 from src.utils.formatadores import formatar_data
-from src.utils.arquivo import gravar_substring
+from src.utils.arquivo import EscritorRelatorio
+from src.utils.leitura import LeitorMapeado, dividir_em_faixas
+from src.utils.metricas import SECAO_INATIVA, abrir_secao
+from src.utils.paralelo import mapear_faixas
+from src.validacao import ValidacaoArquivo
+
+CABECALHO_HEADER = "TIPO DE SERVICO AG.    CONTA      BENEFICIARIO                   ARRECADADOR        DT. GRAVACAO CONVENIO"
+CABECALHO_DETALHE = "CPF/CNPJ DO BENEFICIARIO      NOSSO NUMERO      CONTROLE EMPRESA          MEU NUMERO DT VENCIMENTO VALOR DO TITULO DT EMISSAO  CPF/CNPJ DO PAGADOR PAGADOR"
 
 
 class RemProcessor:
     
     @staticmethod
-    def processar(arquivo_entrada, arquivo_saida):
+    def processar(arquivo_entrada, arquivo_saida, registros=None, resumo=None, processos=1, metricas=None):
+        """
+        Gera o relatório de largura fixa de um arquivo REM.
+
+        Se `registros` for uma lista, ela recebe os mesmos dados estruturados
+        de `RemExtractor.extrair`, montados a partir do mesmo parse, para que
+        o arquivo não precise ser lido de novo pela análise. Se `resumo` for
+        um dicionário, recebe a contagem de lançamentos em 'nlinhas' e as
+        divergências da validação (`ValidacaoArquivo`) em 'divergencias'.
+
+        Com `processos` > 1, arquivos grandes são divididos em faixas
+        alinhadas a quebras de linha e formatados em paralelo; o relatório e os
+        registros são idênticos aos do processamento serial.
+
+        Com `metricas` (`Metricas`), o arquivo vira uma seção com o tempo de
+        leitura, parse, formatação e gravação, registros/s e bytes lidos e
+        gravados. No processamento em paralelo a leitura, o parse e a
+        formatação acontecem nos outros processos e aparecem juntos como
+        formatação.
+        """
         try:
-            with open(arquivo_entrada, "r", encoding="latin-1") as handle:
-                linhas = handle.readlines()
+            leitor = LeitorMapeado(arquivo_entrada)
         except FileNotFoundError:
             print(f"Erro: Arquivo '{arquivo_entrada}' não encontrado.")
             return False
@@ -17,29 +45,27 @@ class RemProcessor:
             return False
 
         try:
-            with open(arquivo_saida, "w", encoding="utf-8") as saida:
-                unico = True
-                nlinhas = 0
-
-                for linha in linhas:
-                    linha = linha.rstrip('\r\n')
-                    if len(linha) == 0:
-                        continue
-
-                    flag = linha[0] if len(linha) > 0 else ""
-
-                    if flag == "0":
-                        RemProcessor._processar_header(saida, linha)
-                    elif flag == "7":
-                        RemProcessor._processar_detalhe(saida, linha, unico)
-                        if unico:
-                            unico = False
-                        nlinhas = nlinhas + 1
-
-                RemProcessor._gravar_rodape(saida, nlinhas)
-
+            secao = abrir_secao(metricas, origem_de(arquivo_entrada), "REM", arquivo_entrada)
+            validacao = ValidacaoArquivo("REM")
+            with leitor, open(arquivo_saida, "w", encoding="utf-8") as saida, secao:
+                faixas = dividir_em_faixas(arquivo_entrada, processos) if processos > 1 else []
+                if len(faixas) > 1:
+                    itens = RemProcessor._formatar_em_paralelo(arquivo_entrada, faixas, registros, validacao)
+                else:
+                    itens = RemProcessor._formatar_registros(secao.cronometrar(leitor, "leitura", ler=True),
+                                                             origem_de(arquivo_entrada), registros, secao,
+                                                             validacao)
+                with secao.etapa("gravacao"):
+                    nlinhas = RemProcessor._gravar_relatorio(saida, secao.cronometrar(itens, "formatacao"))
+                secao.contar(registros=nlinhas, bytes_gravados=saida.tell())
+
+            if resumo is not None:
+                resumo['nlinhas'] = nlinhas
             print("Processamento realizado com sucesso!")
             print(f"Total de lançamentos processados: {nlinhas}")
+            divergencias = validacao.finalizar().exibir(origem_de(arquivo_entrada))
+            if resumo is not None:
+                resumo['divergencias'] = divergencias
             return True
 
         except Exception as e:
@@ -47,31 +73,111 @@ class RemProcessor:
             return False
     
     @staticmethod
-    def _processar_header(saida, linha):
-        identificacao = linha[11:19] if len(linha) >= 19 else linha[11:].ljust(8)
-        identificacao = identificacao[:8]
-
-        agencia = linha[26:30] if len(linha) >= 30 else linha[26:].ljust(4)
-        agencia = agencia[:4]
-        agencia_dv = linha[30:31] if len(linha) >= 31 else ""
-        agencia = f"{agencia}-{agencia_dv}"
-
-        conta = linha[31:39] if len(linha) >= 39 else linha[31:].ljust(8)
-        conta = conta[:8]
-        conta_dv = linha[39:40] if len(linha) >= 40 else ""
-        conta = f"{conta}-{conta_dv}"
-
-        beneficiario = linha[46:76] if len(linha) >= 76 else linha[46:].ljust(30)
-        beneficiario = beneficiario[:30].rstrip()
+    def gerar_relatorio(registros_lidos, saida, arquivo_origem=""):
+        """
+        Grava em `saida` (arquivo texto ou `io.StringIO`) o relatório dos
+        registros lidos em bytes, sem abrir arquivos; devolve o total de
+        lançamentos.
+        """
+        itens = RemProcessor._formatar_registros(registros_lidos, arquivo_origem, None)
+        return RemProcessor._gravar_relatorio(saida, itens)
+    
+    @staticmethod
+    def _formatar_registros(registros_lidos, arquivo_origem, registros, secao=SECAO_INATIVA, validacao=None):
+        """
+        Gera (flag, linha do relatório) para cada registro lido (em bytes). Com
+        `validacao`, cada registro é conferido no mesmo laço.
+        """
+        ler_header = secao.cronometrar_funcao(REM_HEADER.ler_bytes, "parse")
+        ler_detalhe = secao.cronometrar_funcao(REM_DETALHE.ler_bytes, "parse")
+
+        for registro in registros_lidos:
+            flag = registro[:1]
+            if validacao is not None:
+                validacao.registro(registro)
+
+            if flag == b"0":
+                campos = ler_header(registro)
+                if registros is not None:
+                    registros.append(RemExtractor.montar_header(campos, arquivo_origem))
+                if len(registro) < REM_HEADER.tamanho:
+                    campos = RemProcessor._completar(REM_HEADER, registro)
+                yield "0", RemProcessor._formatar_header(campos)
+            elif flag == b"7":
+                campos = ler_detalhe(registro)
+                if registros is not None:
+                    registros.append(RemExtractor.montar_detalhe(campos, arquivo_origem))
+                if len(registro) < REM_DETALHE.tamanho:
+                    campos = RemProcessor._completar(REM_DETALHE, registro)
+                yield "7", RemProcessor._formatar_detalhe(campos)
 
-        banco = linha[76:94] if len(linha) >= 94 else linha[76:].ljust(18)
-        banco = banco[:18].rstrip()
+    @staticmethod
+    def _completar(layout, registro):
+        """
+        Campos de um registro curto para o relatório: o trecho presente de cada
+        campo completado com espaços, e não vazio como nos registros extraídos.
+        Dígitos verificadores (uma posição) ausentes ficam vazios.
+        """
+        completos = layout.ler_bytes(registro.ljust(layout.tamanho))
+        return [valor if campo.fim <= len(registro) or campo.fim - campo.inicio > 1 else ""
+                for campo, valor in zip(layout.campos, completos)]
 
-        data_gravacao = linha[94:100] if len(linha) >= 100 else linha[94:].ljust(6)
-        data_gravacao = formatar_data(data_gravacao[:6])
+    @staticmethod
+    def _formatar_faixa(arquivo_entrada, faixa, coletar_registros):
+        registros = [] if coletar_registros else None
+        validacao = ValidacaoArquivo("REM")
+        with LeitorMapeado(arquivo_entrada, faixa) as leitor:
+            itens = list(RemProcessor._formatar_registros(leitor, origem_de(arquivo_entrada), registros,
+                                                          validacao=validacao))
+        return itens, registros, validacao.finalizar()
+    
+    @staticmethod
+    def _formatar_em_paralelo(arquivo_entrada, faixas, registros, validacao):
+        """Formata as faixas do arquivo em processos separados, na ordem original."""
+        for itens, registros_faixa, validacao_faixa in mapear_faixas(RemProcessor._formatar_faixa, arquivo_entrada,
+                                                                     faixas, registros is not None):
+            if registros is not None:
+                registros.extend(registros_faixa)
+            validacao.somar(validacao_faixa)
+            yield from itens
+    
+    @staticmethod
+    def _gravar_relatorio(saida, itens):
+        """Grava as linhas formatadas com cabeçalhos e rodapé; devolve o total de lançamentos."""
+        escritor = EscritorRelatorio(saida)
+        gravar = escritor.gravar
+        unico = True
+        nlinhas = 0
+
+        for flag, substring in itens:
+            if flag == "7":
+                if unico:
+                    gravar(CABECALHO_DETALHE)
+                    gravar("-" * 195)
+                    unico = False
+                gravar(substring)
+                nlinhas = nlinhas + 1
+            else:
+                gravar(CABECALHO_HEADER)
+                gravar("-" * 105)
+                gravar(substring)
+                gravar("-" * 105)
+
+        RemProcessor._gravar_rodape(escritor, nlinhas)
+        escritor.descarregar()
+        return nlinhas
+    
+    @staticmethod
+    def _formatar_header(campos):
+        (identificacao, agencia, agencia_dv, conta, conta_dv, beneficiario, banco,
+         data_gravacao, convenio) = campos
 
-        convenio = linha[129:136] if len(linha) >= 136 else linha[129:].ljust(7)
-        convenio = convenio[:7].rstrip()
+        agencia = f"{agencia}-{agencia_dv}"
+        conta = f"{conta}-{conta_dv}"
+        beneficiario = beneficiario.rstrip()
+        banco = banco.rstrip()
+        data_gravacao = formatar_data(data_gravacao)
+        convenio = convenio.rstrip()
 
         substring = (identificacao + " " * 8 +
                     agencia + " " +
@@ -81,47 +187,18 @@ class RemProcessor:
                     data_gravacao + " " * 5 +
                     convenio)
 
-        cabecalho = "TIPO DE SERVICO AG.    CONTA      BENEFICIARIO                   ARRECADADOR        DT. GRAVACAO CONVENIO"
-        gravar_substring(saida, cabecalho)
-        cabecalho = "-" * 105
-        gravar_substring(saida, cabecalho)
-        gravar_substring(saida, substring)
-        gravar_substring(saida, cabecalho)
+        return substring
     
     @staticmethod
-    def _processar_detalhe(saida, linha, unico):
-        if unico:
-            cabecalho = "CPF/CNPJ DO BENEFICIARIO      NOSSO NUMERO      CONTROLE EMPRESA          MEU NUMERO DT VENCIMENTO VALOR DO TITULO DT EMISSAO  CPF/CNPJ DO PAGADOR PAGADOR"
-            gravar_substring(saida, cabecalho)
-            cabecalho = "-" * 195
-            gravar_substring(saida, cabecalho)
-
-        cpf_cnpj_beneficiario = linha[3:17] if len(linha) >= 17 else linha[3:].ljust(14)
-        cpf_cnpj_beneficiario = cpf_cnpj_beneficiario[:14]
-
-        nosso_numero = linha[63:80] if len(linha) >= 80 else linha[63:].ljust(17)
-        nosso_numero = nosso_numero[:17]
-
-        meu_numero = linha[110:120] if len(linha) >= 120 else linha[110:].ljust(10)
-        meu_numero = meu_numero[:10]
-
-        codigo_controle_emp = linha[38:63] if len(linha) >= 63 else linha[38:].ljust(25)
-        codigo_controle_emp = codigo_controle_emp[:25].rstrip()
-
-        data_vencimento = linha[120:126] if len(linha) >= 126 else linha[120:].ljust(6)
-        data_vencimento = formatar_data(data_vencimento[:6])
-
-        valor_titulo = linha[126:139] if len(linha) >= 139 else linha[126:].ljust(13)
-        valor_titulo = valor_titulo[:13].rstrip()
-
-        data_emissao = linha[150:156] if len(linha) >= 156 else linha[150:].ljust(6)
-        data_emissao = formatar_data(data_emissao[:6])
-
-        cpf_cnpj_pagador = linha[220:234] if len(linha) >= 234 else linha[220:].ljust(14)
-        cpf_cnpj_pagador = cpf_cnpj_pagador[:14]
+    def _formatar_detalhe(campos):
+        (cpf_cnpj_beneficiario, codigo_controle_emp, nosso_numero, meu_numero, data_vencimento,
+         valor_titulo, data_emissao, cpf_cnpj_pagador, nome_pagador) = campos
 
-        nome_pagador = linha[234:271] if len(linha) >= 271 else linha[234:]
-        nome_pagador = nome_pagador[:37].rstrip() if len(nome_pagador) > 37 else nome_pagador.rstrip()
+        codigo_controle_emp = codigo_controle_emp.rstrip()
+        data_vencimento = formatar_data(data_vencimento)
+        valor_titulo = valor_titulo.rstrip()
+        data_emissao = formatar_data(data_emissao)
+        nome_pagador = nome_pagador.rstrip()
 
         substring = (cpf_cnpj_beneficiario + " " * 16 +
                     nosso_numero + " " * 1 +
@@ -133,11 +210,11 @@ class RemProcessor:
                     cpf_cnpj_pagador + " " * 5 +
                     nome_pagador)
 
-        gravar_substring(saida, substring)
+        return substring
     
     @staticmethod
-    def _gravar_rodape(saida, nlinhas):
+    def _gravar_rodape(escritor, nlinhas):
         cabecalho = "-" * 195
-        gravar_substring(saida, cabecalho)
+        escritor.gravar(cabecalho)
         substring = f"Total de Lancamentos: {nlinhas}"
-        gravar_substring(saida, substring)
+        escritor.gravar(substring)
@@ -1,16 +1,44 @@
+from src.extratores.ret_extractor import RetExtractor
+from src.extratores.registros import origem_de
+from src.layouts.cnab400 import RET_HEADER, RET_DETALHE, RET_TRAILER
 from src.utils.formatadores import formatar_data, formatar_valor
-from src.utils.ocorrencias import obter_descricao_ocorrencia
 from src.utils.comandos import obter_descricao_comando
-from src.utils.arquivo import gravar_substring
+from src.utils.tabelas import TABELAS_PADRAO, tabelas_do_arquivo
+from src.utils.arquivo import EscritorRelatorio
+from src.utils.leitura import LeitorMapeado, dividir_em_faixas
+from src.utils.metricas import SECAO_INATIVA, abrir_secao
+from src.utils.paralelo import mapear_faixas
+from src.validacao import ValidacaoArquivo
+
+CABECALHO_HEADER = "TIPO OPERACAO TIPO SERV. CODIGO SERV. AG.      CONTA      EMPRESA                         BANCO            NOME DO BANCO          DT. GRAVACAO SEQ."
+CABECALHO_DETALHE = "NOSSO NUMERO          CONTROLE PARTICIPANTE              CARTEIRA MEU NUMERO       COMANDO DESCRICAO COMANDO                            DATA LIQUIDACAO DATA VENCIMENTO VALOR TITULO AG RECEBEDORA DATA CREDITO DESCONTO CONCEDIDO VALOR RECEBIDO"
 
 
 class RetProcessor:
     
     @staticmethod
-    def processar(arquivo_entrada, arquivo_saida):
+    def processar(arquivo_entrada, arquivo_saida, registros=None, resumo=None, processos=1, metricas=None):
+        """
+        Gera o relatório de largura fixa de um arquivo RET.
+
+        Se `registros` for uma lista, ela recebe os mesmos dados estruturados
+        de `RetExtractor.extrair`, montados a partir do mesmo parse, para que
+        o arquivo não precise ser lido de novo pela análise. Se `resumo` for
+        um dicionário, recebe a contagem de lançamentos em 'nlinhas' e as
+        divergências da validação (`ValidacaoArquivo`) em 'divergencias'.
+
+        Com `processos` > 1, arquivos grandes são divididos em faixas
+        alinhadas a quebras de linha e formatados em paralelo; o relatório e os
+        registros são idênticos aos do processamento serial.
+
+        Com `metricas` (`Metricas`), o arquivo vira uma seção com o tempo de
+        leitura, parse, formatação e gravação, registros/s e bytes lidos e
+        gravados. No processamento em paralelo a leitura, o parse e a
+        formatação acontecem nos outros processos e aparecem juntos como
+        formatação.
+        """
         try:
-            with open(arquivo_entrada, "r", encoding="latin-1") as handle:
-                linhas = handle.readlines()
+            leitor = LeitorMapeado(arquivo_entrada)
         except FileNotFoundError:
             print(f"Erro: Arquivo '{arquivo_entrada}' não encontrado.")
             return False
@@ -19,34 +47,29 @@ class RetProcessor:
             return False
 
         try:
-            with open(arquivo_saida, "w", encoding="utf-8") as saida:
-                unico_header = True
-                unico_detalhe = True
-                nlinhas = 0
-
-                for linha in linhas:
-                    linha = linha.rstrip('\r\n')
-                    if len(linha) == 0:
-                        continue
-
-                    flag = linha[0] if len(linha) > 0 else ""
-
-                    if flag == "0":
-                        RetProcessor._processar_header(saida, linha, unico_header)
-                        if unico_header:
-                            unico_header = False
-                    elif flag == "7":
-                        RetProcessor._processar_detalhe(saida, linha, unico_detalhe)
-                        if unico_detalhe:
-                            unico_detalhe = False
-                        nlinhas = nlinhas + 1
-                    elif flag == "9":
-                        RetProcessor._processar_trailer(saida, linha)
-
-                RetProcessor._gravar_rodape(saida, nlinhas)
-
+            secao = abrir_secao(metricas, origem_de(arquivo_entrada), "RET", arquivo_entrada)
+            validacao = ValidacaoArquivo("RET")
+            with leitor, open(arquivo_saida, "w", encoding="utf-8") as saida, secao:
+                tabelas = tabelas_do_arquivo(arquivo_entrada)
+                faixas = dividir_em_faixas(arquivo_entrada, processos) if processos > 1 else []
+                if len(faixas) > 1:
+                    itens = RetProcessor._formatar_em_paralelo(arquivo_entrada, faixas, registros, tabelas,
+                                                               validacao)
+                else:
+                    itens = RetProcessor._formatar_registros(secao.cronometrar(leitor, "leitura", ler=True),
+                                                             origem_de(arquivo_entrada), registros, tabelas, secao,
+                                                             validacao)
+                with secao.etapa("gravacao"):
+                    nlinhas = RetProcessor._gravar_relatorio(saida, secao.cronometrar(itens, "formatacao"))
+                secao.contar(registros=nlinhas, bytes_gravados=saida.tell())
+
+            if resumo is not None:
+                resumo['nlinhas'] = nlinhas
             print("Processamento realizado com sucesso!")
             print(f"Total de lançamentos processados: {nlinhas}")
+            divergencias = validacao.finalizar().exibir(origem_de(arquivo_entrada))
+            if resumo is not None:
+                resumo['divergencias'] = divergencias
             return True
 
         except Exception as e:
@@ -56,36 +79,104 @@ class RetProcessor:
             return False
     
     @staticmethod
-    def _processar_header(saida, linha, unico_header):
-        tipo_operacao = linha[1:3] if len(linha) >= 3 else ""
-        tipo_servico = linha[3:5] if len(linha) >= 5 else ""
-        codigo_servico = linha[5:11] if len(linha) >= 11 else ""
+    def gerar_relatorio(registros_lidos, saida, arquivo_origem="", tabelas=TABELAS_PADRAO):
+        """
+        Grava em `saida` (arquivo texto ou `io.StringIO`) o relatório dos
+        registros lidos em bytes, sem abrir arquivos; devolve o total de
+        lançamentos.
+        """
+        itens = RetProcessor._formatar_registros(registros_lidos, arquivo_origem, None, tabelas)
+        return RetProcessor._gravar_relatorio(saida, itens)
+    
+    @staticmethod
+    def _formatar_registros(registros_lidos, arquivo_origem, registros, tabelas=TABELAS_PADRAO, secao=SECAO_INATIVA,
+                            validacao=None):
+        """
+        Gera (flag, linha do relatório) para cada registro lido (em bytes). Com
+        `validacao`, cada registro é conferido no mesmo laço.
+        """
+        ler_header = secao.cronometrar_funcao(RET_HEADER.ler_bytes, "parse")
+        ler_detalhe = secao.cronometrar_funcao(RET_DETALHE.ler_bytes, "parse")
+        ler_trailer = secao.cronometrar_funcao(RET_TRAILER.ler_bytes, "parse")
+
+        for registro in registros_lidos:
+            flag = registro[:1]
+            if validacao is not None:
+                validacao.registro(registro)
+
+            if flag == b"0":
+                campos = ler_header(registro)
+                if registros is not None:
+                    registros.append(RetExtractor.montar_header(campos, arquivo_origem))
+                yield "0", RetProcessor._formatar_header(campos)
+            elif flag == b"7":
+                campos = ler_detalhe(registro)
+                if registros is not None:
+                    registros.append(RetExtractor.montar_detalhe(campos, arquivo_origem, tabelas=tabelas))
+                yield "7", RetProcessor._formatar_detalhe(campos, tabelas)
+            elif flag == b"9":
+                yield "9", RetProcessor._formatar_trailer(ler_trailer(registro))
+    
+    @staticmethod
+    def _formatar_faixa(arquivo_entrada, faixa, coletar_registros, tabelas=TABELAS_PADRAO):
+        registros = [] if coletar_registros else None
+        validacao = ValidacaoArquivo("RET")
+        with LeitorMapeado(arquivo_entrada, faixa) as leitor:
+            itens = list(RetProcessor._formatar_registros(leitor, origem_de(arquivo_entrada), registros, tabelas,
+                                                          validacao=validacao))
+        return itens, registros, validacao.finalizar()
+    
+    @staticmethod
+    def _formatar_em_paralelo(arquivo_entrada, faixas, registros, tabelas, validacao):
+        """Formata as faixas do arquivo em processos separados, na ordem original."""
+        for itens, registros_faixa, validacao_faixa in mapear_faixas(RetProcessor._formatar_faixa, arquivo_entrada,
+                                                                     faixas, registros is not None, tabelas):
+            if registros is not None:
+                registros.extend(registros_faixa)
+            validacao.somar(validacao_faixa)
+            yield from itens
+    
+    @staticmethod
+    def _gravar_relatorio(saida, itens):
+        """Grava as linhas formatadas com cabeçalhos e rodapé; devolve o total de lançamentos."""
+        escritor = EscritorRelatorio(saida)
+        gravar = escritor.gravar
+        unico_header = True
+        unico_detalhe = True
+        nlinhas = 0
+
+        for flag, substring in itens:
+            if flag == "7":
+                if unico_detalhe:
+                    gravar(CABECALHO_DETALHE)
+                    gravar("-" * 275)
+                    unico_detalhe = False
+                gravar(substring)
+                nlinhas = nlinhas + 1
+            elif flag == "0":
+                if unico_header:
+                    gravar(CABECALHO_HEADER)
+                    gravar("-" * 120)
+                    unico_header = False
+                gravar(substring)
+            else:
+                gravar("-" * 275)
+                gravar(substring)
+
+        RetProcessor._gravar_rodape(escritor, nlinhas)
+        escritor.descarregar()
+        return nlinhas
+    
+    @staticmethod
+    def _formatar_header(campos):
+        (tipo_operacao, tipo_servico, codigo_servico, agencia, agencia_dv, conta, conta_dv,
+         nome_empresa, codigo_banco, nome_banco, data_gravacao, _convenio, sequencial) = campos
 
-        agencia = linha[26:30] if len(linha) >= 30 else ""
-        agencia_dv = linha[30:31] if len(linha) >= 31 else ""
         agencia_formatada = f"{agencia}-{agencia_dv}" if agencia_dv else agencia
-
-        conta = linha[31:39] if len(linha) >= 39 else ""
-        conta_dv = linha[39:40] if len(linha) >= 40 else ""
         conta_formatada = f"{conta}-{conta_dv}" if conta_dv else conta
-
-        nome_empresa = linha[46:76] if len(linha) >= 76 else ""
-        nome_empresa = nome_empresa[:30].rstrip()
-
-        codigo_banco = linha[76:79] if len(linha) >= 79 else ""
-        nome_banco = linha[79:94] if len(linha) >= 94 else ""
-        nome_banco = nome_banco[:18].rstrip()
-
-        data_gravacao = linha[94:100] if len(linha) >= 100 else ""
-        data_gravacao = formatar_data(data_gravacao[:6]) if len(data_gravacao) >= 6 else data_gravacao
-
-        sequencial = linha[394:400] if len(linha) >= 400 else ""
-
-        if unico_header:
-            cabecalho = "TIPO OPERACAO TIPO SERV. CODIGO SERV. AG.      CONTA      EMPRESA                         BANCO            NOME DO BANCO          DT. GRAVACAO SEQ."
-            gravar_substring(saida, cabecalho)
-            cabecalho = "-" * 120
-            gravar_substring(saida, cabecalho)
+        nome_empresa = nome_empresa.rstrip()
+        nome_banco = nome_banco.rstrip()
+        data_gravacao = formatar_data(data_gravacao)
 
         substring = (tipo_operacao.ljust(13) +
                     tipo_servico.ljust(11) +
@@ -98,52 +189,27 @@ class RetProcessor:
                     data_gravacao.ljust(13) +
                     sequencial)
 
-        gravar_substring(saida, substring)
+        return substring
     
     @staticmethod
-    def _processar_detalhe(saida, linha, unico_detalhe):
-        if unico_detalhe:
-            cabecalho = "NOSSO NUMERO          CONTROLE PARTICIPANTE              CARTEIRA MEU NUMERO       COMANDO DESCRICAO COMANDO                            DATA LIQUIDACAO DATA VENCIMENTO VALOR TITULO AG RECEBEDORA DATA CREDITO DESCONTO CONCEDIDO VALOR RECEBIDO"
-            gravar_substring(saida, cabecalho)
-            cabecalho = "-" * 275
-            gravar_substring(saida, cabecalho)
-
-        nosso_numero = linha[63:80] if len(linha) >= 80 else ""
-        nosso_numero = nosso_numero[:17].strip()
-
-        controle_participante = linha[38:63] if len(linha) >= 63 else ""
-        controle_participante = controle_participante[:25].strip()
+    def _formatar_detalhe(campos, tabelas=TABELAS_PADRAO):
+        (controle_participante, nosso_numero, carteira, comando, data_liquidacao, meu_numero,
+         data_vencimento, valor_titulo, agencia_recebedora, data_credito, desconto,
+         valor_recebido) = campos
 
-        carteira = linha[106:108] if len(linha) >= 108 else ""
+        nosso_numero = nosso_numero.strip()
+        controle_participante = controle_participante.strip()
         carteira = carteira.strip()
-
-        comando = linha[108:110] if len(linha) >= 110 else ""
         comando = comando.strip()
-        descricao_comando = obter_descricao_comando(comando)
-
-        data_liquidacao = linha[110:116] if len(linha) >= 116 else ""
-        data_liquidacao = formatar_data(data_liquidacao[:6]) if len(data_liquidacao) >= 6 and data_liquidacao.strip() and data_liquidacao.strip() != "000000" else "00/00/00"
-
-        meu_numero = linha[116:126] if len(linha) >= 126 else ""
-        meu_numero = meu_numero[:10].strip()
-
-        data_vencimento = linha[146:152] if len(linha) >= 152 else ""
-        data_vencimento = formatar_data(data_vencimento[:6]) if len(data_vencimento) >= 6 and data_vencimento.strip() and data_vencimento.strip() != "000000" else "00/00/00"
-
-        valor_titulo = linha[152:165] if len(linha) >= 165 else ""
-        valor_titulo = formatar_valor(valor_titulo[:13])
-
-        agencia_recebedora = linha[168:172] if len(linha) >= 172 else ""
-        agencia_recebedora = agencia_recebedora[:4].strip()
-
-        data_credito = linha[175:181] if len(linha) >= 181 else ""
-        data_credito = formatar_data(data_credito[:6]) if len(data_credito) >= 6 and data_credito.strip() and data_credito.strip() != "000000" else "00/00/00"
-
-        desconto = linha[240:253] if len(linha) >= 253 else ""
-        desconto = formatar_valor(desconto[:13])
-
-        valor_recebido = linha[253:266] if len(linha) >= 266 else ""
-        valor_recebido = formatar_valor(valor_recebido[:13])
+        descricao_comando = obter_descricao_comando(comando, tabelas.comandos)
+        data_liquidacao = RetProcessor._formatar_data_opcional(data_liquidacao)
+        meu_numero = meu_numero.strip()
+        data_vencimento = RetProcessor._formatar_data_opcional(data_vencimento)
+        valor_titulo = formatar_valor(valor_titulo)
+        agencia_recebedora = agencia_recebedora.strip()
+        data_credito = RetProcessor._formatar_data_opcional(data_credito)
+        desconto = formatar_valor(desconto)
+        valor_recebido = formatar_valor(valor_recebido)
 
         substring = (nosso_numero.ljust(21) +
                     controle_participante.ljust(32) +
@@ -159,22 +225,25 @@ class RetProcessor:
                     desconto.ljust(16) +
                     valor_recebido)
 
-        gravar_substring(saida, substring)
+        return substring
     
     @staticmethod
-    def _processar_trailer(saida, linha):
-        total_registros = linha[17:23] if len(linha) >= 23 else ""
-        valor_total = linha[23:35] if len(linha) >= 35 else ""
-        valor_total = formatar_valor(valor_total[:12])
+    def _formatar_trailer(campos):
+        total_registros, valor_total = campos
+        valor_total = formatar_valor(valor_total)
 
-        cabecalho = "-" * 275
-        gravar_substring(saida, cabecalho)
-        gravar_substring(saida, f"Total de Registros: {total_registros.strip()}")
-        gravar_substring(saida, f"Valor Total: {valor_total}")
+        return f"Total de Registros: {total_registros.strip()}\nValor Total: {valor_total}"
+    
+    @staticmethod
+    def _formatar_data_opcional(data):
+        data_limpa = data.strip()
+        if data_limpa and data_limpa != "000000":
+            return formatar_data(data)
+        return "00/00/00"
     
     @staticmethod
-    def _gravar_rodape(saida, nlinhas):
+    def _gravar_rodape(escritor, nlinhas):
         cabecalho = "-" * 275
-        gravar_substring(saida, cabecalho)
+        escritor.gravar(cabecalho)
         substring = f"Total de Lancamentos Processados: {nlinhas}"
-        gravar_substring(saida, substring)
+        escritor.gravar(substring)
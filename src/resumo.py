@@ -0,0 +1,144 @@
+"""
+Inventário rápido de um diretório de arquivos REM e RET.
+
+Para cada arquivo só o header (primeiro registro) e o trailer (último) são
+lidos: o início do arquivo e, com um seek, os seus últimos bytes, sem
+percorrer os detalhes. O custo por arquivo é constante, qualquer que seja o
+tamanho. Arquivos compactados não permitem seek e são lidos em fluxo até o
+fim (ver `compactacao`).
+"""
+
+import csv
+import os
+
+from src.layouts.cnab400 import REM_HEADER, REM_TRAILER, RET_HEADER, RET_TRAILER, TAMANHO_REGISTRO
+from src.utils.compactacao import compactado, listar_entradas, tipo_entrada
+from src.utils.formatadores import formatar_data, formatar_valor
+from src.utils.leitura import LeitorMapeado
+
+# Dois registros com terminador '\r\n': no fim do arquivo, ao menos um inteiro.
+TAMANHO_LEITURA = 2 * (TAMANHO_REGISTRO + 2)
+# Registros além dos detalhes contados no sequencial do trailer do REM: header e trailer.
+REGISTROS_CONTROLE_REM = 2
+
+CABECALHO_RESUMO = ['ARQUIVO', 'TIPO', 'BANCO', 'AG./CONTA', 'CONVENIO', 'DT. GRAVACAO', 'DETALHES', 'VALOR TOTAL']
+_LARGURAS = [30, 4, 22, 17, 8, 12, 9, 18]
+
+
+def _extremos(arquivo):
+    """
+    Primeiro registro e últimos registros (bytes, sem terminador) do arquivo,
+    onde está o trailer. Primeiro registro None se o arquivo estiver vazio.
+    """
+    if compactado(arquivo):
+        primeiro = trailer = None
+        with LeitorMapeado(arquivo) as leitor:
+            for registro in leitor:
+                if primeiro is None:
+                    primeiro = registro
+                if registro[:1] == b"9":
+                    trailer = registro
+        return primeiro, [trailer] if trailer is not None else []
+
+    with open(arquivo, "rb") as handle:
+        inicio = handle.read(TAMANHO_LEITURA)
+        tamanho = handle.seek(0, os.SEEK_END)
+        posicao = max(0, tamanho - TAMANHO_LEITURA)
+        if tamanho <= len(inicio):
+            fim = inicio
+        else:
+            handle.seek(posicao)
+            fim = handle.read()
+
+    primeiro = next((registro for registro in inicio.splitlines() if registro), None)
+    finais = fim.splitlines()
+    if posicao > 0 and finais:
+        # O bloco lido do fim pode começar no meio de um registro.
+        finais = finais[1:]
+    return primeiro, [registro for registro in finais if registro]
+
+
+class ResumoDiretorio:
+    """Resumo por arquivo (banco, convênio, gravação, detalhes e valor) lido do header e do trailer."""
+
+    @staticmethod
+    def gerar(path_input):
+        """Lista com o resumo de cada arquivo REM e RET do diretório (inclusive compactados)."""
+        arquivos = listar_entradas(path_input, "REM") + listar_entradas(path_input, "RET")
+        return [resumo for resumo in map(ResumoDiretorio.resumir_arquivo, arquivos) if resumo is not None]
+
+    @staticmethod
+    def resumir_arquivo(arquivo):
+        """
+        Resumo de um arquivo a partir do header e do trailer.
+
+        Returns:
+            Dicionário com as colunas de `CABECALHO_RESUMO` (campos ausentes
+            ficam vazios), ou None se o arquivo não puder ser lido
+        """
+        tipo = tipo_entrada(arquivo)
+        try:
+            primeiro, finais = _extremos(arquivo)
+        except Exception as e:
+            print(f"Erro ao ler o arquivo {arquivo.name}: {e}")
+            return None
+
+        resumo = dict.fromkeys(CABECALHO_RESUMO, "")
+        resumo['ARQUIVO'] = arquivo.name
+        resumo['TIPO'] = tipo
+
+        if primeiro is not None and primeiro[:1] == b"0":
+            if tipo == "RET":
+                campos = dict(zip(RET_HEADER.nomes, RET_HEADER.ler_bytes(primeiro)))
+                banco = f"{campos['codigo_banco'].strip()} {campos['nome_banco'].strip()}"
+            else:
+                campos = dict(zip(REM_HEADER.nomes, REM_HEADER.ler_bytes(primeiro)))
+                banco = campos['banco'].strip()
+            resumo['BANCO'] = banco.strip()
+            resumo['CONVENIO'] = campos['convenio'].strip()
+            resumo['AG./CONTA'] = (f"{campos['agencia'].strip()}-{campos['agencia_dv'].strip()}/"
+                                   f"{campos['conta'].strip()}-{campos['conta_dv'].strip()}")
+            resumo['DT. GRAVACAO'] = formatar_data(campos['data_gravacao'])
+
+        # O trailer é o último registro; linhas curtas depois dele são ignoradas.
+        trailer = next((registro for registro in reversed(finais) if registro[:1] == b"9"), None)
+        if trailer is not None:
+            if tipo == "RET":
+                total_registros, valor_total = (campo.strip() for campo in RET_TRAILER.ler_bytes(trailer))
+                # Totais em branco ou não numéricos (trailer curto) ficam ausentes, não zerados.
+                if total_registros.isdigit():
+                    resumo['DETALHES'] = str(int(total_registros))
+                if valor_total.isdigit():
+                    resumo['VALOR TOTAL'] = formatar_valor(valor_total)
+            else:
+                sequencial = REM_TRAILER.ler_bytes(trailer)[0].strip()
+                if sequencial.isdigit():
+                    resumo['DETALHES'] = str(max(int(sequencial) - REGISTROS_CONTROLE_REM, 0))
+        return resumo
+
+    @staticmethod
+    def exibir(resumos):
+        """Exibe os resumos em uma tabela de largura fixa."""
+        print(" ".join(coluna.ljust(largura) for coluna, largura in zip(CABECALHO_RESUMO, _LARGURAS)).rstrip())
+        print("-" * (sum(_LARGURAS) + len(_LARGURAS) - 1))
+        for resumo in resumos:
+            valores = [str(resumo[coluna])[:largura] for coluna, largura in zip(CABECALHO_RESUMO, _LARGURAS)]
+            # Quantidades e valores alinhados à direita.
+            linha = [valor.rjust(largura) if coluna in ('DETALHES', 'VALOR TOTAL') else valor.ljust(largura)
+                     for coluna, valor, largura in zip(CABECALHO_RESUMO, valores, _LARGURAS)]
+            print(" ".join(linha).rstrip())
+        print(f"Total de arquivos: {len(resumos)}")
+
+    @staticmethod
+    def gravar_csv(resumos, arquivo_saida):
+        """Grava os resumos em CSV (separador ';', como a análise)."""
+        try:
+            with open(arquivo_saida, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.DictWriter(f, fieldnames=CABECALHO_RESUMO, delimiter=';')
+                writer.writeheader()
+                writer.writerows(resumos)
+            print(f"Resumo gravado em: {arquivo_saida}")
+            return True
+        except Exception as e:
+            print(f"Erro ao gravar o resumo: {e}")
+            return False
@@ -0,0 +1,177 @@
+"""
+Servidor HTTP local que mantém os processadores e extratores carregados.
+
+Endpoints (somente em 127.0.0.1 por padrão):
+
+    GET  /saude                 -> "ok"
+    POST /relatorio?caminho=... -> relatório de largura fixa (text/plain)
+    POST /registros?caminho=... -> registros extraídos (JSON)
+
+Em vez de `caminho`, o conteúdo do arquivo pode ir no corpo da requisição;
+o tipo vem de `tipo=REM|RET` ou da extensão de `caminho`/`nome`. Em
+/registros, `tipado=1` devolve valores em centavos e datas ISO.
+O processamento roda em um pool de processos já iniciados, de modo que
+requisições simultâneas são atendidas em paralelo.
+"""
+
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from src.extratores.registros import origem_de
+from src.extratores.rem_extractor import RemExtractor
+from src.extratores.ret_extractor import RetExtractor
+from src.processadores.rem_processor import RemProcessor
+from src.processadores.ret_processor import RetProcessor
+from src.utils.formatadores import serializar_json
+from src.utils.leitura import LeitorMapeado, registros_de_bytes
+from src.utils.tabelas import tabelas_do_arquivo, tabelas_do_header
+
+PORTA_PADRAO = 8765
+TAMANHO_MAXIMO_CORPO = 256 * 1024 * 1024
+
+
+def _tipo_do_nome(nome):
+    extensao = os.path.splitext(nome or "")[1].upper()
+    return extensao[1:] if extensao in (".REM", ".RET") else ""
+
+
+def gerar_relatorio(tipo, caminho=None, conteudo=None, nome=""):
+    """Relatório de largura fixa de um arquivo (pelo caminho) ou do seu conteúdo em bytes."""
+    saida = io.StringIO()
+    if conteudo is None:
+        with LeitorMapeado(caminho) as leitor:
+            if tipo == "RET":
+                RetProcessor.gerar_relatorio(leitor, saida, origem_de(caminho), tabelas_do_arquivo(caminho))
+            else:
+                RemProcessor.gerar_relatorio(leitor, saida, origem_de(caminho))
+    elif tipo == "RET":
+        RetProcessor.gerar_relatorio(registros_de_bytes(conteudo), saida, nome, tabelas_do_header(conteudo))
+    else:
+        RemProcessor.gerar_relatorio(registros_de_bytes(conteudo), saida, nome)
+    return saida.getvalue()
+
+
+def extrair_registros(tipo, caminho=None, conteudo=None, nome="", tipado=False):
+    """Registros de um arquivo (pelo caminho) ou do seu conteúdo em bytes, em JSON."""
+    extrator = RetExtractor if tipo == "RET" else RemExtractor
+    if conteudo is None:
+        registros = extrator.iterar(caminho, tipado=tipado)
+    elif tipo == "RET":
+        registros = RetExtractor.montar_registros(registros_de_bytes(conteudo), nome, tipado,
+                                                  tabelas=tabelas_do_header(conteudo))
+    else:
+        registros = RemExtractor.montar_registros(registros_de_bytes(conteudo), nome, tipado)
+    return json.dumps([dict(registro.items()) for registro in registros], ensure_ascii=False,
+                      default=serializar_json)
+
+
+def _aquecer():
+    return os.getpid()
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    server_version = "LeitorRemRet/1.0"
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/saude":
+            self._responder(200, "ok\n", "text/plain")
+        else:
+            self._erro(404, "Endpoint não encontrado")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path not in ("/relatorio", "/registros"):
+            self._erro(404, "Endpoint não encontrado")
+            return
+
+        parametros = {chave: valores[-1] for chave, valores in parse_qs(url.query).items()}
+        caminho = parametros.get("caminho")
+        nome = parametros.get("nome") or (os.path.basename(caminho) if caminho else "")
+
+        try:
+            tamanho = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            self._erro(400, "Content-Length inválido")
+            return
+        if tamanho > TAMANHO_MAXIMO_CORPO:
+            self._erro(413, "Conteúdo maior que o permitido")
+            return
+        conteudo = self.rfile.read(tamanho) if tamanho else None
+
+        if conteudo is None and not caminho:
+            self._erro(400, "Informe 'caminho' ou envie o conteúdo do arquivo no corpo")
+            return
+        tipo = (parametros.get("tipo") or _tipo_do_nome(caminho or nome)).upper()
+        if tipo not in ("REM", "RET"):
+            self._erro(400, "Informe tipo=REM ou tipo=RET")
+            return
+
+        executor = self.server.executor
+        if url.path == "/relatorio":
+            futuro = executor.submit(gerar_relatorio, tipo, caminho, conteudo, nome)
+            tipo_conteudo = "text/plain"
+        else:
+            tipado = parametros.get("tipado", "") in ("1", "true", "sim")
+            futuro = executor.submit(extrair_registros, tipo, caminho, conteudo, nome, tipado)
+            tipo_conteudo = "application/json"
+
+        try:
+            corpo = futuro.result()
+        except FileNotFoundError:
+            self._erro(404, f"Arquivo '{caminho}' não encontrado")
+            return
+        except Exception as e:
+            self._erro(500, f"Erro ao processar o arquivo: {e}")
+            return
+        self._responder(200, corpo, tipo_conteudo)
+
+    def _erro(self, status, mensagem):
+        self._responder(status, json.dumps({"erro": mensagem}, ensure_ascii=False), "application/json")
+
+    def _responder(self, status, corpo, tipo_conteudo):
+        dados = corpo.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{tipo_conteudo}; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+
+class ServidorLeitor:
+    """
+    Servidor HTTP com um pool de `trabalhadores` processos. Cada conexão é
+    atendida em uma thread, que entrega o processamento ao pool.
+    """
+
+    def __init__(self, porta=PORTA_PADRAO, trabalhadores=1, host="127.0.0.1"):
+        self.executor = ProcessPoolExecutor(max_workers=max(1, trabalhadores))
+        # Inicia os processos antes da primeira requisição.
+        for futuro in [self.executor.submit(_aquecer) for _ in range(max(1, trabalhadores))]:
+            futuro.result()
+
+        self.http = ThreadingHTTPServer((host, porta), _Manipulador)
+        self.http.daemon_threads = True
+        self.http.executor = self.executor
+
+    @property
+    def endereco(self):
+        return self.http.server_address
+
+    def executar(self):
+        """Atende requisições até ser interrompido (Ctrl+C)."""
+        host, porta = self.endereco[:2]
+        print(f"Servidor em http://{host}:{porta} (Ctrl+C para encerrar)")
+        try:
+            self.http.serve_forever()
+        except KeyboardInterrupt:
+            print("\nServidor encerrado.")
+        finally:
+            self.fechar()
+
+    def fechar(self):
+        self.http.server_close()
+        self.executor.shutdown()
@@ -1,5 +1,10 @@
-from .formatadores import formatar_data, formatar_valor, normalizar_chave
+from .formatadores import formatar_data, formatar_valor, formatar_valores, normalizar_chave
 from .ocorrencias import obter_descricao_ocorrencia
-from .arquivo import gravar_substring
+from .arquivo import gravar_substring, EscritorRelatorio
+from .leitura import LeitorMapeado
+from .acesso_direto import ArquivoRegistros, RegistroMapeado
+from .metricas import Metricas
 
-__all__ = ['formatar_data', 'formatar_valor', 'normalizar_chave', 'obter_descricao_ocorrencia', 'gravar_substring']
+__all__ = ['formatar_data', 'formatar_valor', 'formatar_valores', 'normalizar_chave', 'obter_descricao_ocorrencia',
+           'gravar_substring', 'EscritorRelatorio', 'LeitorMapeado', 'ArquivoRegistros', 'RegistroMapeado',
+           'Metricas']
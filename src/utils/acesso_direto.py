@@ -0,0 +1,224 @@
+"""
+Acesso direto, por posição, aos registros de um arquivo REM ou RET.
+
+O arquivo é mapeado em memória e a posição de cada registro é calculada a
+partir do tamanho fixo do registro e do terminador de linha ('\\r\\n', '\\n'
+ou '\\r'), detectados no primeiro registro: ler o registro N ou os registros
+N..M não exige percorrer o arquivo. Arquivos que não seguem a largura fixa
+(linhas vazias no meio, registros de tamanhos diferentes) são indexados
+numa única passada, na primeira vez em que isso é percebido.
+
+Os índices seguem os registros entregues por `LeitorMapeado`: linhas vazias
+não contam.
+"""
+
+import mmap
+import os
+from array import array
+from operator import index
+from pathlib import Path
+
+from src.layouts.cnab400 import LAYOUTS_REM, LAYOUTS_RET
+from src.utils.compactacao import compactado, tipo_entrada
+
+LAYOUTS_POR_TIPO = {"REM": LAYOUTS_REM, "RET": LAYOUTS_RET}
+# Bytes do início do arquivo em que o primeiro terminador é procurado.
+TAMANHO_AMOSTRA = 65536
+# Registros conferidos, espalhados pelo arquivo, antes de aceitar a largura fixa.
+QUANTIDADE_CONFERENCIAS = 16
+
+
+class RegistroMapeado:
+    """
+    Registro lido de um `ArquivoRegistros`, decodificado sob demanda.
+
+    Guarda só os bytes do registro e o layout do seu tipo (escolhido pelo
+    primeiro caractere); cada campo é decodificado quando consultado
+    (`registro['nosso_numero']`), com o valor bruto, sem strip, como
+    `Layout.ler`.
+    """
+
+    __slots__ = ('bruto', 'layout')
+
+    def __init__(self, bruto, layout):
+        self.bruto = bruto
+        self.layout = layout
+
+    @property
+    def flag(self):
+        return self.bruto[:1].decode("latin-1")
+
+    def __getitem__(self, nome):
+        if self.layout is None:
+            raise KeyError(nome)
+        return self.layout.ler_campo_bytes(self.bruto, nome)
+
+    def get(self, nome, padrao=None):
+        try:
+            return self[nome]
+        except KeyError:
+            return padrao
+
+    def campos(self):
+        """Todos os campos do layout, decodificados de uma vez; vazio se o tipo do registro não for conhecido."""
+        if self.layout is None:
+            return {}
+        return dict(zip(self.layout.nomes, self.layout.ler_bytes(self.bruto)))
+
+    def __bytes__(self):
+        return self.bruto
+
+    def __repr__(self):
+        nome = self.layout.nome if self.layout is not None else None
+        return f"RegistroMapeado({nome!r}, {self.bruto[:40]!r}...)"
+
+
+class ArquivoRegistros:
+    """
+    Sequência dos registros de um arquivo CNAB, com acesso direto.
+
+    Aceita `len()`, índices (inclusive negativos), fatias e iteração:
+    `arquivo[i]` é um `RegistroMapeado` e `arquivo[i:j]` uma lista deles. O
+    tipo ('REM'/'RET') vem da extensão do arquivo, se não for informado, e
+    define os layouts usados para decodificar os campos. Arquivos
+    compactados não podem ser mapeados e não são aceitos.
+    """
+
+    def __init__(self, arquivo_entrada, tipo=None):
+        if compactado(arquivo_entrada):
+            raise ValueError("Arquivos compactados não permitem acesso direto aos registros.")
+        self.arquivo = Path(arquivo_entrada)
+        self.tipo = (tipo or tipo_entrada(arquivo_entrada)).upper()
+        self.layouts = LAYOUTS_POR_TIPO.get(self.tipo, {})
+        self._mapa = None
+        self._inicios = self._finais = None
+        self._handle = open(arquivo_entrada, "rb")
+        try:
+            if os.fstat(self._handle.fileno()).st_size:
+                self._mapa = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+            self._preparar()
+        except Exception:
+            self.fechar()
+            raise
+
+    def _preparar(self):
+        mapa = self._mapa
+        self.terminador = b""
+        self.comprimento = 0
+        self._quantidade = 0
+        if mapa is None:
+            return
+
+        # Terminadores no fim do arquivo não abrem um novo registro.
+        self._fim = len(mapa)
+        while self._fim and mapa[self._fim - 1] in (10, 13):
+            self._fim -= 1
+
+        amostra = min(self._fim, TAMANHO_AMOSTRA)
+        quebra = mapa.find(b"\n", 0, amostra)
+        if quebra >= 0:
+            self.terminador = b"\r\n" if quebra and mapa[quebra - 1] == 13 else b"\n"
+        else:
+            quebra = mapa.find(b"\r", 0, amostra)
+            self.terminador = b"\r" if quebra >= 0 else b""
+        self.comprimento = quebra - len(self.terminador) + 1 if self.terminador else self._fim
+        self._passo = self.comprimento + len(self.terminador)
+
+        quantidade, resto = divmod(self._fim + len(self.terminador), self._passo) if self._passo else (0, 1)
+        if self.comprimento and not resto:
+            self._quantidade = quantidade
+            passo = max(1, quantidade // QUANTIDADE_CONFERENCIAS)
+            if all(self._alinhado(i) for i in [*range(0, quantidade, passo), quantidade - 1]):
+                return
+        self._indexar()
+
+    def _alinhado(self, indice):
+        """Confere se o registro `indice`, pela largura fixa, é uma linha inteira e sem quebras."""
+        inicio = indice * self._passo
+        fim = inicio + self.comprimento
+        mapa = self._mapa
+        if mapa.find(b"\n", inicio, fim) >= 0 or mapa.find(b"\r", inicio, fim) >= 0:
+            return False
+        if inicio and mapa[inicio - len(self.terminador):inicio] != self.terminador:
+            return False
+        return fim == self._fim or mapa[fim:fim + len(self.terminador)] == self.terminador
+
+    def _indexar(self):
+        """Posições de todos os registros numa passada, para arquivos fora da largura fixa."""
+        mapa = self._mapa
+        separador = b"\r" if self.terminador == b"\r" else b"\n"
+        inicios = array("q")
+        finais = array("q")
+        posicao = 0
+        fim = self._fim
+        while posicao < fim:
+            quebra = mapa.find(separador, posicao, fim)
+            if quebra < 0:
+                quebra = fim
+            final = quebra
+            while final > posicao and mapa[final - 1] in (10, 13):
+                final -= 1
+            if final > posicao:
+                inicios.append(posicao)
+                finais.append(final)
+            posicao = quebra + 1
+        self._inicios, self._finais = inicios, finais
+        self._quantidade = len(inicios)
+
+    @property
+    def largura_fixa(self):
+        """True se as posições são calculadas pela largura fixa (sem índice de posições)."""
+        return self._inicios is None
+
+    def __len__(self):
+        return self._quantidade
+
+    def posicao(self, indice):
+        """Intervalo de bytes (inicio, fim) do registro no arquivo, sem o terminador."""
+        indice = self._normalizar(indice)
+        if self._inicios is None:
+            if not self._alinhado(indice):
+                self._indexar()
+                return self.posicao(indice)
+            inicio = indice * self._passo
+            return inicio, inicio + self.comprimento
+        return self._inicios[indice], self._finais[indice]
+
+    def bruto(self, indice):
+        """Bytes do registro, sem terminador e sem decodificar."""
+        inicio, fim = self.posicao(indice)
+        return self._mapa[inicio:fim]
+
+    def _normalizar(self, indice):
+        indice = index(indice)
+        if indice < 0:
+            indice += self._quantidade
+        if not 0 <= indice < self._quantidade:
+            raise IndexError("Registro fora do arquivo.")
+        return indice
+
+    def _montar(self, indice):
+        bruto = self.bruto(indice)
+        return RegistroMapeado(bruto, self.layouts.get(bruto[:1].decode("latin-1")))
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self._montar(i) for i in range(*indice.indices(self._quantidade))]
+        return self._montar(indice)
+
+    def __iter__(self):
+        for indice in range(self._quantidade):
+            yield self._montar(indice)
+
+    def fechar(self):
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+        self._handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
@@ -1,2 +1,44 @@
+TAMANHO_BUFFER_PADRAO = 8192
+
+
 def gravar_substring(arquivo_saida, substring):
     arquivo_saida.write(substring + "\n")
+
+
+class EscritorRelatorio:
+    """
+    Grava as linhas de um relatório em lotes.
+
+    As linhas são acumuladas e gravadas a cada `tamanho_buffer` linhas com uma
+    única chamada a `write` (unidas por '\\n'), em vez de uma concatenação e
+    uma escrita por linha. O conteúdo gravado é o mesmo de `gravar_substring`
+    chamada linha a linha; ao sair do bloco `with` o restante é descarregado.
+    """
+
+    def __init__(self, arquivo_saida, tamanho_buffer=TAMANHO_BUFFER_PADRAO):
+        self._saida = arquivo_saida
+        self._linhas = []
+        self.tamanho_buffer = max(1, tamanho_buffer)
+
+    def gravar(self, linha):
+        self._linhas.append(linha)
+        if len(self._linhas) >= self.tamanho_buffer:
+            self.descarregar()
+
+    def gravar_linhas(self, linhas):
+        self._linhas.extend(linhas)
+        if len(self._linhas) >= self.tamanho_buffer:
+            self.descarregar()
+
+    def descarregar(self):
+        if self._linhas:
+            self._linhas.append("")
+            self._saida.write("\n".join(self._linhas))
+            self._linhas = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.descarregar()
+        return False
@@ -0,0 +1,168 @@
+"""
+Cache em disco dos registros extraídos de cada arquivo de entrada.
+"""
+
+import hashlib
+import os
+import pickle
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+
+from src.extratores.registros import Registro
+from src.utils.compactacao import abrir_entrada, estado_entrada, tipo_entrada
+from src.utils.tabelas import resumo_tabelas, tabelas_do_arquivo
+
+TAMANHO_MAXIMO_PADRAO = 512 * 1024 * 1024
+# Aumentar quando o conteúdo gravado pelos extratores mudar sem mudança nas
+# classes de registro (os slots já entram no resumo do esquema).
+VERSAO_REGISTROS = 1
+
+_MAGICA = b"CNABC2"
+_CABECALHO = struct.Struct("<6sQq32s32s32s")
+_BLOCO_LEITURA = 1024 * 1024
+_SEM_TABELAS = bytes(32)
+
+
+def _resumo_esquema():
+    classes = sorted((classe.__name__, classe.__slots__) for classe in Registro.__subclasses__())
+    return hashlib.blake2b(repr((VERSAO_REGISTROS, classes)).encode("utf-8"), digest_size=32).digest()
+
+
+_ESQUEMA = _resumo_esquema()
+
+
+def _resumo_tabelas(impressao):
+    """Resumo das tabelas de códigos usadas nas descrições do arquivo (só os RET as usam)."""
+    if tipo_entrada(impressao.caminho) != "RET":
+        return _SEM_TABELAS
+    return resumo_tabelas(tabelas_do_arquivo(impressao.caminho))
+
+
+class ImpressaoDigital:
+    """
+    Identidade de um arquivo de entrada: caminho, tamanho, mtime e o resumo
+    BLAKE2b do conteúdo, calculado só quando pedido e uma única vez. Arquivos
+    .gz, .bz2 e .xz são resumidos como estão no disco; membros de .zip, pelo
+    conteúdo descompactado (ver `estado_entrada`). Um resumo já conhecido
+    (de uma impressão anterior com o mesmo tamanho e mtime) pode ser
+    informado para não ler o arquivo.
+    """
+
+    def __init__(self, arquivo_entrada, resumo=None):
+        self.caminho = Path(arquivo_entrada).resolve()
+        self.tamanho, self.mtime_ns = estado_entrada(self.caminho)
+        self._resumo = resumo
+
+    @property
+    def resumo(self):
+        if self._resumo is None:
+            resumo = hashlib.blake2b(digest_size=32)
+            with abrir_entrada(self.caminho, descompactar=False) as handle:
+                for bloco in iter(lambda: handle.read(_BLOCO_LEITURA), b""):
+                    resumo.update(bloco)
+            self._resumo = resumo.digest()
+        return self._resumo
+
+    def chave(self):
+        """Nome da entrada de cache deste arquivo (derivado do caminho)."""
+        return hashlib.blake2b(str(self.caminho).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class CacheExtracao:
+    """
+    Cache dos registros extraídos por arquivo.
+
+    Cada arquivo de entrada tem uma entrada `<chave>.cache` com um cabeçalho
+    binário (tamanho, mtime e resumo do conteúdo, resumo do esquema dos
+    registros e das tabelas de códigos usadas) seguido dos registros em
+    pickle comprimido com zlib. Uma entrada só é usada se o esquema, as
+    tabelas, o tamanho e o resumo do conteúdo conferem: depois de uma
+    atualização das classes de registro ou de uma edição em `dataTabelas/`,
+    as entradas antigas são descartadas. Com `verificar_conteudo=False`,
+    tamanho e mtime iguais bastam e o arquivo não precisa ser lido. Quando o
+    total ultrapassa `tamanho_maximo` bytes, as entradas usadas há mais tempo
+    são removidas.
+    """
+
+    def __init__(self, diretorio, tamanho_maximo=TAMANHO_MAXIMO_PADRAO, verificar_conteudo=True):
+        self.diretorio = Path(diretorio)
+        self.tamanho_maximo = tamanho_maximo
+        self.verificar_conteudo = verificar_conteudo
+
+    def _caminho_entrada(self, impressao):
+        return self.diretorio / f"{impressao.chave()}.cache"
+
+    def _cabecalho_valido(self, impressao, cabecalho):
+        if len(cabecalho) != _CABECALHO.size:
+            return False
+        magica, tamanho, mtime_ns, resumo, esquema, tabelas = _CABECALHO.unpack(cabecalho)
+        if magica != _MAGICA or esquema != _ESQUEMA or tamanho != impressao.tamanho:
+            return False
+        if tabelas != _resumo_tabelas(impressao):
+            return False
+        if not self.verificar_conteudo and mtime_ns == impressao.mtime_ns:
+            return True
+        return resumo == impressao.resumo
+
+    def contem(self, impressao):
+        """Indica se há uma entrada válida para o arquivo, sem carregá-la."""
+        try:
+            with open(self._caminho_entrada(impressao), "rb") as handle:
+                return self._cabecalho_valido(impressao, handle.read(_CABECALHO.size))
+        except OSError:
+            return False
+
+    def obter(self, impressao):
+        """Devolve os registros em cache do arquivo, ou None se não houver entrada válida."""
+        caminho = self._caminho_entrada(impressao)
+        try:
+            with open(caminho, "rb") as handle:
+                if not self._cabecalho_valido(impressao, handle.read(_CABECALHO.size)):
+                    return None
+                registros = pickle.loads(zlib.decompress(handle.read()))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Entrada de cache inválida descartada ({caminho.name}): {e}")
+            caminho.unlink(missing_ok=True)
+            return None
+
+        os.utime(caminho)
+        return registros
+
+    def guardar(self, impressao, registros):
+        """Grava (ou substitui) a entrada do arquivo e aplica o limite de tamanho."""
+        try:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            cabecalho = _CABECALHO.pack(_MAGICA, impressao.tamanho, impressao.mtime_ns, impressao.resumo, _ESQUEMA,
+                                        _resumo_tabelas(impressao))
+            conteudo = zlib.compress(pickle.dumps(registros, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+            descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+            with os.fdopen(descritor, "wb") as handle:
+                handle.write(cabecalho)
+                handle.write(conteudo)
+            os.replace(temporario, self._caminho_entrada(impressao))
+        except Exception as e:
+            print(f"Não foi possível gravar o cache de {impressao.caminho.name}: {e}")
+            return
+
+        self._aplicar_limite()
+
+    def _aplicar_limite(self):
+        entradas = []
+        for caminho in self.diretorio.glob("*.cache"):
+            try:
+                estado = caminho.stat()
+            except OSError:
+                continue
+            entradas.append((estado.st_mtime_ns, estado.st_size, caminho))
+
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        for _, tamanho, caminho in sorted(entradas, key=lambda entrada: entrada[0]):
+            if total <= self.tamanho_maximo:
+                break
+            caminho.unlink(missing_ok=True)
+            total -= tamanho
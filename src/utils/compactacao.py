@@ -0,0 +1,149 @@
+"""
+Arquivos de entrada compactados (.gz, .bz2, .xz e membros de .zip).
+
+Um arquivo REM ou RET compactado é reconhecido pelo nome sem a extensão de
+compressão (`TESTE.RET.gz`, `remessa.rem.xz`). Um membro de um .zip é
+endereçado como um caminho dentro do arquivo: `dataInput/retornos.zip/TESTE.RET`;
+assim ele tem nome, tipo e identidade como qualquer outro arquivo, inclusive
+ao ser enviado a outro processo.
+
+`abrir_entrada` devolve um fluxo binário já descompactado, lido sob demanda:
+nada é extraído para o disco.
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import zipfile
+from pathlib import Path
+
+DESCOMPRESSORES = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+EXTENSAO_ZIP = ".zip"
+TIPOS = ("REM", "RET")
+
+
+def membro_zip(caminho):
+    """(arquivo .zip, nome do membro) se o caminho aponta para dentro de um .zip; senão None."""
+    caminho = Path(caminho)
+    for arquivo_zip in caminho.parents:
+        if arquivo_zip.suffix.lower() == EXTENSAO_ZIP and arquivo_zip.is_file():
+            return arquivo_zip, caminho.relative_to(arquivo_zip).as_posix()
+    return None
+
+
+def compactado(caminho):
+    """Indica se o arquivo precisa ser descompactado (não pode ser mapeado nem dividido em faixas)."""
+    return Path(caminho).suffix.lower() in DESCOMPRESSORES or membro_zip(caminho) is not None
+
+
+def nome_descompactado(caminho):
+    """Nome do arquivo sem a extensão de compressão: 'TESTE.RET.gz' -> 'TESTE.RET'."""
+    nome = Path(caminho).name
+    raiz, extensao = os.path.splitext(nome)
+    return raiz if extensao.lower() in DESCOMPRESSORES else nome
+
+
+def tipo_entrada(caminho):
+    """'REM' ou 'RET' pela extensão do arquivo (descompactado); '' se não for nenhum dos dois."""
+    extensao = os.path.splitext(nome_descompactado(caminho))[1].upper()[1:]
+    return extensao if extensao in TIPOS else ""
+
+
+def abrir_entrada(caminho, descompactar=True):
+    """
+    Fluxo binário do conteúdo do arquivo. Membros de .zip são sempre lidos
+    descompactados; com `descompactar=False`, arquivos .gz, .bz2 e .xz são
+    entregues como estão no disco.
+    """
+    membro = membro_zip(caminho)
+    if membro is not None:
+        # O membro aberto mantém o .zip aberto até ser fechado.
+        with zipfile.ZipFile(membro[0]) as arquivo_zip:
+            fluxo = arquivo_zip.open(membro[1])
+    else:
+        fluxo = open(caminho, "rb")
+
+    descompressor = DESCOMPRESSORES.get(Path(caminho).suffix.lower())
+    if descompressor is None or not descompactar:
+        return fluxo
+    try:
+        return descompressor(fluxo, "rb")
+    except Exception:
+        fluxo.close()
+        raise
+
+
+def _info_membro(membro):
+    with zipfile.ZipFile(membro[0]) as arquivo_zip:
+        return arquivo_zip.getinfo(membro[1])
+
+
+def entrada_existe(caminho):
+    membro = membro_zip(caminho)
+    if membro is None:
+        return Path(caminho).is_file()
+    try:
+        _info_membro(membro)
+    except (KeyError, zipfile.BadZipFile):
+        return False
+    return True
+
+
+def estado_entrada(caminho):
+    """
+    (tamanho, mtime_ns) que identificam a versão do arquivo. Para um membro de
+    .zip, o tamanho descompactado do membro e o mtime do .zip.
+    """
+    membro = membro_zip(caminho)
+    if membro is None:
+        estado = os.stat(caminho)
+        return estado.st_size, estado.st_mtime_ns
+    return _info_membro(membro).file_size, os.stat(membro[0]).st_mtime_ns
+
+
+def tamanho_em_disco(caminho):
+    """Bytes efetivamente lidos do disco: o tamanho do arquivo ou, num .zip, o do membro compactado."""
+    membro = membro_zip(caminho)
+    if membro is None:
+        return os.path.getsize(caminho)
+    return _info_membro(membro).compress_size
+
+
+def tamanho_descompactado(caminho):
+    """Tamanho do conteúdo descompactado, quando conhecido sem ler o arquivo (senão None)."""
+    membro = membro_zip(caminho)
+    if membro is not None:
+        return _info_membro(membro).file_size
+    if Path(caminho).suffix.lower() in DESCOMPRESSORES:
+        return None
+    return os.path.getsize(caminho)
+
+
+def membros_zip(arquivo_zip, tipo=None):
+    """Caminhos dos membros REM/RET (ou só do `tipo`) de um .zip, na ordem do arquivo."""
+    arquivo_zip = Path(arquivo_zip)
+    try:
+        with zipfile.ZipFile(arquivo_zip) as handle:
+            nomes = [info.filename for info in handle.infolist() if not info.is_dir()]
+    except (OSError, zipfile.BadZipFile) as e:
+        print(f"Arquivo .zip ignorado ({arquivo_zip.name}): {e}")
+        return []
+    return [arquivo_zip / nome for nome in nomes
+            if tipo_entrada(nome) and (tipo is None or tipo_entrada(nome) == tipo)]
+
+
+def listar_entradas(path_input, tipo):
+    """
+    Arquivos do `tipo` ('REM' ou 'RET') no diretório: os comuns (.REM e .rem)
+    seguidos dos compactados (.RET.gz, .rem.xz...) e dos membros de cada .zip.
+    """
+    path_input = Path(path_input)
+    arquivos = list(path_input.glob(f"*.{tipo}")) + list(path_input.glob(f"*.{tipo.lower()}"))
+    for caminho in sorted(path_input.iterdir()):
+        extensao = caminho.suffix.lower()
+        if extensao in DESCOMPRESSORES and tipo_entrada(caminho) == tipo and caminho.is_file():
+            arquivos.append(caminho)
+        elif extensao == EXTENSAO_ZIP and caminho.is_file():
+            arquivos.extend(membros_zip(caminho, tipo))
+    return arquivos
@@ -1,27 +1,149 @@
+import re
+from datetime import date
+from functools import lru_cache
+
+# Zeros e pontos à esquerda de cada linha, preservando o último dígito antes da vírgula.
+_ZEROS_ESQUERDA = re.compile(r"^[0.]*(?=\d)", re.MULTILINE)
+
+
 def formatar_data(data_str):
+    if isinstance(data_str, date):
+        return data_str.strftime("%d/%m/%y")
     if len(data_str) == 6:
         return f"{data_str[0:2]}/{data_str[2:4]}/{data_str[4:6]}"
     return data_str
 
 
+@lru_cache(maxsize=4096)
+def converter_data(data_str):
+    """
+    Converte uma data "ddmmaa" em `datetime.date`; None se vazia, zerada ou
+    inválida. Anos 69-99 ficam em 19xx e 00-68 em 20xx, como em `strptime`.
+    As datas se repetem muito, então o mesmo objeto é compartilhado.
+    """
+    if len(data_str) != 6 or not data_str.isdigit():
+        return None
+    ano = int(data_str[4:6])
+    ano += 1900 if ano >= 69 else 2000
+    try:
+        return date(ano, int(data_str[2:4]), int(data_str[0:2]))
+    except ValueError:
+        return None
+
+
+def serializar_json(valor):
+    """`default` do `json` para os registros tipados: datas em ISO ("2026-03-20")."""
+    if isinstance(valor, date):
+        return valor.isoformat()
+    raise TypeError(f"Valor não serializável: {valor!r}")
+
+
+def converter_centavos(valor_str):
+    """Converte um valor em centavos ("0000000123456") em int; None se vazio ou não numérico."""
+    try:
+        return int(valor_str)
+    except (TypeError, ValueError):
+        return None
+
+
 def formatar_valor(valor_str):
+    """
+    Formata um valor em centavos ("0000000123456") como "1.234,56".
+
+    Os dígitos são agrupados direto do texto, em uma passada, sem conversão
+    para float. Valores vazios viram "0,00" e valores não numéricos são
+    devolvidos como vieram. Também aceita os centavos já convertidos em int.
+    """
+    if isinstance(valor_str, int):
+        return formatar_centavos(valor_str)
     try:
-        if valor_str and valor_str.strip():
-            valor = int(valor_str.strip()) / 100.0
-            partes = f"{valor:.2f}".split(".")
-            parte_inteira = partes[0]
-            parte_decimal = partes[1] if len(partes) > 1 else "00"
-
-            parte_inteira_formatada = ""
-            for i, digito in enumerate(reversed(parte_inteira)):
-                if i > 0 and i % 3 == 0:
-                    parte_inteira_formatada = "." + parte_inteira_formatada
-                parte_inteira_formatada = digito + parte_inteira_formatada
-
-            return f"{parte_inteira_formatada},{parte_decimal}"
-        return "0,00"
-    except (ValueError, AttributeError):
+        digitos = valor_str.strip()
+    except AttributeError:
         return valor_str if valor_str else "0,00"
+    if not digitos:
+        return "0,00"
+    if digitos.isascii() and digitos.isdigit():
+        return _agrupar_centavos(digitos)
+    try:
+        return formatar_centavos(int(digitos))
+    except ValueError:
+        return valor_str
+
+
+def formatar_centavos(centavos):
+    """Formata um inteiro em centavos como "1.234,56"."""
+    if centavos < 0:
+        return "-" + _agrupar_centavos(str(-centavos))
+    return _agrupar_centavos(str(centavos))
+
+
+def _agrupar_centavos(digitos):
+    digitos = digitos.lstrip("0").zfill(3)
+    inteiro = digitos[:-2]
+    decimal = digitos[-2:]
+    tamanho = len(inteiro)
+    # Campos CNAB de 13 dígitos têm no máximo 4 grupos de milhar.
+    if tamanho <= 3:
+        return f"{inteiro},{decimal}"
+    if tamanho <= 6:
+        return f"{inteiro[:-3]}.{inteiro[-3:]},{decimal}"
+    if tamanho <= 9:
+        return f"{inteiro[:-6]}.{inteiro[-6:-3]}.{inteiro[-3:]},{decimal}"
+    if tamanho <= 12:
+        return f"{inteiro[:-9]}.{inteiro[-9:-6]}.{inteiro[-6:-3]}.{inteiro[-3:]},{decimal}"
+    primeiro = tamanho % 3 or 3
+    grupos = [inteiro[:primeiro]]
+    grupos.extend(inteiro[i:i + 3] for i in range(primeiro, tamanho, 3))
+    return ".".join(grupos) + "," + decimal
+
+
+def formatar_valores(valores):
+    """
+    Formata uma coluna de valores em centavos, com o mesmo resultado de
+    `formatar_valor` para cada um.
+
+    Quando todos são campos de dígitos da mesma largura (o caso dos campos
+    CNAB), a coluna é formatada de uma vez, sem laço em Python por valor: os
+    dígitos de todos os valores vão, em fatias de passo fixo, para as posições
+    que ocupam na forma com todos os separadores ("00.000.001.234,56") e os
+    zeros à esquerda saem numa única substituição. Nos demais casos cada
+    valor passa por `formatar_valor`.
+    """
+    valores = list(valores)
+    try:
+        coluna = "".join(valores)
+    except TypeError:
+        coluna = None
+    larguras = set(map(len, valores)) if coluna is not None else ()
+    if len(larguras) != 1 or min(larguras) < 3 or not (coluna.isascii() and coluna.isdigit()):
+        return [formatar_valor(valor) for valor in valores]
+
+    largura = len(valores[0])
+    destinos, tamanho_linha = _posicoes_digitos(largura)
+    origem = coluna.encode("ascii")
+    quantidade = len(valores)
+    linhas = bytearray(b"." * (tamanho_linha * quantidade))
+    for indice, destino in enumerate(destinos):
+        linhas[destino::tamanho_linha] = origem[indice::largura]
+    linhas[destinos[-2] - 1::tamanho_linha] = b"," * quantidade
+    linhas[tamanho_linha - 1::tamanho_linha] = b"\n" * quantidade
+    return _ZEROS_ESQUERDA.sub("", linhas[:-1].decode("ascii")).split("\n")
+
+
+@lru_cache(maxsize=None)
+def _posicoes_digitos(largura):
+    """Posição de cada dígito de um valor de `largura` dígitos na forma com separadores, e o tamanho da linha."""
+    inteiro = largura - 2
+    destinos = []
+    posicao = 0
+    for indice in range(inteiro):
+        if indice and (inteiro - indice) % 3 == 0:
+            posicao += 1
+        destinos.append(posicao)
+        posicao += 1
+    destinos += [posicao + 1, posicao + 2]
+    # Vírgula, dois decimais e a quebra de linha.
+    return destinos, posicao + 4
 
 
 def normalizar_chave(chave):
@@ -0,0 +1,167 @@
+"""
+Leitura em fluxo dos registros de arquivos REM e RET.
+"""
+
+import mmap
+import os
+
+from src.utils.compactacao import abrir_entrada, compactado, tamanho_em_disco
+
+TAMANHO_MINIMO_FAIXA = 4 * 1024 * 1024
+# Bytes descompactados por leitura de um arquivo compactado.
+TAMANHO_BLOCO_FLUXO = 1024 * 1024
+
+
+class LeitorMapeado:
+    """
+    Fonte de registros em bytes sobre um mapeamento em memória do arquivo.
+
+    O arquivo é aberto na criação do leitor (erros de abertura aparecem
+    imediatamente). Nada é decodificado aqui: cada registro é entregue como
+    `bytes`, sem terminador de linha e ignorando linhas vazias, e cabe ao
+    layout (`Layout.ler_bytes`) decodificar só os campos que usa. Arquivos
+    com terminador só '\r' também são reconhecidos.
+
+    Com `faixa=(inicio, fim)` apenas os bytes desse intervalo são lidos; os
+    limites devem estar alinhados a quebras de linha, como os devolvidos por
+    `dividir_em_faixas`.
+
+    Arquivos compactados (.gz, .bz2, .xz, membros de .zip) não podem ser
+    mapeados: são descompactados em fluxo, em blocos, e entregues no mesmo
+    formato, sem arquivo temporário.
+    """
+
+    def __init__(self, arquivo_entrada, faixa=None):
+        self._fluxo = None
+        self._mapa = None
+        if compactado(arquivo_entrada):
+            _sem_faixa(faixa)
+            self._fluxo = abrir_entrada(arquivo_entrada)
+            return
+        self._handle = open(arquivo_entrada, "rb")
+        tamanho = os.fstat(self._handle.fileno()).st_size
+        if tamanho:
+            try:
+                self._mapa = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except Exception:
+                self._handle.close()
+                raise
+        self._inicio, self._fim = faixa if faixa is not None else (0, tamanho)
+
+    def __iter__(self):
+        if self._fluxo is not None:
+            yield from registros_de_fluxo(self._fluxo)
+            return
+        mapa = self._mapa
+        posicao = self._inicio
+        fim = self._fim
+        if mapa is None or posicao >= fim:
+            return
+
+        amostra = min(fim, posicao + 65536)
+        if mapa.find(b"\n", posicao, amostra) >= 0 or mapa.find(b"\r", posicao, amostra) < 0:
+            mapa.seek(posicao)
+            for registro in iter(mapa.readline, b""):
+                posicao += len(registro)
+                registro = registro.rstrip(b"\r\n")
+                if registro:
+                    yield registro
+                if posicao >= fim:
+                    break
+        else:
+            while posicao < fim:
+                quebra = mapa.find(b"\r", posicao, fim)
+                if quebra < 0:
+                    quebra = fim
+                registro = mapa[posicao:quebra]
+                posicao = quebra + 1
+                if registro:
+                    yield registro
+
+    def fechar(self):
+        if self._fluxo is not None:
+            self._fluxo.close()
+            return
+        if self._mapa is not None:
+            self._mapa.close()
+        self._handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+
+
+def registros_de_bytes(conteudo):
+    """
+    Registros de um arquivo CNAB já carregado em memória (por exemplo, recebido
+    pela rede), no mesmo formato de `LeitorMapeado`: `bytes` sem terminador
+    ('\n', '\r\n' ou '\r'), ignorando linhas vazias.
+    """
+    for registro in conteudo.splitlines():
+        if registro:
+            yield registro
+
+
+def registros_de_fluxo(fluxo, tamanho_bloco=TAMANHO_BLOCO_FLUXO):
+    """
+    Registros de um fluxo binário (por exemplo, um arquivo compactado aberto
+    por `abrir_entrada`), lido em blocos, no mesmo formato de `registros_de_bytes`.
+    """
+    resto = b""
+    for bloco in iter(lambda: fluxo.read(tamanho_bloco), b""):
+        linhas = (resto + bloco).splitlines()
+        # A última linha pode continuar no próximo bloco. Um '\r\n' partido entre
+        # dois blocos vira '\r' e uma linha vazia, que é descartada.
+        resto = b"" if bloco[-1:] in (b"\n", b"\r") else linhas.pop()
+        for registro in linhas:
+            if registro:
+                yield registro
+    if resto:
+        yield resto
+
+
+def _sem_faixa(faixa):
+    if faixa is not None:
+        raise ValueError("Arquivos compactados não podem ser lidos por faixas.")
+
+
+def dividir_em_faixas(arquivo_entrada, partes, tamanho_minimo=TAMANHO_MINIMO_FAIXA):
+    """
+    Divide o arquivo em até `partes` intervalos de bytes (inicio, fim)
+    contíguos, cada um terminando logo após uma quebra de linha, de modo que
+    nenhum registro fique dividido entre duas faixas.
+
+    Faixas menores que `tamanho_minimo` não compensam o custo de um processo
+    e arquivos sem '\\n' (terminador só '\\r') ou compactados não são
+    divididos: nesses casos a lista tem uma única faixa.
+    """
+    if compactado(arquivo_entrada):
+        return [(0, tamanho_em_disco(arquivo_entrada))]
+    tamanho = os.path.getsize(arquivo_entrada)
+    partes = max(1, min(partes, tamanho // max(tamanho_minimo, 1)))
+    if partes == 1:
+        return [(0, tamanho)]
+
+    faixas = []
+    inicio = 0
+    with open(arquivo_entrada, "rb") as handle:
+        if b"\n" not in handle.readline():
+            return [(0, tamanho)]
+
+        for parte in range(1, partes):
+            alvo = tamanho * parte // partes
+            if alvo <= inicio:
+                continue
+            handle.seek(alvo - 1)
+            handle.readline()
+            corte = handle.tell()
+            if corte >= tamanho:
+                break
+            faixas.append((inicio, corte))
+            inicio = corte
+
+    faixas.append((inicio, tamanho))
+    return faixas
@@ -0,0 +1,265 @@
+"""
+Instrumentação opcional dos processadores e da análise.
+
+Cada arquivo processado (e a análise) é uma `Secao`, com o tempo de parede
+e de CPU, os registros tratados, os bytes lidos e gravados e o pico de
+memória. Dentro da seção, os tempos de parede e de CPU são repartidos entre
+etapas (leitura, parse, formatação, gravação, extração, conciliação...): ao
+entrar ou sair de uma etapa, o tempo decorrido desde a última marca é
+atribuído à etapa corrente, de modo que etapas aninhadas não são contadas
+duas vezes.
+
+Sem `Metricas` os processadores recebem `SECAO_INATIVA`, cujos métodos não
+fazem nada e devolvem o iterável ou a função recebidos sem embrulho: o
+custo fica em algumas chamadas por arquivo, nenhuma por registro.
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from src.layouts.cnab400 import TAMANHO_REGISTRO
+from src.utils.compactacao import abrir_entrada, tamanho_descompactado, tamanho_em_disco
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Arquivos com ao menos esta estimativa de registros exibem progresso.
+LIMITE_PROGRESSO = 200000
+# A cada quantos registros lidos (potência de 2, menos 1) o progresso é atualizado.
+MASCARA_PROGRESSO = 0xFFFF
+
+
+def pico_memoria_mb():
+    """Pico de memória residente do processo e dos filhos já encerrados, em MB (None se indisponível)."""
+    if resource is None:
+        return None
+    escala = 1024 * 1024 if sys.platform == "darwin" else 1024
+    proprio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    filhos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(proprio, filhos) / escala, 1)
+
+
+def estimar_registros(arquivo_entrada):
+    """
+    Registros estimados pelo tamanho do arquivo e pelo terminador da primeira
+    linha; 0 quando o tamanho descompactado não é conhecido (.gz, .bz2, .xz).
+    """
+    try:
+        tamanho = tamanho_descompactado(arquivo_entrada)
+        if tamanho is None:
+            return 0
+        with abrir_entrada(arquivo_entrada) as handle:
+            inicio = handle.read(TAMANHO_REGISTRO + 2)
+    except Exception:
+        return 0
+    terminador = 2 if inicio[TAMANHO_REGISTRO:] == b"\r\n" else 1
+    return tamanho // (TAMANHO_REGISTRO + terminador)
+
+
+class Secao:
+    """Medições de um arquivo ou da análise; use como gerenciador de contexto."""
+
+    def __init__(self, metricas, nome, tipo, arquivo_entrada=None):
+        self.metricas = metricas
+        self.nome = nome
+        self.tipo = tipo
+        self.registros = 0
+        self.bytes_lidos = tamanho_em_disco(arquivo_entrada) if arquivo_entrada else 0
+        self.bytes_gravados = 0
+        self.etapas = {}
+        self.cpu_etapas = {}
+        self.estimativa = estimar_registros(arquivo_entrada) if arquivo_entrada and metricas.progresso else 0
+        self.lidos = 0
+        self._pilha = []
+        self._marca = 0.0
+        self._marca_cpu = 0.0
+        self._inicio = 0.0
+        self._inicio_cpu = 0.0
+        self._progresso_exibido = False
+
+    def __enter__(self):
+        self._inicio = self._marca = time.perf_counter()
+        self._inicio_cpu = self._marca_cpu = time.process_time()
+        return self
+
+    def __exit__(self, *excecao):
+        wall = time.perf_counter() - self._inicio
+        cpu = time.process_time() - self._inicio_cpu
+        if self._progresso_exibido:
+            print(file=self.metricas.saida_progresso)
+        self.metricas.secoes.append({
+            "nome": self.nome,
+            "tipo": self.tipo,
+            "segundos": round(wall, 4),
+            "cpu_segundos": round(cpu, 4),
+            "registros": self.registros,
+            "registros_por_segundo": round(self.registros / wall) if wall else None,
+            "bytes_lidos": self.bytes_lidos,
+            "bytes_gravados": self.bytes_gravados,
+            "memoria_pico_mb": pico_memoria_mb(),
+            "etapas": {etapa: round(segundos, 4) for etapa, segundos in self.etapas.items()},
+            "cpu_etapas": {etapa: round(segundos, 4) for etapa, segundos in self.cpu_etapas.items()},
+            "sucesso": excecao[0] is None,
+        })
+        return False
+
+    def _entrar(self, etapa):
+        agora = time.perf_counter()
+        agora_cpu = time.process_time()
+        pilha = self._pilha
+        if pilha:
+            self._acumular(pilha[-1], agora, agora_cpu)
+        pilha.append(etapa)
+        self._marca = agora
+        self._marca_cpu = agora_cpu
+
+    def _sair(self):
+        agora = time.perf_counter()
+        agora_cpu = time.process_time()
+        self._acumular(self._pilha.pop(), agora, agora_cpu)
+        self._marca = agora
+        self._marca_cpu = agora_cpu
+
+    def _acumular(self, etapa, agora, agora_cpu):
+        self.etapas[etapa] = self.etapas.get(etapa, 0.0) + agora - self._marca
+        self.cpu_etapas[etapa] = self.cpu_etapas.get(etapa, 0.0) + agora_cpu - self._marca_cpu
+
+    @contextmanager
+    def etapa(self, nome):
+        """Etapa de granularidade grossa, em volta de um bloco."""
+        self._entrar(nome)
+        try:
+            yield
+        finally:
+            self._sair()
+
+    def cronometrar(self, iteravel, etapa, ler=False):
+        """
+        Atribui à etapa o tempo gasto em obter cada item do iterável. Com
+        `ler=True` os itens são registros lidos do arquivo: são contados em
+        `lidos` e alimentam o indicador de progresso.
+        """
+        iterador = iter(iteravel)
+        entrar = self._entrar
+        sair = self._sair
+        progresso = ler and self.estimativa >= LIMITE_PROGRESSO
+        while True:
+            entrar(etapa)
+            try:
+                item = next(iterador)
+            except StopIteration:
+                sair()
+                return
+            sair()
+            if ler:
+                self.lidos += 1
+                if progresso and not self.lidos & MASCARA_PROGRESSO:
+                    self._exibir_progresso()
+            yield item
+
+    def cronometrar_funcao(self, funcao, etapa):
+        """Embrulha `funcao` para que o tempo das chamadas seja atribuído à etapa."""
+        entrar = self._entrar
+        sair = self._sair
+
+        def cronometrada(*args, **kwargs):
+            entrar(etapa)
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                sair()
+        return cronometrada
+
+    def contar(self, registros=0, bytes_lidos=0, bytes_gravados=0):
+        self.registros += registros
+        self.bytes_lidos += bytes_lidos
+        self.bytes_gravados += bytes_gravados
+
+    def _exibir_progresso(self):
+        decorrido = time.perf_counter() - self._inicio
+        fracao = min(self.lidos / self.estimativa, 1.0)
+        restante = decorrido * (1 - fracao) / fracao if fracao else 0
+        print(f"\r{self.nome}: {fracao:6.1%} ({self.lidos}/{self.estimativa} registros) "
+              f"- restante estimado {restante:.0f}s", end="", file=self.metricas.saida_progresso, flush=True)
+        self._progresso_exibido = True
+
+
+class _SecaoInativa:
+    """Seção usada quando as métricas estão desligadas: nada é medido."""
+
+    lidos = 0
+    _NULO = nullcontext()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        return False
+
+    def etapa(self, nome):
+        return self._NULO
+
+    def cronometrar(self, iteravel, etapa, ler=False):
+        return iteravel
+
+    def cronometrar_funcao(self, funcao, etapa):
+        return funcao
+
+    def contar(self, registros=0, bytes_lidos=0, bytes_gravados=0):
+        pass
+
+
+SECAO_INATIVA = _SecaoInativa()
+
+
+class Metricas:
+    """
+    Coletor de métricas de uma execução, gravado em JSON por `gravar`.
+
+    Args:
+        progresso: Exibe o progresso e o tempo restante estimado (pelo tamanho
+            do arquivo dividido pelo tamanho do registro) de arquivos grandes
+        saida_progresso: Onde o progresso é exibido (stderr por padrão)
+    """
+
+    def __init__(self, progresso=True, saida_progresso=None):
+        self.progresso = progresso
+        self.saida_progresso = saida_progresso or sys.stderr
+        self.secoes = []
+        self.inicio = datetime.now()
+        self._inicio = time.perf_counter()
+        self._inicio_cpu = time.process_time()
+
+    def secao(self, nome, tipo, arquivo_entrada=None):
+        return Secao(self, nome, tipo, arquivo_entrada)
+
+    def como_dict(self):
+        return {
+            "inicio": self.inicio.isoformat(timespec="seconds"),
+            "segundos": round(time.perf_counter() - self._inicio, 4),
+            "cpu_segundos": round(time.process_time() - self._inicio_cpu, 4),
+            "memoria_pico_mb": pico_memoria_mb(),
+            "secoes": self.secoes,
+        }
+
+    def gravar(self, arquivo_saida):
+        try:
+            with open(arquivo_saida, "w", encoding="utf-8") as handle:
+                json.dump(self.como_dict(), handle, ensure_ascii=False, indent=2)
+            print(f"Métricas gravadas em: {arquivo_saida}")
+            return True
+        except Exception as e:
+            print(f"Erro ao gravar as métricas: {e}")
+            return False
+
+
+def abrir_secao(metricas, nome, tipo, arquivo_entrada=None):
+    """Seção de `metricas`, ou `SECAO_INATIVA` se as métricas estiverem desligadas (None)."""
+    if metricas is None:
+        return SECAO_INATIVA
+    return metricas.secao(nome, tipo, arquivo_entrada)
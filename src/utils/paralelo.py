@@ -0,0 +1,19 @@
+"""
+Execução de funções sobre faixas de um arquivo em processos separados.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+
+def mapear_faixas(funcao, arquivo_entrada, faixas, *argumentos):
+    """
+    Executa `funcao(arquivo_entrada, faixa, *argumentos)` para cada faixa em
+    um pool de processos e entrega os resultados na ordem das faixas.
+
+    `funcao` precisa ser importável pelos processos filhos (função de módulo
+    ou método estático).
+    """
+    with ProcessPoolExecutor(max_workers=len(faixas)) as executor:
+        extras = [repeat(argumento) for argumento in argumentos]
+        yield from executor.map(funcao, repeat(arquivo_entrada), faixas, *extras)
@@ -0,0 +1,131 @@
+"""
+Registro das tabelas de códigos (ocorrências e comandos) por banco/convênio.
+
+As tabelas padrão são as de `ocorrencias.py` e `comandos.py`, dicionários
+montados uma única vez, na importação, com os códigos sem espaços: as
+funções de consulta procuram primeiro o código como veio do registro e só
+fazem strip quando ele não é encontrado, sem montar nada por chamada.
+
+Variantes ficam em arquivos JSON no diretório de tabelas (por padrão
+`dataTabelas/`, ao lado de `dataInput/`), com o nome `<banco>.json` ou
+`<banco>_<convenio>.json`:
+
+    {"ocorrencias": {"06": "Liquidação"}, "comandos": {"01": "Remessa"}}
+
+O banco e o convênio vêm do header do arquivo RET (`codigo_banco` e
+`convenio` de `RET_HEADER`). Os códigos informados substituem ou completam
+os da tabela padrão. Cada variante é lida e montada uma única vez e
+reaproveitada nas consultas seguintes.
+"""
+
+import hashlib
+import json
+from collections import namedtuple
+from pathlib import Path
+from sys import intern
+
+from src.layouts.cnab400 import RET_HEADER
+from src.utils.compactacao import abrir_entrada
+from src.utils.comandos import COMANDOS
+from src.utils.ocorrencias import OCORRENCIAS
+
+DIRETORIO_TABELAS = Path(__file__).resolve().parents[2] / "dataTabelas"
+
+TabelasCodigos = namedtuple("TabelasCodigos", ["ocorrencias", "comandos"])
+
+TABELAS_PADRAO = TabelasCodigos(OCORRENCIAS, COMANDOS)
+
+
+class RegistroTabelas:
+    """Tabelas de códigos por (banco, convênio), carregadas sob demanda e mantidas em cache."""
+
+    def __init__(self, diretorio=DIRETORIO_TABELAS):
+        self.diretorio = Path(diretorio)
+        self._cache = {}
+
+    def obter(self, banco, convenio=None):
+        """
+        Tabelas do banco/convênio: `<banco>_<convenio>.json`, senão
+        `<banco>.json`, senão as tabelas padrão.
+        """
+        banco = (banco or "").strip()
+        convenio = (convenio or "").strip()
+        chave = (banco, convenio)
+        tabelas = self._cache.get(chave)
+        if tabelas is None:
+            tabelas = self._cache[chave] = self._carregar(banco, convenio)
+        return tabelas
+
+    def _carregar(self, banco, convenio):
+        if not banco:
+            return TABELAS_PADRAO
+
+        nomes = [f"{banco}_{convenio}.json", f"{banco}.json"] if convenio else [f"{banco}.json"]
+        for nome in nomes:
+            caminho = self.diretorio / nome
+            if not caminho.is_file():
+                continue
+            try:
+                with open(caminho, "r", encoding="utf-8") as handle:
+                    dados = json.load(handle)
+                return TabelasCodigos(
+                    _mesclar(OCORRENCIAS, dados.get("ocorrencias", {})),
+                    _mesclar(COMANDOS, dados.get("comandos", {}))
+                )
+            except Exception as e:
+                print(f"Erro ao carregar a tabela de códigos {caminho.name}: {e}")
+                return TABELAS_PADRAO
+        return TABELAS_PADRAO
+
+    def limpar(self):
+        """Descarta as tabelas carregadas (para reler arquivos alterados)."""
+        self._cache.clear()
+
+
+def _mesclar(padrao, variante):
+    if not variante:
+        return padrao
+    tabela = dict(padrao)
+    tabela.update({str(codigo).strip(): intern(str(descricao)) for codigo, descricao in variante.items()})
+    return tabela
+
+
+REGISTRO_TABELAS = RegistroTabelas()
+
+_RESUMOS = {}
+
+
+def resumo_tabelas(tabelas):
+    """Resumo BLAKE2b do conteúdo das tabelas, calculado uma vez por tabela carregada."""
+    memo = _RESUMOS.get(id(tabelas))
+    if memo is not None and memo[0] is tabelas:
+        return memo[1]
+    conteudo = json.dumps([sorted(tabelas.ocorrencias.items()), sorted(tabelas.comandos.items())],
+                          ensure_ascii=False)
+    resumo = hashlib.blake2b(conteudo.encode("utf-8"), digest_size=32).digest()
+    # A referência à tabela impede que o id seja reaproveitado por outra.
+    _RESUMOS[id(tabelas)] = (tabelas, resumo)
+    return resumo
+
+
+def tabelas_do_arquivo(arquivo_entrada, registro=None):
+    """
+    Tabelas de códigos de um arquivo RET, escolhidas pelo código do banco e
+    pelo convênio do header. Sem header reconhecível, as tabelas padrão.
+    """
+    try:
+        with abrir_entrada(arquivo_entrada) as handle:
+            primeira = handle.readline(RET_HEADER.tamanho + 2)
+    except Exception:
+        return TABELAS_PADRAO
+    return tabelas_do_header(primeira, registro)
+
+
+def tabelas_do_header(primeira_linha, registro=None):
+    """Como `tabelas_do_arquivo`, a partir do início (em bytes) do arquivo."""
+    registro = registro or REGISTRO_TABELAS
+    if primeira_linha[:1] != b"0":
+        return TABELAS_PADRAO
+    header = primeira_linha[:RET_HEADER.tamanho + 2].splitlines()[0][:RET_HEADER.tamanho]
+    campos = RET_HEADER.ler_dict(header.decode("latin-1"))
+    return registro.obter(campos["codigo_banco"], campos["convenio"])
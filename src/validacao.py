@@ -0,0 +1,224 @@
+"""
+Validação de um arquivo REM ou RET no mesmo parse que gera o relatório.
+
+Confere, com contadores e um conjunto de nossos números:
+
+- a numeração sequencial das posições 395-400 (1, 2, 3...) de cada registro;
+- nossos números repetidos entre os detalhes;
+- a presença do trailer e, no RET, a quantidade de detalhes e a soma do valor
+  dos títulos contra `total_registros` e `valor_total` do trailer.
+
+Por registro, só as fatias brutas (bytes) do sequencial, do nosso número e do
+valor são guardadas; a cada lote elas são conferidas com operações em C
+(`map(int, ...)`, comparação com um `range`, união de conjuntos). O laço
+registro a registro, mais lento, só roda nos lotes com alguma divergência.
+"""
+
+from src.layouts.cnab400 import REM_DETALHE, RET_DETALHE, RET_TRAILER
+from src.utils.formatadores import converter_centavos, formatar_centavos
+
+INICIO_SEQUENCIAL = 394
+FIM_SEQUENCIAL = 400
+MODULO_SEQUENCIAL = 10 ** (FIM_SEQUENCIAL - INICIO_SEQUENCIAL)
+# Os totais do trailer têm a largura dos seus campos; somas maiores dão a volta.
+MODULO_TOTAL_REGISTROS = 10 ** (RET_TRAILER.campos[0].fim - RET_TRAILER.campos[0].inicio)
+MODULO_VALOR_TOTAL = 10 ** (RET_TRAILER.campos[1].fim - RET_TRAILER.campos[1].inicio)
+TAMANHO_LOTE = 65536
+# Ocorrências de cada tipo de divergência guardadas como exemplo.
+LIMITE_EXEMPLOS = 5
+
+
+# Posições do nosso número e do valor do título nos detalhes.
+_FATIAS = {
+    "REM": (REM_DETALHE.fatia("nosso_numero"), REM_DETALHE.fatia("valor_titulo")),
+    "RET": (RET_DETALHE.fatia("nosso_numero"), RET_DETALHE.fatia("valor_titulo")),
+}
+
+
+class ValidacaoArquivo:
+    """
+    Contadores de validação de um arquivo (ou de uma faixa dele, no
+    processamento em paralelo; as faixas são reunidas com `somar`). Cada
+    registro lido passa por `registro`; `finalizar` confere o último lote.
+    """
+
+    __slots__ = ('tipo', 'registros', 'detalhes', 'valor_titulo', 'trailer', 'primeiro', 'ultimo', 'proximo',
+                 'falhas_sequencia', 'repetidos', 'nossos_numeros', 'exemplos', '_sequenciais', '_nossos',
+                 '_valores', '_nosso', '_valor')
+
+    def __init__(self, tipo):
+        self.tipo = tipo
+        self.registros = 0
+        self.detalhes = 0
+        self.valor_titulo = 0
+        self.trailer = None
+        self.primeiro = None
+        self.ultimo = None
+        self.proximo = None
+        self.falhas_sequencia = 0
+        self.repetidos = 0
+        self.nossos_numeros = set()
+        self.exemplos = {}
+        self._sequenciais = []
+        self._nossos = []
+        self._valores = []
+        self._nosso, self._valor = _FATIAS[tipo]
+
+    def registro(self, registro):
+        """Anota um registro lido (em bytes)."""
+        sequenciais = self._sequenciais
+        sequenciais.append(registro[INICIO_SEQUENCIAL:FIM_SEQUENCIAL])
+        flag = registro[:1]
+        if flag == b"7":
+            self._nossos.append(registro[self._nosso])
+            self._valores.append(registro[self._valor])
+        elif flag == b"9":
+            self.trailer = RET_TRAILER.ler_bytes(registro) if self.tipo == "RET" else ()
+        if len(sequenciais) >= TAMANHO_LOTE:
+            self._conferir_lote()
+
+    def finalizar(self):
+        """Confere o lote pendente; chamar depois do último registro."""
+        self._conferir_lote()
+        return self
+
+    def _conferir_lote(self):
+        self._conferir_sequenciais(self._sequenciais)
+        self._conferir_valores(self._valores)
+        self._conferir_nossos_numeros(self._nossos)
+        self._sequenciais.clear()
+        self._valores.clear()
+        self._nossos.clear()
+
+    def _conferir_sequenciais(self, sequenciais):
+        if not sequenciais:
+            return
+        try:
+            numeros = list(map(int, sequenciais))
+        except ValueError:
+            numeros = None
+
+        if numeros is not None:
+            inicio = self.proximo if self.registros else numeros[0]
+            if inicio is not None and numeros == list(range(inicio, inicio + len(numeros))):
+                if not self.registros:
+                    self.primeiro = inicio
+                self.registros += len(numeros)
+                self.ultimo = numeros[-1]
+                self.proximo = self.ultimo + 1
+                return
+
+        for sequencial in sequenciais:
+            try:
+                numero = int(sequencial)
+            except ValueError:
+                numero = None
+            self.registros += 1
+            if self.registros == 1:
+                self.primeiro = numero
+            else:
+                self._conferir_sequencial(numero)
+            self.ultimo = numero
+            self.proximo = numero + 1 if numero is not None else None
+
+    def _conferir_sequencial(self, numero):
+        if numero == self.proximo or (numero == 0 and self.proximo == MODULO_SEQUENCIAL):
+            return
+        # Depois de um sequencial inválido a contagem recomeça do próximo válido.
+        if numero is None or self.ultimo is not None:
+            self.falhas_sequencia += 1
+            self._exemplo("sequencia", f"{numero if numero is not None else 'inválido'} após {self.ultimo}")
+
+    def _conferir_valores(self, valores):
+        self.detalhes += len(valores)
+        try:
+            self.valor_titulo += sum(map(int, valores))
+        except ValueError:
+            self.valor_titulo += sum(converter_centavos(valor.decode("latin-1")) or 0 for valor in valores)
+
+    def _conferir_nossos_numeros(self, nossos):
+        vistos = self.nossos_numeros
+        novos = set(nossos)
+        vazio = b" " * (self._nosso.stop - self._nosso.start)
+        novos.discard(vazio)
+        if len(novos) == len(nossos) - nossos.count(vazio) and vistos.isdisjoint(novos):
+            vistos |= novos
+            return
+
+        for nosso_numero in nossos:
+            if not nosso_numero.strip():
+                continue
+            if nosso_numero in vistos:
+                self.repetidos += 1
+                self._exemplo("repetidos", nosso_numero.strip().decode("latin-1"))
+            else:
+                vistos.add(nosso_numero)
+
+    def _exemplo(self, tipo, texto):
+        exemplos = self.exemplos.setdefault(tipo, [])
+        if len(exemplos) < LIMITE_EXEMPLOS:
+            exemplos.append(texto)
+
+    def somar(self, outra):
+        """Incorpora a validação (já finalizada) da faixa seguinte do mesmo arquivo."""
+        if outra.registros:
+            if self.registros:
+                # O primeiro registro da outra faixa continua a sequência desta.
+                self._conferir_sequencial(outra.primeiro)
+            else:
+                self.primeiro = outra.primeiro
+            self.ultimo = outra.ultimo
+            self.proximo = outra.proximo
+        self.registros += outra.registros
+        self.detalhes += outra.detalhes
+        self.valor_titulo += outra.valor_titulo
+        self.falhas_sequencia += outra.falhas_sequencia
+        for tipo, exemplos in outra.exemplos.items():
+            for exemplo in exemplos:
+                self._exemplo(tipo, exemplo)
+
+        repetidos = self.nossos_numeros & outra.nossos_numeros
+        self.repetidos += outra.repetidos + len(repetidos)
+        for nosso_numero in sorted(repetidos):
+            self._exemplo("repetidos", nosso_numero.strip().decode("latin-1"))
+        self.nossos_numeros |= outra.nossos_numeros
+        if outra.trailer is not None:
+            self.trailer = outra.trailer
+
+    def divergencias(self):
+        """Lista das divergências encontradas (vazia se o arquivo está consistente)."""
+        divergencias = []
+        if self.registros and self.primeiro != 1:
+            divergencias.append(f"Sequencial do primeiro registro: {self.primeiro} (esperado 1)")
+        if self.falhas_sequencia:
+            divergencias.append(f"Quebras na sequência dos registros: {self.falhas_sequencia} "
+                                f"({'; '.join(self.exemplos['sequencia'])})")
+        if self.repetidos:
+            divergencias.append(f"Nossos números repetidos: {self.repetidos} "
+                                f"({', '.join(self.exemplos['repetidos'])})")
+
+        if self.trailer is None:
+            divergencias.append("Trailer ausente")
+        elif self.tipo == "RET":
+            total_registros, valor_total = self.trailer
+            try:
+                informado = int(total_registros)
+            except ValueError:
+                informado = None
+            if informado != self.detalhes % MODULO_TOTAL_REGISTROS:
+                divergencias.append(f"Total de registros do trailer: {total_registros.strip()} "
+                                    f"(detalhes lidos: {self.detalhes})")
+            valor_informado = converter_centavos(valor_total)
+            if valor_informado != self.valor_titulo % MODULO_VALOR_TOTAL:
+                divergencias.append(f"Valor total do trailer: {formatar_centavos(valor_informado or 0)} "
+                                    f"(soma dos títulos: {formatar_centavos(self.valor_titulo)})")
+        return divergencias
+
+    def exibir(self, nome):
+        """Exibe as divergências do arquivo; nada é exibido se estiver consistente."""
+        divergencias = self.divergencias()
+        if divergencias:
+            print(f"Validação de {nome}: {len(divergencias)} divergência(s)")
+            for divergencia in divergencias:
+                print(f"  - {divergencia}")
+        return divergencias
@@ -0,0 +1,63 @@
+"""Resumo do diretório: header e trailer lidos das pontas do arquivo, para qualquer tamanho."""
+
+import pytest
+
+from benchmarks.gerador import compilar_modelo
+from src.layouts.cnab400 import RET_DETALHE, RET_HEADER, RET_TRAILER
+from src.resumo import ResumoDiretorio, TAMANHO_LEITURA
+
+_HEADER = compilar_modelo(RET_HEADER, "0")
+_DETALHE = compilar_modelo(RET_DETALHE, "7")
+_TRAILER = compilar_modelo(RET_TRAILER, "9")
+
+
+def _gravar_ret(caminho, detalhes, terminador="\n", final=True, trailer=None):
+    linhas = [_HEADER(tipo_operacao="2R", tipo_servico="01", codigo_servico="COBRAN", agencia="1234",
+                      agencia_dv="5", conta="00012345", conta_dv="6", nome_empresa="EMPRESA", codigo_banco="001",
+                      nome_banco="BANCO", data_gravacao="200326", convenio="1234567", sequencial="000001")]
+    linhas += [_DETALHE(controle_participante=f"CTRL{i}", nosso_numero=f"{i:017d}", carteira="06", comando="01",
+                        data_liquidacao="200326", meu_numero=f"{i:010d}", data_vencimento="100426",
+                        valor_titulo="0000000012345", agencia_recebedora="0001", data_credito="210326",
+                        desconto="0000000000000", valor_recebido="0000000012345", sequencial=f"{i + 2:06d}")
+               for i in range(detalhes)]
+    if trailer is None:
+        trailer = _TRAILER(total_registros=f"{detalhes:06d}", valor_total=f"{12345 * detalhes:012d}",
+                           sequencial=f"{detalhes + 2:06d}")
+    linhas.append(trailer)
+    caminho.write_bytes((terminador.join(linhas) + (terminador if final else "")).encode("latin-1"))
+    return caminho
+
+
+@pytest.mark.parametrize("detalhes", [0, 1, 2, 3, 5])
+@pytest.mark.parametrize("terminador", ["\n", "\r\n"])
+@pytest.mark.parametrize("final", [True, False])
+def test_trailer_lido_em_qualquer_tamanho(tmp_path, detalhes, terminador, final):
+    arquivo = _gravar_ret(tmp_path / "TESTE.RET", detalhes, terminador, final)
+
+    resumo = ResumoDiretorio.resumir_arquivo(arquivo)
+
+    assert resumo['CONVENIO'] == "1234567"
+    assert resumo['DETALHES'] == str(detalhes)
+    assert resumo['VALOR TOTAL'] == f"{123.45 * detalhes:.2f}".replace(".", ",")
+
+
+@pytest.mark.parametrize("tamanho", [1203, 1604])
+def test_arquivos_entre_um_e_dois_blocos_de_leitura(tmp_path, tamanho):
+    # Entre TAMANHO_LEITURA e 2 * TAMANHO_LEITURA o fim do arquivo não está no bloco inicial.
+    arquivo = _gravar_ret(tmp_path / "TESTE.RET", tamanho // 401 - 2)
+    assert arquivo.stat().st_size == tamanho
+    assert TAMANHO_LEITURA < tamanho < 2 * TAMANHO_LEITURA
+
+    resumo = ResumoDiretorio.resumir_arquivo(arquivo)
+
+    assert resumo['DETALHES'] == str(tamanho // 401 - 2)
+    assert resumo['VALOR TOTAL'] != ""
+
+
+def test_totais_em_branco_ficam_ausentes(tmp_path):
+    arquivo = _gravar_ret(tmp_path / "TESTE.RET", 2, trailer="9")
+
+    resumo = ResumoDiretorio.resumir_arquivo(arquivo)
+
+    assert resumo['DETALHES'] == ""
+    assert resumo['VALOR TOTAL'] == ""
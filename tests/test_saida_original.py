@@ -0,0 +1,72 @@
+"""
+Saída de referência: relatórios, registros extraídos e análise por chave de
+um par REM/RET pequeno (`dados/entrada`), comparados byte a byte com os
+gerados pela versão original do leitor (`dados/esperado`).
+
+As entradas cobrem registros cortados no meio de campos, acentos, números
+em branco, códigos não mapeados e um RET sem trailer nem terminador final;
+cada caso roda com os terminadores originais ('\\n') e com '\\r\\n'. Uma
+mudança que altere a saída de propósito deve atualizar os arquivos
+esperados no mesmo commit.
+"""
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from src.analise import AnaliseGenerator
+from src.extratores.rem_extractor import RemExtractor
+from src.extratores.ret_extractor import RetExtractor
+from src.processadores.rem_processor import RemProcessor
+from src.processadores.ret_processor import RetProcessor
+
+DADOS = Path(__file__).parent / "dados"
+ENTRADAS = sorted((DADOS / "entrada").iterdir())
+ESPERADO = DADOS / "esperado"
+
+
+@pytest.fixture(params=["\n", "\r\n"], ids=["lf", "crlf"])
+def entrada(request, tmp_path):
+    diretorio = tmp_path / "entrada"
+    diretorio.mkdir()
+    for arquivo in ENTRADAS:
+        if request.param == "\n":
+            shutil.copy(arquivo, diretorio)
+        else:
+            (diretorio / arquivo.name).write_bytes(arquivo.read_bytes().replace(b"\n", request.param.encode()))
+    return diretorio
+
+
+def _eh_rem(arquivo):
+    return arquivo.suffix.upper() == ".REM"
+
+
+@pytest.mark.parametrize("nome", [arquivo.name for arquivo in ENTRADAS])
+def test_relatorio(entrada, tmp_path, nome):
+    arquivo = entrada / nome
+    processador, sufixo = (RemProcessor, "rem") if _eh_rem(arquivo) else (RetProcessor, "ret")
+    relatorio = tmp_path / f"{arquivo.stem}_{sufixo}.txt"
+
+    assert processador.processar(arquivo, relatorio)
+
+    assert relatorio.read_bytes() == (ESPERADO / relatorio.name).read_bytes()
+
+
+def test_registros_extraidos(entrada):
+    esperados = json.loads((ESPERADO / "registros.json").read_text(encoding="utf-8"))
+
+    for arquivo in sorted(entrada.iterdir()):
+        extrator = RemExtractor if _eh_rem(arquivo) else RetExtractor
+        assert [dict(registro.items()) for registro in extrator.extrair(arquivo)] == esperados[arquivo.name]
+
+
+def test_analise_por_chave(entrada, tmp_path):
+    saida = tmp_path / "saida"
+    saida.mkdir()
+
+    AnaliseGenerator.gerar(entrada, saida, por_chave=True)
+
+    analise, = saida.glob("analise_rem_ret_*.csv")
+    assert analise.read_bytes() == (ESPERADO / "analise_por_chave.csv").read_bytes()